@@ -0,0 +1,170 @@
+"""
+Adaptive concurrency control for the fetch/summarize pipeline.
+
+AIMDLimiter adjusts how many updates are processed at the same time with
+additive increase / multiplicative decrease: the limit grows slowly while
+latency stays close to its baseline and nothing fails, and is cut sharply
+on errors, throttling (429/5xx) or a latency spike. Every measured latency,
+spikes included, feeds a slow-moving baseline, so that a lasting latency
+shift is re-learned and the limit recovers. Tasks that didn't reach the
+backend (e.g. answered from a cache) are not measured.
+
+shared_limiter keeps one limiter per server process: Streamlit re-executes the
+app script on every rerun, so a limiter created there would forget what it
+learned and would not bound the updates in flight across sessions.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+_shared_limiter: Optional["AIMDLimiter"] = None
+_shared_limiter_lock = threading.Lock()
+
+
+class AIMDLimiter:
+    """
+    Thread-safe concurrency limiter with an AIMD controlled limit.
+    """
+
+    def __init__(self, initial_limit: int = 8, min_limit: int = 1, max_limit: int = 32,
+                 decrease_factor: float = 0.5, latency_tolerance: float = 2.0, baseline_weight: float = 0.1,
+                 history_size: int = 200):
+        """
+        Args:
+            initial_limit: Number of tasks allowed in flight at the start.
+            min_limit: Lowest limit the controller may set.
+            max_limit: Highest limit the controller may set.
+            decrease_factor: Factor applied to the limit on errors, throttling or latency spikes.
+            latency_tolerance: A latency above baseline * latency_tolerance counts as a spike.
+            baseline_weight: Weight of each measured latency in the moving baseline.
+            history_size: Number of limit changes kept for observability.
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.baseline_weight = baseline_weight
+        self.baseline_latency = None
+        self.in_flight = 0
+        self.history = deque(maxlen=history_size)
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._last_decrease_at = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Current number of tasks allowed in flight."""
+        with self._condition:
+            return int(self._limit)
+
+    def acquire(self) -> float:
+        """
+        Wait for a free slot.
+
+        Returns:
+            Start time of the task, to be passed to release.
+        """
+        with self._condition:
+            while self.in_flight >= int(self._limit):
+                self._condition.wait()
+            self.in_flight += 1
+        return time.monotonic()
+
+    def release(self, started_at: float, error: bool = False, throttled: bool = False, measured: bool = True) -> None:
+        """
+        Free a slot and adjust the limit from the outcome of the task.
+
+        Args:
+            started_at: Value returned by acquire.
+            error: Whether the task failed.
+            throttled: Whether the task was throttled (429) or hit a server error (5xx).
+            measured: Whether the latency of a successful task reflects the backend; unmeasured
+                tasks (cache hits) free their slot without changing the baseline or the limit.
+        """
+        now = time.monotonic()
+        latency = now - started_at
+        with self._condition:
+            self.in_flight -= 1
+            if throttled or error:
+                self._decrease(now, started_at, "throttled" if throttled else "error")
+            elif measured:
+                baseline = self.baseline_latency
+                self.baseline_latency = latency if baseline is None else \
+                    (1 - self.baseline_weight) * baseline + self.baseline_weight * latency
+                if baseline is not None and latency > baseline * self.latency_tolerance:
+                    self._decrease(now, started_at, f"latency {latency:.1f}s > baseline {baseline:.1f}s")
+                else:
+                    # Additive increase: about +1 after a full window of successful tasks
+                    self._set_limit(min(self.max_limit, self._limit + 1.0 / max(self._limit, 1.0)), "success")
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """
+        Context manager holding a slot; exceptions count as errors.
+
+        Yields:
+            Dictionary where the caller may set 'throttled' or 'error' to True, or 'measured' to False.
+        """
+        outcome = {"error": False, "throttled": False, "measured": True}
+        started_at = self.acquire()
+        try:
+            yield outcome
+        except Exception:
+            outcome["error"] = True
+            raise
+        finally:
+            self.release(started_at, error=outcome["error"], throttled=outcome["throttled"],
+                         measured=outcome["measured"])
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the current state for observability.
+
+        Returns:
+            Dictionary with the limit, tasks in flight, baseline latency and the history of limit changes.
+        """
+        with self._condition:
+            return {
+                "limit": int(self._limit),
+                "in_flight": self.in_flight,
+                "baseline_latency": self.baseline_latency,
+                "history": list(self.history),
+            }
+
+    def changes(self) -> List[Dict[str, Any]]:
+        """Get the history of limit changes (oldest first)."""
+        with self._condition:
+            return list(self.history)
+
+    def _decrease(self, now: float, started_at: float, reason: str) -> None:
+        # Tasks started before the last cut saw the old limit: cut only once per window
+        if started_at < self._last_decrease_at:
+            return
+        self._last_decrease_at = now
+        self._set_limit(max(self.min_limit, self._limit * self.decrease_factor), reason)
+
+    def _set_limit(self, new_limit: float, reason: str) -> None:
+        old_limit = int(self._limit)
+        self._limit = new_limit
+        if int(new_limit) != old_limit:
+            self.history.append({"time": time.time(), "old": old_limit, "new": int(new_limit), "reason": reason})
+            logging.info("Concurrency limit changed from %d to %d (%s)", old_limit, int(new_limit), reason)
+
+
+# Get the process-wide limiter, created with the given limits on first use
+def shared_limiter(initial_limit: int = 8, min_limit: int = 1, max_limit: int = 32) -> AIMDLimiter:
+    """
+    Returns the limiter shared by all sessions and reruns of the server process.
+
+    The limits are only used when the limiter is created.
+    """
+    global _shared_limiter
+    with _shared_limiter_lock:
+        if _shared_limiter is None:
+            _shared_limiter = AIMDLimiter(initial_limit=initial_limit, min_limit=min_limit, max_limit=max_limit)
+        return _shared_limiter
@@ -1,19 +1,43 @@
 import sys
 import os
+import asyncio
+import hashlib
+import json
 import requests
+import httpx
 import logging
 import re
+import threading
+import time
 import feedparser
 import urllib.parse as urlparse
-from datetime import datetime, timedelta
-from openai import AzureOpenAI
-from bs4 import BeautifulSoup
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from openai import (
+    AzureOpenAI, AsyncAzureOpenAI, RateLimitError, APIConnectionError, APIStatusError
+)
+from summary_cache import SummaryCache
+from update_store import UpdateStore
+from feed_cache import StaleWhileRevalidateCache
+from http_cache import ValidatorCache
+from date_index import FeedDateIndex
+from product_index import ProductIndex
+from html_extractor import extract_text_and_links
+from parsed_article import ParsedArticle
+from prompt_compaction import SENTENCE_END, compact_description, normalize_whitespace, remove_boilerplate, split_into_chunks
+from rate_limiter import RateLimiter, estimate_tokens, retry_after_seconds
+from retry_policy import NO_RETRY, RetryBudget, RetryDecision, RetryPolicy, RetryableStatusError
 
 # How many days back to include updates in slides
 DAYS = 7
 
 # Azure Updates API URL
 BASE_URL = "https://www.microsoft.com/releasecommunications/api/v2/azure/"
+# Azure Updates page of an article (followed by its docId)
+UPDATE_PAGE_URL = "https://azure.microsoft.com/updates?id="
 
 
 # Generate RSS feed URL from URL
@@ -26,10 +50,134 @@ systemprompt = ("渡されたデータに含まれている Azure のアップ
                 "各提供する地域のリージョンについては、翻訳せずに英語表記のままにしてください。" +
                 "リンク用のURLやマークダウンは含まず、プレーンテキストで出力してください。")
 
+# System prompt condensing one part of a long description (map step of map-reduce summarization)
+chunk_systemprompt = ("You condense one part of a long Azure update description into short plain-text notes. "
+                      "Keep every fact a summary may need: features, changes, dates, regions, SKUs, versions, "
+                      "limits and required actions. Drop repetitions. Keep region names in English and "
+                      "answer in the language of the text.")
+
+
+# Set User-Agent in header for Azure Updates API
+HEADERS = {
+    "User-Agent": os.getenv("HTTP_USER_AGENT") or "Safari/605.1.15"
+}
+
+# Connection pool size and timeouts (seconds) of the shared HTTP transport for Azure Updates API
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE") or "16")
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT") or "5")
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT") or "30")
+# Use HTTP/2 for the async client when the optional h2 package is installed
+HTTP2 = os.getenv("HTTP2", "false").lower() == "true"
+# Seconds the RSS feed download may wait for data from the server (read timeout)
+FEED_TIMEOUT = float(os.getenv("FEED_TIMEOUT") or "20")
+# Seconds allowed for one Azure OpenAI call (per attempt)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT") or "60")
+_http_session = None
+_http_session_lock = threading.Lock()
+
+# Connection pool size of the shared Azure OpenAI clients
+AOAI_POOL_SIZE = int(os.getenv("AOAI_POOL_SIZE") or "20")
+_openai_clients = {}
+# Connection pool of each endpoint, shared by the clients of successive API keys
+_openai_http_clients = {}
+_openai_clients_lock = threading.Lock()
+
+# Azure OpenAI quota of the deployment in requests and tokens per minute (0 = unlimited)
+AOAI_RPM = float(os.getenv("AOAI_RPM") or "0")
+AOAI_TPM = float(os.getenv("AOAI_TPM") or "0")
+# How many times a throttled (429) Azure OpenAI call is queued again before giving up
+AOAI_RATE_LIMIT_RETRIES = int(os.getenv("AOAI_RATE_LIMIT_RETRIES") or "8")
+# Completion tokens counted against the TPM quota in addition to the prompt
+COMPLETION_TOKENS_ESTIMATE = 300
+# Estimated token budget of the article sent for summarization (0 = send the whole description)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET") or "1500")
+# Maximum number of links of the description sent for summarization (0 = no limit)
+PROMPT_MAX_LINKS = int(os.getenv("PROMPT_MAX_LINKS") or "10")
+# Descriptions above this estimated token count are condensed chunk by chunk in parallel before
+# the summary call (map-reduce, 0 = disabled; by default every description that doesn't fit in
+# PROMPT_TOKEN_BUDGET), the size of the chunks and how many chunks of one article run at the same time
+MAP_REDUCE_THRESHOLD = int(os.getenv("MAP_REDUCE_THRESHOLD") or PROMPT_TOKEN_BUDGET)
+MAP_REDUCE_CHUNK_TOKENS = int(os.getenv("MAP_REDUCE_CHUNK_TOKENS") or "1200")
+MAP_REDUCE_CONCURRENCY = int(os.getenv("MAP_REDUCE_CONCURRENCY") or "4")
+# Condensed chunks kept in memory (shared by every language and summary kind)
+CHUNK_CACHE_MAX_ENTRIES = 1024
+_chunk_cache = OrderedDict()
+_chunk_cache_lock = threading.Lock()
+_rate_limiter = RateLimiter(AOAI_RPM, AOAI_TPM)
+# Number of Azure OpenAI calls made by each thread (tells cache hits from real calls)
+_llm_calls = threading.local()
+# Generation deadline (time.monotonic()) of the update processed by each thread
+_generation_deadline = threading.local()
+
+# Retries of transient failures (connection errors, timeouts, 5xx) of Azure Updates API and Azure OpenAI:
+# attempts per call, and the capped exponential backoff (seconds) with full jitter between them
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS") or "3")
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY") or "0.5")
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY") or "10")
+# HTTP status codes worth retrying
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+# One retry budget per upstream, so that retries stop while an upstream is failing
+_article_retry_budget = RetryBudget()
+_llm_retry_budget = RetryBudget()
+
+# How many updates the async API processes at the same time by default
+ASYNC_CONCURRENCY = 16
+
+# Download the articles of a date range with a few paged listing requests of Azure Updates API
+# instead of one request per article (read_and_summary uses the listed articles when available)
+BULK_FETCH = os.getenv("BULK_FETCH", "false").lower() == "true"
+# Articles per listing page, how many pages are downloaded at the same time,
+# and how long (seconds) listed articles are used before they are downloaded again
+BULK_PAGE_SIZE = int(os.getenv("BULK_PAGE_SIZE") or "100")
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY") or "4")
+BULK_CACHE_TTL = float(os.getenv("BULK_CACHE_TTL") or "900")
+# Fields of the articles requested from the listing
+ARTICLE_FIELDS = ("id", "title", "products", "description", "created", "modified")
+# docId -> (time listed, article)
+_bulk_articles = {}
+_bulk_articles_lock = threading.Lock()
+
+
+# Ask for the slide summary and the table summary in a single Azure OpenAI call
+# (set COMBINED_SUMMARY=false to always use one call per summary)
+COMBINED_SUMMARY = os.getenv("COMBINED_SUMMARY", "true").lower() != "false"
+
+
+# Persistent summary cache file (set SUMMARY_CACHE_PATH to enable, e.g. .cache/summaries.sqlite3)
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", "")
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES") or "10000")
+SUMMARY_CACHE_TTL_DAYS = float(os.getenv("SUMMARY_CACHE_TTL_DAYS") or "30")
+
+# Local store of synced articles and their summaries (set UPDATE_STORE_PATH to enable, e.g. .cache/updates.sqlite3)
+UPDATE_STORE_PATH = os.getenv("UPDATE_STORE_PATH", "")
+# How many articles a sync downloads at the same time
+SYNC_CONCURRENCY = int(os.getenv("SYNC_CONCURRENCY") or "8")
+_update_store = None
+_update_store_lock = threading.Lock()
+_summary_cache = None
+_summary_cache_lock = threading.Lock()
+
+
+# Seconds the RSS feed is shared between sessions before it is refreshed
+FEED_CACHE_TTL = float(os.getenv("FEED_CACHE_TTL") or "300")
+# Extra seconds a stale RSS feed is served while it is refreshed in the background
+FEED_CACHE_STALE = float(os.getenv("FEED_CACHE_STALE") or "3600")
+
+
+# ETag / Last-Modified validators and bodies of the RSS feed and articles, for conditional requests
+_validator_cache = ValidatorCache()
+
 
 # Date format 'Thu, 23 Jan 2025 21:30:21 Z' is used in RSS feed published field
 DATE_FORMAT = '%a, %d %b %Y %H:%M:%S %z'
 
+# Date index of the last feed entries, reused until the feed changes
+_date_index = None
+_date_index_lock = threading.Lock()
+# Product index of the last feed entries, reused until the feed changes
+_product_index = None
+_product_index_lock = threading.Lock()
+
 # Timezone specification
 os.environ['TZ'] = 'UTC'
 
@@ -44,8 +192,8 @@ def environment_check():
         return True
 
 
-# Function to generate Azure OpenAI client
-def azure_openai_client(key, endpoint):
+# Extract API version and deployment name from the Azure OpenAI endpoint URL
+def parse_endpoint(endpoint):
     parsed_url = urlparse.urlparse(endpoint)
     query_params = dict(urlparse.parse_qsl(parsed_url.query))
     if query_params is None:
@@ -63,70 +211,484 @@ def azure_openai_client(key, endpoint):
         logging.error("Deployment Name is not found in the endpoint URL.")
         return None, None
 
-    logging.debug(f"Extracted API Key: {key}")
     logging.debug(f"Extracted API Version: {api_version}")
     logging.debug(f"Extracted Deployment Name: {deployment_name}")
+    return api_version, deployment_name
+
+
+# Function to generate Azure OpenAI client
+def azure_openai_client(key, endpoint, http_client=None):
+    api_version, deployment_name = parse_endpoint(endpoint)
+    if api_version is None:
+        return None, None
+    logging.debug(f"Extracted API Key: {key}")
+
+    if http_client is None:
+        return AzureOpenAI(
+            api_key=key, api_version=api_version, azure_endpoint=endpoint, timeout=LLM_TIMEOUT, max_retries=0
+        ), deployment_name
+    # Retries are done by chat_completion (see llm_retry_policy), not by the SDK
+    return AzureOpenAI(
+        api_key=key, api_version=api_version, azure_endpoint=endpoint, http_client=http_client, max_retries=0
+    ), deployment_name
+
+
+# Get the process-wide Azure OpenAI client for the key and endpoint
+def get_azure_openai_client(key, endpoint):
+    """
+    Returns a cached (client, deployment_name) pair shared by all sessions and threads.
+
+    The endpoint keeps its connection pool (up to AOAI_POOL_SIZE connections) between
+    button presses. A client created for other credentials on the same endpoint is
+    dropped and the new one reuses its pool, so rotating the API key only requires
+    passing the new key.
+
+    Returns:
+        tuple: (AzureOpenAI client, deployment name), or (None, None) for an invalid endpoint
+    """
+    cache_key = (hashlib.sha256((key or "").encode("utf-8")).hexdigest(), endpoint)
+    with _openai_clients_lock:
+        cached = _openai_clients.get(cache_key)
+        if cached is not None:
+            return cached
+        if parse_endpoint(endpoint)[0] is None:
+            return None, None
+
+        http_client = _openai_http_clients.get(endpoint)
+        if http_client is None:
+            limits = httpx.Limits(max_connections=AOAI_POOL_SIZE, max_keepalive_connections=AOAI_POOL_SIZE)
+            http_client = httpx.Client(limits=limits, timeout=httpx.Timeout(LLM_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT))
+            _openai_http_clients[endpoint] = http_client
+        client, deployment_name = azure_openai_client(key, endpoint, http_client)
+
+        # Drop clients created for previous credentials of the same endpoint
+        # (their requests still in flight keep using the shared pool)
+        for previous_key in [k for k in _openai_clients if k[1] == endpoint]:
+            del _openai_clients[previous_key]
+        _openai_clients[cache_key] = (client, deployment_name)
+        return client, deployment_name
+
+
+# Forget all shared Azure OpenAI clients and close their connection pools (e.g. after credentials changed)
+def reset_azure_openai_clients():
+    with _openai_clients_lock:
+        _openai_clients.clear()
+        for http_client in _openai_http_clients.values():
+            http_client.close()
+        _openai_http_clients.clear()
+
+
+# Function to generate async Azure OpenAI client
+def async_azure_openai_client(key, endpoint):
+    api_version, deployment_name = parse_endpoint(endpoint)
+    if api_version is None:
+        return None, None
+
+    return AsyncAzureOpenAI(
+        api_key=key, api_version=api_version, azure_endpoint=endpoint, timeout=LLM_TIMEOUT, max_retries=0
+    ), deployment_name
+
+
+# Get the sorted date index of feed entries (built once per feed)
+def feed_date_index(entries):
+    global _date_index
+    with _date_index_lock:
+        # The feed caches return the same list object until the feed changes
+        if _date_index is None or _date_index.entries is not entries:
+            _date_index = FeedDateIndex(entries, DATE_FORMAT)
+        return _date_index
 
-    return AzureOpenAI(api_key=key, api_version=api_version, azure_endpoint=endpoint), deployment_name
+
+# Get the product index of feed entries (built once per feed)
+def feed_product_index(entries):
+    global _product_index
+    with _product_index_lock:
+        if _product_index is None or _product_index.entries is not entries:
+            _product_index = ProductIndex(entries, docid_from_url)
+        return _product_index
+
+
+# Product names updates can be filtered by: categories of the feed and products of the stored articles
+def update_products(entries):
+    products = {product.casefold(): product for product in feed_product_index(entries).products()}
+    store = get_update_store()
+    if store is not None:
+        for product in store.products():
+            products.setdefault(product.casefold(), product)
+    return sorted(products.values(), key=str.casefold)
+
+
+# Keep the URLs of the updates about at least one of the products (all URLs without products)
+def filter_urls_by_products(urls, products, entries):
+    if not products:
+        return urls
+    docids = feed_product_index(entries).docids(products)
+    store = get_update_store()
+    if store is not None:
+        docids |= store.product_ids(products)
+    return [url for url in urls if docid_from_url(url) in docids]
 
 
 # Get latest article date from entries
 def latest_article_date(entries):
     if len(entries) == 0:
         return None
+    # The feed lists the newest entry first
+    latest = feed_date_index(entries).published_at(0)
     # Convert to date format yyyy-mm-dd
-    return datetime.strptime(entries[0].published, DATE_FORMAT).astimezone().strftime('%Y-%m-%d')
+    return latest.strftime('%Y-%m-%d') if latest is not None else None
 
 
 # Get oldest article date from entries
 def oldest_article_date(entries):
     if len(entries) == 0:
         return None
+    # The feed lists the oldest entry last
+    oldest = feed_date_index(entries).published_at(-1)
     # Convert to date format yyyy-mm-dd
-    return datetime.strptime(entries[-1].published, DATE_FORMAT).astimezone().strftime('%Y-%m-%d')
+    return oldest.strftime('%Y-%m-%d') if oldest is not None else None
+
+
+# Download a feed with the shared HTTP session (feedparser only parses the downloaded bytes)
+def download_feed(url, headers=None):
+    """
+    Requests a feed with the connect timeout of the session and FEED_TIMEOUT seconds as
+    read timeout, so that a stalled server can't hold the calling thread.
+
+    Returns:
+        requests.Response (200 or 304), or None if the feed could not be retrieved.
+    """
+    try:
+        response = http_session().get(url, headers=headers or {}, timeout=(HTTP_CONNECT_TIMEOUT, FEED_TIMEOUT))
+    except requests.RequestException as e:
+        logging.error(f"Could not read the RSS feed {url}: {e}")
+        return None
+    if response.status_code not in (200, 304):
+        logging.error(f"Could not read the RSS feed {url}: status code {response.status_code}")
+        return None
+    return response
 
 
 # Read Azure Updates RSS feed and get entries
 def get_rss_feed_entries():
-    feed = feedparser.parse(rss_url(BASE_URL))
+    url = rss_url(BASE_URL)
+    # Conditional request: the feed comes back as 304 when it has not changed
+    headers = _validator_cache.request_headers(url)
+    response = download_feed(url, headers)
+    if headers and response is not None and response.status_code == 304:
+        entries = _validator_cache.mark_not_modified(url)
+        if entries is not None:
+            logging.debug("RSS feed not modified, reusing %d cached entries.", len(entries))
+            return entries
+        response = download_feed(url)
+    if response is None:
+        # Unreachable feed: serve the last copy rather than nothing, but don't count it as a 304
+        entries = _validator_cache.serve_stale(url)
+        if entries is not None:
+            logging.warning("RSS feed unreachable, serving %d stale cached entries.", len(entries))
+            return entries
+        return []
+    if response.status_code != 200:
+        return []
+
+    feed = feedparser.parse(response.content, response_headers=dict(response.headers))
+    _validator_cache.store(url, response.headers.get("ETag"), response.headers.get("Last-Modified"), feed.entries)
     return feed.entries
 
 
+# Load RSS feed entries for the shared feed cache (an empty feed is treated as a failed download)
+def load_rss_feed_entries():
+    entries = get_rss_feed_entries()
+    if not entries:
+        raise ValueError("RSS feed has no entries.")
+    return entries
+
+
+# Process-wide RSS feed cache shared by all sessions
+_feed_cache = StaleWhileRevalidateCache(load_rss_feed_entries, FEED_CACHE_TTL, FEED_CACHE_STALE)
+
+
+# Get RSS feed entries from the shared cache, downloading the feed only when it is too old
+def get_cached_rss_feed_entries():
+    entries = _feed_cache.get()
+    return entries if entries is not None else []
+
+
 # List URLs of entries within specified days from entries
 def get_update_urls(days):
     entries = get_rss_feed_entries()
     start_date = datetime.now().astimezone() - timedelta(days=days)  # Start date for retrieval
-    urls = []
-    for entry in entries:
-        try:
-            # Convert from DATE_FORMAT to datetime
-            published_at = datetime.strptime(entry.published, DATE_FORMAT).astimezone()
-            if (published_at > start_date):
-                urls.append(entry.link)
-        except Exception as e:
-            logging.error(f"Error processing entry: {entry.title} - {e}")
-            continue  # Skip entries with parsing errors
-    return urls
+    return [entry.link for entry in feed_date_index(entries).between(start_date, include_start=False)]
 
 
-# List URLs of entries within specified days from entries based on start date
-def target_update_urls(entries, start_date):
-    urls = []
-    for entry in entries:
-        try:
-            # Convert from DATE_FORMAT to datetime
-            published_at = datetime.strptime(entry.published, DATE_FORMAT).astimezone()
-            if (published_at >= start_date):
-                urls.append(entry.link)
-        except Exception as e:
-            logging.error(f"Error processing entry: {entry.title} - {e}")
-            continue  # Skip entries with parsing errors
+# List URLs of entries published from start date (and up to end date when given)
+def target_update_urls(entries, start_date, end_date=None):
+    urls = [entry.link for entry in feed_date_index(entries).between(start_date, end_date)]
+    store = get_update_store()
+    if store is not None:
+        # Updates kept in the local store that are no longer in the feed
+        listed = set(urls)
+        urls += [url for url in store.urls_between(start_date, end_date) if url not in listed]
     return urls
 
 
-# Get articles from URL in sequence
-def get_article(url):
-    # Generate URL for article
+# Get the process-wide update store, or None if it is disabled
+def get_update_store():
+    global _update_store
+    if not UPDATE_STORE_PATH:
+        return None
+    with _update_store_lock:
+        if _update_store is None:
+            store_dir = os.path.dirname(UPDATE_STORE_PATH)
+            if store_dir:
+                os.makedirs(store_dir, exist_ok=True)
+            _update_store = UpdateStore(UPDATE_STORE_PATH)
+    return _update_store
+
+
+# How many days back updates can be selected: the RSS feed window, or the history of the update store
+def available_days(default=90):
+    store = get_update_store()
+    oldest = store.stats()["oldest"] if store is not None else None
+    if not oldest:
+        return default
+    since = datetime.now(timezone.utc) - datetime.strptime(oldest, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    return max(default, since.days + 1)
+
+
+# Keep the URLs of the stored updates matching a full-text query (see UpdateStore.search)
+def filter_urls_by_search(urls, query, start_date=None, end_date=None):
+    store = get_update_store()
+    if store is None or not (query or "").strip():
+        return urls
+    matching = {result["id"] for result in store.search(query, start_date, end_date)}
+    return [url for url in urls if docid_from_url(url) in matching]
+
+
+# Version of a feed entry: changes when the update is modified
+def feed_entry_version(entry):
+    return entry.get("updated") or entry.get("published") or ""
+
+
+# Published date of a feed entry as a UTC timestamp
+def feed_entry_timestamp(entry):
+    try:
+        return datetime.strptime(entry.get("published"), DATE_FORMAT).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+# Yield futures as they complete, giving up on the others at the deadline
+def completed_until(futures, deadline=None):
+    """
+    Like concurrent.futures.as_completed, but stops without raising at the deadline.
+
+    Args:
+        futures: Futures to wait for.
+        deadline: Optional time.monotonic() value.
+
+    Yields:
+        Each future once it is done; the futures still pending at the deadline are left as they are.
+    """
+    pending = set(futures)
+    while pending:
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            logging.warning("Generation time budget exceeded, %d tasks were abandoned.", len(pending))
+            return
+        yield from done
+
+
+# Download the article of one feed entry into the update store
+def sync_store_entry(store, entry, cancelled):
+    """
+    Returns:
+        bool: True if the article was stored, False if it could not be downloaded or the sync was cancelled.
+    """
+    if cancelled.is_set():
+        return False
+    # Not get_article_data: the stored version is the one being replaced
+    data = bulk_article(entry.get("link"))
+    if data is None:
+        response = get_article(entry.get("link"))
+        if response is None:
+            return False
+        data = response.json()
+    if not data.get("id"):
+        data = dict(data, id=docid_from_url(entry.get("link")))
+    store.upsert_article(data, entry.get("link"), feed_entry_timestamp(entry), feed_entry_version(entry))
+    return True
+
+
+# Download the new and modified updates of the feed into the update store
+def sync_update_store(entries, start_date=None, end_date=None, max_workers=SYNC_CONCURRENCY, on_progress=None,
+                      deadline=None, links=None):
+    """
+    Incremental sync of the update store from the RSS feed.
+
+    Only entries that are not stored yet, or whose feed version (updated date)
+    changed since they were synced, are downloaded.
+
+    Args:
+        entries: RSS feed entries.
+        start_date: Earliest published date to sync, or None for the whole feed.
+        end_date: Latest published date to sync, or None for no upper bound.
+        max_workers: Number of articles downloaded at the same time.
+        on_progress: Optional callback called as on_progress(completed, total) when an entry is synced.
+        deadline: Optional time.monotonic() value. Entries not synced by then are left for the next sync
+            (their articles are downloaded when they are summarized).
+        links: Optional collection of the update URLs to sync (e.g. those of the selected products).
+            Pass the whole feed as entries, so that its date index is reused.
+
+    Returns:
+        dict: Number of 'synced', 'unchanged', 'failed' and 'skipped' entries.
+    """
+    store = get_update_store()
+    if store is None:
+        raise ValueError("UPDATE_STORE_PATH is not set.")
+    selected = feed_date_index(entries).between(start_date, end_date) if entries else []
+    if links is not None:
+        links = set(links)
+        selected = [entry for entry in selected if entry.get("link") in links]
+    changed = [
+        entry for entry in selected
+        if store.feed_version(docid_from_url(entry.get("link")) or "") != feed_entry_version(entry)
+    ]
+    result = {"synced": 0, "unchanged": len(selected) - len(changed), "failed": 0, "skipped": 0}
+    if not changed:
+        return result
+
+    timestamps = [timestamp for timestamp in map(feed_entry_timestamp, changed) if timestamp is not None]
+    if BULK_FETCH and timestamps:
+        load_articles_in_bulk(datetime.fromtimestamp(min(timestamps)).astimezone(), end_date)
+
+    # Set at the deadline, so that the workers don't start the entries still queued
+    cancelled = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="store-sync")
+    try:
+        futures = [executor.submit(sync_store_entry, store, entry, cancelled) for entry in changed]
+        for future in completed_until(futures, deadline):
+            result["synced" if future.result() else "failed"] += 1
+            if on_progress is not None:
+                on_progress(result["synced"] + result["failed"], len(changed))
+    finally:
+        cancelled.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+    result["skipped"] = len(changed) - result["synced"] - result["failed"]
+    logging.info("Update store sync: %s", result)
+    return result
+
+
+# Get the process-wide summary cache, or None if it is disabled
+def get_summary_cache():
+    global _summary_cache
+    if not SUMMARY_CACHE_PATH:
+        return None
+    with _summary_cache_lock:
+        if _summary_cache is None:
+            cache_dir = os.path.dirname(SUMMARY_CACHE_PATH)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            _summary_cache = SummaryCache(
+                SUMMARY_CACHE_PATH,
+                max_entries=SUMMARY_CACHE_MAX_ENTRIES,
+                ttl_seconds=SUMMARY_CACHE_TTL_DAYS * 24 * 60 * 60
+            )
+    return _summary_cache
+
+
+# Version of an article used in cache keys (modified timestamp, or a hash of its content)
+def article_version(article):
+    modified = article.get('modified')
+    if modified:
+        return modified
+    return SummaryCache.prompt_hash(article.get('title', '') + article.get('description', ''))
+
+
+# Cache key of a summary: docId + article version + system prompt hash (identifies the language) + deployment
+def summary_cache_key(article, system_prompt, deployment_name, kind):
+    return SummaryCache.make_key(
+        kind,
+        article.get('id', ''),
+        article_version(article),
+        SummaryCache.prompt_hash(system_prompt),
+        deployment_name
+    )
+
+
+# Look up a summary in the persistent cache, then in the update store
+def cached_summary(article, system_prompt, deployment_name, kind):
+    cache = get_summary_cache()
+    summary = None
+    if cache is not None:
+        summary = cache.get(summary_cache_key(article, system_prompt, deployment_name, kind))
+    store = get_update_store()
+    if summary is None and store is not None and article.get('id'):
+        summary = store.get_summary(article['id'], kind, SummaryCache.prompt_hash(system_prompt), deployment_name,
+                                    article_version(article))
+    if summary is not None:
+        logging.debug("Summary cache hit (%s): %s", kind, article.get('title', 'N/A'))
+    return summary
+
+
+# Store a summary in the persistent cache and in the update store
+def store_summary(article, system_prompt, deployment_name, kind, summary):
+    if not summary:
+        return
+    cache = get_summary_cache()
+    if cache is not None:
+        cache.set(summary_cache_key(article, system_prompt, deployment_name, kind), summary)
+    store = get_update_store()
+    if store is not None and article.get('id'):
+        store.set_summary(article['id'], kind, SummaryCache.prompt_hash(system_prompt), deployment_name,
+                          article_version(article), summary)
+
+
+# Get the process-wide pooled HTTP session for Azure Updates API
+def http_session():
+    """
+    Returns the shared requests.Session used for Azure Updates API.
+
+    Connections are kept alive and reused across articles and threads (urllib3's
+    connection pool is thread-safe), up to HTTP_POOL_SIZE connections per host.
+    """
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(HEADERS)
+            _http_session = session
+    return _http_session
+
+
+# Connect and read timeouts for requests to Azure Updates API
+def http_timeout():
+    return (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+
+# Create an httpx.AsyncClient configured like the shared HTTP session
+def async_http_client(max_connections=HTTP_POOL_SIZE):
+    http2 = False
+    if HTTP2:
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            logging.warning("HTTP2 is enabled but the h2 package is not installed. Using HTTP/1.1.")
+    return httpx.AsyncClient(
+        headers=HEADERS,
+        http2=http2,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    )
+
+
+# Generate Azure Updates API URL for the article URL
+def article_api_url(url):
     docid = docid_from_url(url)
     if docid is None:
         logging.error(f"Could not get docid from {url}.")
@@ -135,63 +697,764 @@ def get_article(url):
     if link is None:
         logging.error(f"Could not get link from {url}.")
         return None
+    return link
+
+
+# Log an unexpected response from Azure Updates API
+def log_article_error(link, response):
+    logging.error(f"Could not get article from {link}.")
+    logging.error(f"Status Code is '{response.status_code}'")
+    logging.error(f"Response Message is '{response.text}'")
+
+
+# Raise RetryableStatusError for a response with a transient status code
+def raise_for_transient_status(response):
+    if response.status_code in TRANSIENT_STATUS_CODES:
+        raise RetryableStatusError(response, retry_after_seconds(response.headers))
+
+
+# Classify a failed Azure Updates API request for the retry policy
+def classify_http_error(error):
+    if isinstance(error, RetryableStatusError):
+        return RetryDecision(True, error.retry_after, throttled=error.status_code == 429,
+                             maybe_processed=error.status_code != 429)
+    # The request never reached the server
+    if isinstance(error, (requests.ConnectTimeout, httpx.ConnectError, httpx.ConnectTimeout)):
+        return RetryDecision(True, maybe_processed=False)
+    if isinstance(error, (requests.ConnectionError, requests.Timeout, httpx.TimeoutException, httpx.NetworkError,
+                          httpx.RemoteProtocolError)):
+        return RetryDecision(True)
+    return NO_RETRY
+
 
-    # Set User-Agent in header for Azure Updates API
-    headers = {
-        "User-Agent": "Safari/605.1.15"
+# Retry policy for Azure Updates API requests
+def article_retry_policy():
+    return RetryPolicy(
+        classify_http_error, max_attempts=RETRY_MAX_ATTEMPTS, base_delay=RETRY_BASE_DELAY,
+        max_delay=RETRY_MAX_DELAY, budget=_article_retry_budget, name="Azure Updates API"
+    )
+
+
+# Cached response of an article the server answered 304 Not Modified for, or None
+def not_modified_article(link):
+    cached_response = _validator_cache.mark_not_modified(link)
+    if cached_response is not None:
+        logging.debug(f"Article not modified, reusing cached response for {link}.")
+    return cached_response
+
+
+# Keep the validators of a successful article response, or log why it can't be used
+def accept_article_response(link, response):
+    if response.status_code != 200:
+        log_article_error(link, response)
+        return None
+    _validator_cache.store(link, response.headers.get("ETag"), response.headers.get("Last-Modified"), response)
+    return response
+
+
+# Get articles from URL in sequence
+def get_article(url):
+    # Generate URL for article
+    link = article_api_url(url)
+    if link is None:
+        return None
+
+    session = http_session()
+
+    def fetch():
+        # Get article (conditional request when the article was downloaded before)
+        response = session.get(link, headers=_validator_cache.request_headers(link), timeout=http_timeout())
+        if response.status_code == 304:
+            cached_response = not_modified_article(link)
+            if cached_response is not None:
+                return cached_response
+            response = session.get(link, timeout=http_timeout())
+        raise_for_transient_status(response)
+        return response
+
+    try:
+        response = article_retry_policy().call(fetch)
+    except RetryableStatusError as e:
+        log_article_error(link, e.response)
+        return None
+    except requests.RequestException as e:
+        # Timeouts and connection errors drop this article only
+        logging.error(f"Could not get article from {link}: {e}")
+        return None
+    return accept_article_response(link, response)
+
+
+# Get articles from URL without blocking the event loop
+async def aget_article(url, http_client=None):
+    """
+    Async version of get_article built on httpx.AsyncClient.
+
+    Args:
+        url: URL of the Azure Updates article.
+        http_client: Optional shared httpx.AsyncClient (see async_http_client, which sets the
+            request headers). A temporary client is used if omitted.
+
+    Returns:
+        httpx.Response of the article, or None if it could not be retrieved.
+    """
+    link = article_api_url(url)
+    if link is None:
+        return None
+
+    if http_client is None:
+        async with async_http_client() as temporary_client:
+            return await aget_article(url, temporary_client)
+
+    async def fetch():
+        # Conditional request when the article was downloaded before
+        response = await http_client.get(link, headers=_validator_cache.request_headers(link))
+        if response.status_code == 304:
+            cached_response = not_modified_article(link)
+            if cached_response is not None:
+                return cached_response
+            response = await http_client.get(link)
+        raise_for_transient_status(response)
+        return response
+
+    try:
+        response = await article_retry_policy().acall(fetch)
+    except RetryableStatusError as e:
+        log_article_error(link, e.response)
+        return None
+    except httpx.HTTPError as e:
+        logging.error(f"Could not get article from {link}: {e}")
+        return None
+    return accept_article_response(link, response)
+
+
+# OData timestamp of a date (UTC)
+def odata_datetime(date):
+    return date.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+# URL of one page of the Azure Updates API article listing
+def article_listing_url(start_date, end_date=None, skip=0, top=BULK_PAGE_SIZE, count=False, by_created=False):
+    """
+    Builds an OData query on the article collection of Azure Updates API.
+
+    Articles modified since start_date (and created until end_date) are listed:
+    this covers every update published within the range, including those
+    modified afterwards. With by_created, only the articles created from
+    start_date and before end_date are listed, so that consecutive ranges
+    don't overlap.
+
+    Pages are always ordered by creation date and id: unlike the modified date,
+    they don't change while the pages are listed, so $skip doesn't skip articles.
+    """
+    if by_created:
+        conditions = [f"created ge {odata_datetime(start_date)}"]
+        if end_date is not None:
+            conditions.append(f"created lt {odata_datetime(end_date)}")
+    else:
+        conditions = [f"modified ge {odata_datetime(start_date)}"]
+        if end_date is not None:
+            conditions.append(f"created le {odata_datetime(end_date)}")
+    query = {
+        "$filter": " and ".join(conditions),
+        "$select": ",".join(ARTICLE_FIELDS),
+        "$orderby": "created asc,id asc",
+        "$top": top,
+        "$skip": skip,
     }
+    if count:
+        query["$count"] = "true"
+    return BASE_URL.rstrip("/") + "?" + urlparse.urlencode(query, quote_via=urlparse.quote)
+
+
+# Get one page of the article listing
+def get_article_page(start_date, end_date=None, skip=0, top=BULK_PAGE_SIZE, count=False, by_created=False):
+    """
+    Downloads one page of the article listing.
+
+    Returns:
+        dict: Decoded page ('value' holds the articles, '@odata.count' the total when count is True),
+            or None if it could not be retrieved.
+    """
+    link = article_listing_url(start_date, end_date, skip, top, count, by_created)
+    session = http_session()
 
-    # Get article
-    response = requests.get(link, headers=headers)
+    def fetch():
+        response = session.get(link, timeout=http_timeout())
+        raise_for_transient_status(response)
+        return response
+
+    try:
+        response = article_retry_policy().call(fetch)
+    except RetryableStatusError as e:
+        log_article_error(link, e.response)
+        return None
+    except requests.RequestException as e:
+        logging.error(f"Could not get article listing from {link}: {e}")
+        return None
     if response.status_code != 200:
-        logging.error(f"Could not get article from {link}.")
-        logging.error(f"Status Code is '{response.status_code}'")
-        logging.error(f"Response Message is '{response.text}'")
+        log_article_error(link, response)
         return None
+    try:
+        page = response.json()
+    except ValueError as e:
+        logging.error(f"Article listing from {link} is not valid JSON: {e}")
+        return None
+    if not isinstance(page, dict) or not isinstance(page.get("value"), list):
+        logging.error(f"Unexpected article listing from {link}.")
+        return None
+    return page
+
+
+# List the articles of a date range page by page, downloading the pages concurrently
+def list_articles(start_date, end_date=None, page_size=BULK_PAGE_SIZE, max_workers=BULK_CONCURRENCY):
+    """
+    Lists the articles modified since start_date (and created until end_date).
+
+    The first page also returns the total count, so the remaining pages are
+    downloaded concurrently. Without a count, pages are read one after the
+    other until a short page.
+
+    Returns:
+        list: Articles (dicts with ARTICLE_FIELDS), or None if a page could not be retrieved.
+    """
+    first = get_article_page(start_date, end_date, 0, page_size, count=True)
+    if first is None:
+        return None
+    articles = list(first["value"])
+    total = first.get("@odata.count")
+
+    if isinstance(total, int):
+        skips = range(page_size, total, page_size)
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="article-listing") as executor:
+            pages = list(executor.map(lambda skip: get_article_page(start_date, end_date, skip, page_size), skips))
+        if any(page is None for page in pages):
+            return None
+        for page in pages:
+            articles.extend(page["value"])
+        return articles
+
+    skip = len(articles)
+    page = first
+    while len(page["value"]) >= page_size:
+        page = get_article_page(start_date, end_date, skip, page_size)
+        if page is None:
+            return None
+        articles.extend(page["value"])
+        skip += len(page["value"])
+    return articles
+
+
+# Download the articles of a date range in bulk for read_and_summary
+def load_articles_in_bulk(start_date, end_date=None):
+    """
+    Lists the articles of a date range and keeps them for BULK_CACHE_TTL seconds,
+    so that read_and_summary doesn't request them one by one.
+
+    Returns:
+        int: Number of articles listed (0 if the listing failed)
+    """
+    articles = list_articles(start_date, end_date)
+    if articles is None:
+        logging.warning("Bulk article listing failed, articles will be downloaded one by one.")
+        return 0
+    now = time.monotonic()
+    with _bulk_articles_lock:
+        for docid in [docid for docid, (listed_at, _) in _bulk_articles.items() if now - listed_at > BULK_CACHE_TTL]:
+            del _bulk_articles[docid]
+        for article in articles:
+            if article.get("id"):
+                _bulk_articles[article["id"]] = (now, article)
+    logging.info("Listed %d articles in bulk.", len(articles))
+    return len(articles)
+
+
+# Article of a URL from the bulk listing, or None if it must be downloaded
+def bulk_article(url):
+    if not BULK_FETCH:
+        return None
+    docid = docid_from_url(url)
+    with _bulk_articles_lock:
+        listed = _bulk_articles.get(docid)
+    if listed is None or time.monotonic() - listed[0] > BULK_CACHE_TTL:
+        return None
+    return listed[1]
+
+
+# Article of a URL from the update store, or None if it is not stored
+def stored_article(url):
+    store = get_update_store()
+    docid = docid_from_url(url)
+    if store is None or docid is None:
+        return None
+    return store.get_article(docid)
+
+
+# Download the decoded article of a URL from Azure Updates API, keeping it in the update store
+def download_article_data(url):
+    response = get_article(url)
+    if response is None:
+        return None
+    logging.debug(response.text)
+    return store_article_data(url, response.json())
+
+
+# Keep a downloaded article in the update store
+def store_article_data(url, article):
+    store = get_update_store()
+    if store is not None and isinstance(article, dict) and article.get('id'):
+        store.upsert_article(article, url)
+    return article
+
+
+# Article of a URL already on hand (bulk listing or update store), or None if it must be downloaded
+def local_article_data(url):
+    return bulk_article(url) or stored_article(url)
+
+
+# Get the decoded article of a URL, from the bulk listing, the update store or Azure Updates API
+def get_article_data(url):
+    article = local_article_data(url)
+    if article is not None:
+        return article
+    return download_article_data(url)
+
+
+# Async version of get_article_data (the update store is read and written in a worker thread)
+async def aget_article_data(url, http_client=None):
+    article = await asyncio.to_thread(local_article_data, url)
+    if article is not None:
+        return article
+    response = await aget_article(url, http_client)
+    if response is None:
+        return None
+    logging.debug(response.text)
+    return await asyncio.to_thread(store_article_data, url, response.json())
+
+
+# Estimated number of tokens a chat completion request counts against the TPM quota
+def request_tokens(messages):
+    return sum(estimate_tokens(message.get("content", "")) for message in messages) + COMPLETION_TOKENS_ESTIMATE
+
+
+# Classify a failed Azure OpenAI call for the retry policy
+def classify_openai_error(error):
+    retry_after = retry_after_seconds(getattr(getattr(error, "response", None), "headers", None))
+    if isinstance(error, RateLimitError):
+        return RetryDecision(True, retry_after, throttled=True, maybe_processed=False)
+    if isinstance(error, APIConnectionError):
+        # Includes APITimeoutError
+        return RetryDecision(True)
+    if isinstance(error, APIStatusError) and (error.status_code >= 500 or error.status_code == 408):
+        return RetryDecision(True, retry_after)
+    return NO_RETRY
+
+
+# Retry policy for Azure OpenAI calls; throttled calls pause every caller through the shared rate limiter
+def llm_retry_policy():
+    return RetryPolicy(
+        classify_openai_error, max_attempts=RETRY_MAX_ATTEMPTS, base_delay=RETRY_BASE_DELAY,
+        max_delay=RETRY_MAX_DELAY, max_throttle_retries=AOAI_RATE_LIMIT_RETRIES, budget=_llm_retry_budget,
+        on_throttle=_rate_limiter.pause, name="Azure OpenAI"
+    )
+
+
+# Bound the work of the current thread (e.g. the map step of map-reduce) by a generation deadline
+@contextmanager
+def generation_deadline(deadline):
+    previous = getattr(_generation_deadline, "value", None)
+    _generation_deadline.value = deadline
+    try:
+        yield
+    finally:
+        _generation_deadline.value = previous
+
+
+# Seconds left before the generation deadline of the current thread, or None without a deadline
+def remaining_time():
+    deadline = getattr(_generation_deadline, "value", None)
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0)
+
+
+# Number of Azure OpenAI calls made so far by the current thread
+def llm_call_count():
+    return getattr(_llm_calls, "count", 0)
+
+
+# Number of 429 (or 5xx) answers of Azure OpenAI seen so far by the process
+def throttle_count():
+    return _rate_limiter.throttle_count
+
+
+# Call Azure OpenAI chat completions through the shared RPM/TPM rate limiter
+def chat_completion(client, **kwargs):
+    """
+    Sends a chat completion request once the rate limiter allows it.
+
+    Throttled (429) requests pause every caller for the Retry-After delay and are
+    queued again, up to AOAI_RATE_LIMIT_RETRIES times. Connection errors, timeouts
+    and 5xx answers are retried with backoff (see llm_retry_policy).
+
+    Args:
+        client: Azure OpenAI client
+        **kwargs: Arguments for client.chat.completions.create
+
+    Returns:
+        The chat completion response.
+    """
+    tokens = request_tokens(kwargs.get("messages", []))
+    _llm_calls.count = llm_call_count() + 1
+
+    def send():
+        _rate_limiter.acquire(tokens)
+        return client.chat.completions.create(**kwargs)
+
+    # Chat completions have no side effects, so every transient failure may be retried
+    return llm_retry_policy().call(send, idempotent=True)
 
-    return response
+
+# Call Azure OpenAI chat completions through the shared rate limiter without blocking the event loop
+async def achat_completion(client, **kwargs):
+    tokens = request_tokens(kwargs.get("messages", []))
+    _llm_calls.count = llm_call_count() + 1
+
+    async def send():
+        await _rate_limiter.aacquire(tokens)
+        return await client.chat.completions.create(**kwargs)
+
+    return await llm_retry_policy().acall(send, idempotent=True)
+
+
+# Yield the text of a streamed chat completion as it arrives
+def iter_completion_tokens(response):
+    """
+    Iterates over the content deltas of a chat completion created with stream=True.
+
+    Args:
+        response: Stream returned by client.chat.completions.create(stream=True)
+
+    Yields:
+        str: Text fragments in the order they were generated
+    """
+    for chunk in response:
+        delta = completion_delta(chunk)
+        if delta:
+            yield delta
+
+
+# Text fragment of one chunk of a streamed chat completion, or None
+def completion_delta(chunk):
+    # Azure OpenAI sends chunks without choices (e.g. prompt filter results)
+    if not chunk.choices:
+        return None
+    return chunk.choices[0].delta.content
+
+
+# Text of a chat completion created without stream
+def completion_text(response):
+    return response.choices[0].message.content
+
+
+# Stream a chat completion and return the full text
+def stream_chat_completion(client, on_token=None, **kwargs):
+    """
+    Sends a streaming chat completion request through the rate limiter.
+
+    Args:
+        client: Azure OpenAI client
+        on_token: Optional callback called with each text fragment as it arrives
+        **kwargs: Arguments for client.chat.completions.create
+
+    Returns:
+        str: The complete generated text
+    """
+    parts = []
+    for token in iter_completion_tokens(chat_completion(client, stream=True, **kwargs)):
+        parts.append(token)
+        if on_token is not None:
+            on_token(token)
+    return "".join(parts)
+
+
+# Async version of stream_chat_completion for AsyncAzureOpenAI clients
+async def astream_chat_completion(client, on_token=None, **kwargs):
+    parts = []
+    async for chunk in await achat_completion(client, stream=True, **kwargs):
+        token = completion_delta(chunk)
+        if not token:
+            continue
+        parts.append(token)
+        if on_token is not None:
+            on_token(token)
+    return "".join(parts)
+
+
+# Chat completion request for one summary of an article
+def summary_request(deployment_name, system_prompt, content):
+    return dict(
+        model=deployment_name,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": content}
+        ]
+    )
+
+
+# Build the user message sent to Azure OpenAI from an article
+def build_summary_content(article, description=None):
+    """
+    Builds the user message for summarization and the links found in the description.
+
+    The description and its links are compacted to PROMPT_TOKEN_BUDGET estimated
+    tokens and PROMPT_MAX_LINKS links.
+
+    Args:
+        article: Article data (ParsedArticle, or dict with 'title', 'products', 'description')
+        description: Plain text sent instead of the description (e.g. the condensed chunks of a long one)
+
+    Returns:
+        tuple: (content, link) where link is a comma separated string of all unique hrefs
+    """
+    text, links = description_text_and_links(article)
+    link = ", ".join(links)
+    if description is not None:
+        text = description
+    header = (
+        "Title: " + article['title'] + "\n"
+        + "Product: " + ", ".join(article['products']) + "\n"
+    )
+    text, prompt_links = compact_description(
+        text, links, PROMPT_TOKEN_BUDGET, PROMPT_MAX_LINKS,
+        reserved_tokens=estimate_tokens(header + "Description: \nLinks in description: ")
+    )
+    content = (
+        header
+        + "Description: " + text + "\n"
+        + "Links in description: " + ", ".join(prompt_links)
+    )
+    return content, link
+
+
+# Plain text and unique links of the description (parsed only once for a ParsedArticle)
+def description_text_and_links(article):
+    if isinstance(article, ParsedArticle):
+        return article.text, article.links
+    return extract_text_and_links(article['description'])
+
+
+# Chunks of a description too long to be summarized in one call, or None
+def long_description_chunks(article):
+    if MAP_REDUCE_THRESHOLD <= 0:
+        return None
+    text = remove_boilerplate(normalize_whitespace(description_text_and_links(article)[0]))
+    if estimate_tokens(text) <= MAP_REDUCE_THRESHOLD:
+        return None
+    return split_into_chunks(text, MAP_REDUCE_CHUNK_TOKENS)
+
+
+# Cache key of a condensed chunk (independent of the language of the final summary)
+def chunk_cache_key(chunk, deployment_name):
+    return SummaryCache.make_key("chunk", SummaryCache.prompt_hash(chunk_systemprompt + chunk), deployment_name)
+
+
+# Look up a condensed chunk in memory, then in the persistent cache
+def cached_chunk_summary(key):
+    with _chunk_cache_lock:
+        if key in _chunk_cache:
+            _chunk_cache.move_to_end(key)
+            return _chunk_cache[key]
+    cache = get_summary_cache()
+    return cache.get(key) if cache is not None else None
+
+
+# Store a condensed chunk in memory and in the persistent cache
+def store_chunk_summary(key, summary):
+    if not summary:
+        return
+    with _chunk_cache_lock:
+        _chunk_cache[key] = summary
+        _chunk_cache.move_to_end(key)
+        while len(_chunk_cache) > CHUNK_CACHE_MAX_ENTRIES:
+            _chunk_cache.popitem(last=False)
+    cache = get_summary_cache()
+    if cache is not None:
+        cache.set(key, summary)
+
+
+# Messages condensing one chunk of a description
+def chunk_messages(article, chunk, index, count):
+    return [
+        {"role": "system", "content": chunk_systemprompt},
+        {"role": "user", "content": f"Title: {article['title']}\nPart {index + 1} of {count}:\n{chunk}"}
+    ]
+
+
+# Condense one chunk of a description (map step)
+def summarize_chunk(client, deployment_name, article, chunk, index, count):
+    key = chunk_cache_key(chunk, deployment_name)
+    summary = cached_chunk_summary(key)
+    if summary is None:
+        response = chat_completion(client, model=deployment_name, messages=chunk_messages(article, chunk, index, count))
+        summary = completion_text(response)
+        store_chunk_summary(key, summary)
+    return summary
+
+
+# Condense one chunk of a description with the async Azure OpenAI client
+async def asummarize_chunk(client, deployment_name, article, chunk, index, count):
+    key = chunk_cache_key(chunk, deployment_name)
+    summary = await asyncio.to_thread(cached_chunk_summary, key)
+    if summary is None:
+        response = await achat_completion(
+            client, model=deployment_name, messages=chunk_messages(article, chunk, index, count)
+        )
+        summary = completion_text(response)
+        await asyncio.to_thread(store_chunk_summary, key, summary)
+    return summary
+
+
+# User message for an article, condensing a long description chunk by chunk in parallel first
+def map_reduce_content(client, deployment_name, article, content):
+    """
+    Map step of map-reduce summarization.
+
+    Descriptions above MAP_REDUCE_THRESHOLD estimated tokens are split into chunks
+    that are condensed in parallel (cached per chunk); the summary call (reduce
+    step) then gets the condensed notes instead of the truncated description.
+    Each article fans out to its own workers (up to MAP_REDUCE_CONCURRENCY), so that
+    long articles don't queue behind each other, and the map step gives up at the
+    generation deadline of the thread (see generation_deadline).
+
+    Args:
+        content: User message built by build_summary_content, kept for short descriptions
+            or when a chunk fails.
+
+    Returns:
+        str: User message for the summary call
+    """
+    chunks = long_description_chunks(article)
+    if not chunks:
+        return content
+    logging.debug("Condensing %d chunks of %s", len(chunks), article.get('title', 'N/A'))
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(MAP_REDUCE_CONCURRENCY, len(chunks))), thread_name_prefix="chunk-summary"
+    )
+    try:
+        futures = [
+            executor.submit(summarize_chunk, client, deployment_name, article, chunk, index, len(chunks))
+            for index, chunk in enumerate(chunks)
+        ]
+        notes = [future.result(timeout=remaining_time()) for future in futures]
+    except Exception as e:
+        logging.warning("Map-reduce summarization failed, summarizing the truncated description: %r", e)
+        return content
+    finally:
+        # Chunks still running at the deadline are left to finish (and fill the chunk cache) on their own
+        executor.shutdown(wait=False, cancel_futures=True)
+    return build_summary_content(article, "\n".join(notes))[0]
+
+
+# Async version of map_reduce_content for AsyncAzureOpenAI clients
+async def amap_reduce_content(client, deployment_name, article, content):
+    chunks = long_description_chunks(article)
+    if not chunks:
+        return content
+    try:
+        notes = await asyncio.wait_for(asyncio.gather(*[
+            asummarize_chunk(client, deployment_name, article, chunk, index, len(chunks))
+            for index, chunk in enumerate(chunks)
+        ]), timeout=remaining_time())
+    except Exception as e:
+        logging.warning("Map-reduce summarization failed, summarizing the truncated description: %s", e)
+        return content
+    return build_summary_content(article, "\n".join(notes))[0]
+
+
+# Log a failed summary generation
+def log_summary_error(e, article):
+    logging.error("An error occurred during summary generation: %s", e)
+    logging.error("Exception type: %s", type(e).__name__)
+    logging.error("Article title: %s", article.get('title', 'N/A') if article else 'Article is None')
+    import traceback
+    logging.error("Traceback: %s", traceback.format_exc())
 
 
 # Summarize article
-def summarize_article(client, deployment_name, article, system_prompt=None):
+def summarize_article(client, deployment_name, article, system_prompt=None, stream=False, on_token=None):
+    """
+    Summarize an article for its slide.
+
+    With stream=True the summary is requested as a stream and on_token is called
+    with each text fragment as it arrives (a cached summary is passed at once).
+
+    Returns:
+        tuple: (summary, link), or None if generation fails
+    """
     try:
         logging.debug("Starting article summarization...")
         logging.debug("Article keys: %s", article.keys() if article else 'Article is None')
 
-        link = ", ".join(get_unique_a_href_from_html(article['description']))
+        content, link = build_summary_content(article)
         logging.debug("Extracted links: %s", link)
-
-        content = (
-            "Title: " + article['title'] + "\n"
-            + "Product: " + ", ".join(article['products']) + "\n"
-            + "Description: " + remove_html_tags(article['description']) + "\n"
-            + "Links in description: " + link
-        )
         logging.debug("Content to summarize (first 200 chars): %s...", content[:200])
 
         # Summarize downloaded data with Azure OpenAI
         # Use default systemprompt if system_prompt is not specified
         prompt_to_use = system_prompt if system_prompt is not None else systemprompt
         logging.debug("Using system prompt (first 100 chars): %s...", prompt_to_use[:100])
+
+        summary = cached_summary(article, prompt_to_use, deployment_name, "summary")
+        if summary is not None:
+            if on_token is not None:
+                on_token(summary)
+            return summary, link
+        content = map_reduce_content(client, deployment_name, article, content)
         logging.debug("Calling Azure OpenAI with deployment: %s", deployment_name)
 
-        summary_list = client.chat.completions.create(
-            model=deployment_name,
-            messages=[
-                {"role": "system", "content": prompt_to_use},
-                {"role": "user", "content": content}
-            ]
-        )
-        summary = summary_list.choices[0].message.content
+        request = summary_request(deployment_name, prompt_to_use, content)
+        if stream:
+            summary = stream_chat_completion(client, on_token, **request)
+        else:
+            summary = completion_text(chat_completion(client, **request))
         logging.debug("Generated summary (first 100 chars): %s...", summary[:100] if summary else 'Summary is None')
+        store_summary(article, prompt_to_use, deployment_name, "summary", summary)
 
         return summary, link
     except Exception as e:
-        logging.error("An error occurred during summary generation: %s", e)
-        logging.error("Exception type: %s", type(e).__name__)
-        logging.error("Article title: %s", article.get('title', 'N/A') if article else 'Article is None')
-        import traceback
-        logging.error("Traceback: %s", traceback.format_exc())
+        log_summary_error(e, article)
+        return None
+
+
+# Summarize article with the async Azure OpenAI client
+async def asummarize_article(client, deployment_name, article, system_prompt=None, stream=False, on_token=None):
+    """
+    Async version of summarize_article for AsyncAzureOpenAI clients.
+
+    The summary cache and the update store are read and written in a worker thread.
+
+    Returns:
+        tuple: (summary, link), or None if generation fails
+    """
+    try:
+        content, link = build_summary_content(article)
+        prompt_to_use = system_prompt if system_prompt is not None else systemprompt
+        summary = await asyncio.to_thread(cached_summary, article, prompt_to_use, deployment_name, "summary")
+        if summary is not None:
+            if on_token is not None:
+                on_token(summary)
+            return summary, link
+        content = await amap_reduce_content(client, deployment_name, article, content)
+
+        request = summary_request(deployment_name, prompt_to_use, content)
+        if stream:
+            summary = await astream_chat_completion(client, on_token, **request)
+        else:
+            summary = completion_text(await achat_completion(client, **request))
+        await asyncio.to_thread(store_summary, article, prompt_to_use, deployment_name, "summary", summary)
+        return summary, link
+    except Exception as e:
+        log_summary_error(e, article)
         return None
 
 
@@ -210,28 +1473,248 @@ def summarize_article_for_table(client, deployment_name, article, system_prompt)
         str: One-sentence summary, or None if generation fails
     """
     try:
-        link = ", ".join(get_unique_a_href_from_html(article['description']))
-        content = (
-            "Title: " + article['title'] + "\n"
-            + "Product: " + ", ".join(article['products']) + "\n"
-            + "Description: " + remove_html_tags(article['description']) + "\n"
-            + "Links in description: " + link
-        )
+        table_summary = cached_summary(article, system_prompt, deployment_name, "table")
+        if table_summary is not None:
+            return table_summary
+        content, _ = build_summary_content(article)
+        content = map_reduce_content(client, deployment_name, article, content)
 
         # Generate one-sentence summary with Azure OpenAI
-        summary_response = client.chat.completions.create(
-            model=deployment_name,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": content}
-            ]
-        )
-        return summary_response.choices[0].message.content
+        table_summary = completion_text(chat_completion(client, **summary_request(deployment_name, system_prompt, content)))
+        store_summary(article, system_prompt, deployment_name, "table", table_summary)
+        return table_summary
     except Exception as e:
         logging.error("An error occurred during table summary generation: %s", e)
         return None
 
 
+# Summarize article for table display (one sentence) with the async Azure OpenAI client
+async def asummarize_article_for_table(client, deployment_name, article, system_prompt):
+    """
+    Async version of summarize_article_for_table for AsyncAzureOpenAI clients.
+
+    Returns:
+        str: One-sentence summary, or None if generation fails
+    """
+    try:
+        table_summary = await asyncio.to_thread(cached_summary, article, system_prompt, deployment_name, "table")
+        if table_summary is not None:
+            return table_summary
+        content, _ = build_summary_content(article)
+        content = await amap_reduce_content(client, deployment_name, article, content)
+        response = await achat_completion(client, **summary_request(deployment_name, system_prompt, content))
+        table_summary = completion_text(response)
+        await asyncio.to_thread(store_summary, article, system_prompt, deployment_name, "table", table_summary)
+        return table_summary
+    except Exception as e:
+        logging.error("An error occurred during table summary generation: %s", e)
+        return None
+
+
+# System prompt asking for both summaries as one JSON object
+def combined_system_prompt(system_prompt, table_system_prompt):
+    return (
+        'Respond only with a JSON object that has exactly two string fields, "summary" and "table_summary".\n'
+        + 'Instructions for "summary": ' + system_prompt + "\n"
+        + 'Instructions for "table_summary": ' + table_system_prompt
+    )
+
+
+# Chat completion request for the slide and table summaries as one JSON object
+def combined_summary_request(deployment_name, system_prompt, table_system_prompt, content):
+    request = summary_request(deployment_name, combined_system_prompt(system_prompt, table_system_prompt), content)
+    request["response_format"] = {"type": "json_object"}
+    return request
+
+
+# Both summaries of an article from the caches, or None unless both are cached
+def cached_combined_summary(article, system_prompt, table_system_prompt, deployment_name):
+    summary = cached_summary(article, system_prompt, deployment_name, "summary")
+    table_summary = cached_summary(article, table_system_prompt, deployment_name, "table")
+    if summary is None or table_summary is None:
+        return None
+    return summary, table_summary
+
+
+# Parse the answer to a combined summary request and store both summaries
+def store_combined_summary(article, system_prompt, table_system_prompt, deployment_name, text):
+    """
+    Returns:
+        tuple: (summary, table_summary), or None if the output can't be used
+    """
+    parsed = parse_combined_summary(text)
+    if parsed is None:
+        return None
+    store_summary(article, system_prompt, deployment_name, "summary", parsed[0])
+    store_summary(article, table_system_prompt, deployment_name, "table", parsed[1])
+    return parsed
+
+
+# Validate the JSON object returned for a combined summary request
+def parse_combined_summary(text):
+    """
+    Parses the output of a combined summary request.
+
+    Args:
+        text: Message content returned by Azure OpenAI
+
+    Returns:
+        tuple: (summary, table_summary), or None if the output is not a valid combined summary
+    """
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        logging.warning("Combined summary is not valid JSON: %s", text)
+        return None
+    if not isinstance(data, dict):
+        logging.warning("Combined summary is not a JSON object: %s", text)
+        return None
+
+    summary = data.get("summary")
+    table_summary = data.get("table_summary")
+    if not isinstance(summary, str) or not summary.strip() or \
+            not isinstance(table_summary, str) or not table_summary.strip():
+        logging.warning("Combined summary is missing 'summary' or 'table_summary': %s", text)
+        return None
+    return summary.strip(), table_summary.strip()
+
+
+# Decoded prefix of a string field of a JSON object that is still being generated
+def partial_json_string(text, field):
+    """
+    Reads the value of a string field from the beginning of a JSON object.
+
+    Args:
+        text: JSON text received so far
+        field: Name of the string field
+
+    Returns:
+        str: The part of the value received so far (up to the last complete escape
+            sequence), or None if the value hasn't started yet
+    """
+    match = re.search(r'"' + re.escape(field) + r'"\s*:\s*"', text)
+    if match is None:
+        return None
+    start = position = match.end()
+    while position < len(text):
+        character = text[position]
+        if character == '"':
+            break
+        if character == '\\':
+            length = 6 if text[position + 1:position + 2] == 'u' else 2
+            # The high surrogate of a \\u pair is decoded with its low surrogate
+            if length == 6 and text[position + 2:position + 4].lower() in ('d8', 'd9', 'da', 'db'):
+                length = 12
+            if position + length > len(text):
+                break
+            position += length
+        else:
+            position += 1
+    try:
+        return json.loads('"' + text[start:position] + '"', strict=False)
+    except ValueError:
+        return None
+
+
+# Pass the slide summary of a streamed combined summary to on_token as it is generated
+def combined_summary_streamer(on_token):
+    state = {"text": "", "sent": 0}
+
+    def on_json_token(token):
+        state["text"] += token
+        summary = partial_json_string(state["text"], "summary")
+        # A summary starts after its leading whitespace, like the parsed summary
+        if summary is not None and len(summary.lstrip()) > state["sent"]:
+            summary = summary.lstrip()
+            on_token(summary[state["sent"]:])
+            state["sent"] = len(summary)
+
+    return on_json_token
+
+
+# Summarize article for slides and table display with a single Azure OpenAI call
+def summarize_article_combined(client, deployment_name, article, system_prompt, table_system_prompt, on_token=None):
+    """
+    Generate the slide summary and the one-sentence table summary in one request.
+
+    Args:
+        client: Azure OpenAI client
+        deployment_name: Model deployment name
+        article: Article data (dict with 'title', 'products', 'description')
+        system_prompt: System prompt for the slide summary
+        table_system_prompt: System prompt for the one-sentence table summary
+        on_token: Optional callback; the JSON answer is then streamed and on_token is called
+            with each fragment of its slide summary (a cached summary is passed at once)
+
+    Returns:
+        tuple: (summary, table_summary, link), or None if the output can't be used
+    """
+    try:
+        content, link = build_summary_content(article)
+        cached = cached_combined_summary(article, system_prompt, table_system_prompt, deployment_name)
+        if cached is not None:
+            if on_token is not None:
+                on_token(cached[0])
+            return cached[0], cached[1], link
+        content = map_reduce_content(client, deployment_name, article, content)
+
+        request = combined_summary_request(deployment_name, system_prompt, table_system_prompt, content)
+        if on_token is not None:
+            text = stream_chat_completion(client, combined_summary_streamer(on_token), **request)
+        else:
+            text = completion_text(chat_completion(client, **request))
+        parsed = store_combined_summary(article, system_prompt, table_system_prompt, deployment_name, text)
+        if parsed is None:
+            return None
+        return parsed[0], parsed[1], link
+    except Exception as e:
+        logging.error("An error occurred during combined summary generation: %s", e)
+        return None
+
+
+# Summarize article for slides and table display with a single async Azure OpenAI call
+async def asummarize_article_combined(client, deployment_name, article, system_prompt, table_system_prompt,
+                                      on_token=None):
+    """
+    Async version of summarize_article_combined for AsyncAzureOpenAI clients.
+
+    The summary cache and the update store are read and written in a worker thread.
+
+    Returns:
+        tuple: (summary, table_summary, link), or None if the output can't be used
+    """
+    try:
+        content, link = build_summary_content(article)
+        cached = await asyncio.to_thread(
+            cached_combined_summary, article, system_prompt, table_system_prompt, deployment_name
+        )
+        if cached is not None:
+            if on_token is not None:
+                on_token(cached[0])
+            return cached[0], cached[1], link
+        content = await amap_reduce_content(client, deployment_name, article, content)
+
+        request = combined_summary_request(deployment_name, system_prompt, table_system_prompt, content)
+        if on_token is not None:
+            text = await astream_chat_completion(client, combined_summary_streamer(on_token), **request)
+        else:
+            text = completion_text(await achat_completion(client, **request))
+        parsed = await asyncio.to_thread(
+            store_combined_summary, article, system_prompt, table_system_prompt, deployment_name, text
+        )
+        if parsed is None:
+            return None
+        return parsed[0], parsed[1], link
+    except Exception as e:
+        logging.error("An error occurred during combined summary generation: %s", e)
+        return None
+
+
+# URL of the Azure Updates page of an article, as linked from the RSS feed
+def update_url(docid):
+    return UPDATE_PAGE_URL + docid
+
+
 # Generate Azure Updates API URL
 def target_url(id):
     if id is None or id == '':
@@ -239,7 +1722,8 @@ def target_url(id):
     return BASE_URL + id
 
 
-# Get article ID from URL
+# Get article ID from URL (cached: the same URL is looked up for the API request and the result)
+@lru_cache(maxsize=4096)
 def docid_from_url(url):
     query = urlparse.urlparse(url).query
     if query is None or query == '':
@@ -255,8 +1739,7 @@ def docid_from_url(url):
 
 # Remove HTML tags from description
 def remove_html_tags(text):
-    soup = BeautifulSoup(text, 'html.parser')
-    return soup.get_text()
+    return extract_text_and_links(text)[0]
 
 
 # Get href from a tags in description
@@ -270,52 +1753,197 @@ def get_unique_a_href_from_html(html):
     Returns:
         list: A list of unique href attribute values from <a> tags.
     """
-    soup = BeautifulSoup(html, 'html.parser')
-    return list(dict.fromkeys([a['href'] for a in soup.find_all('a', href=True)]))
+    return extract_text_and_links(html)[1]
 
 
-# Get Azure Updates article ID from URL passed as argument, make HTTP Get to Azure Updates API, and summarize the article
-def read_and_summary(client, deployment_name, url, system_prompt=None):
-    # Download data from URL
-    response = get_article(url)
-    if response is None:
-        return None
-    logging.debug(response.text)
+# Build a summary from the first sentences of the description, without Azure OpenAI
+def extractive_summary(text, max_sentences=3, max_chars=400):
+    """
+    Extracts the leading sentences of a plain-text description.
 
-    summary, link = summarize_article(client, deployment_name, response.json(), system_prompt)
-    if summary is None:
-        logging.error("Summary was not generated.")
-        return None
+    Used as a degraded summary when Azure OpenAI fails or times out, so that the
+    update still gets a slide.
+
+    Args:
+        text: Plain-text description.
+        max_sentences: Maximum number of sentences kept.
+        max_chars: Maximum length of the summary.
 
+    Returns:
+        str: Extracted summary (empty if the text is empty)
+    """
+    text = re.sub(r'\s+', ' ', text or '').strip()
+    sentences = [sentence.strip() for sentence in SENTENCE_END.split(text) if sentence.strip()]
+    summary = ""
+    for sentence in sentences[:max_sentences]:
+        # CJK sentences are written without a space after the full stop
+        separator = "" if summary.endswith(("。", "！", "？")) else " "
+        candidate = summary + separator + sentence if summary else sentence
+        if len(candidate) > max_chars:
+            break
+        summary = candidate
+    if not summary:
+        summary = text[:max_chars].rstrip() + ("..." if len(text) > max_chars else "")
+    return summary
+
+
+# Store title, description, and summary of an article in JSON format
+def build_summary_result(url, article, summary, link, table_summary=None, degraded=False):
     # Get article ID from URL
-    docid = docid_from_url(url)
+    docid = article.docid if isinstance(article, ParsedArticle) and article.docid else docid_from_url(url)
     if docid is None:
         logging.error(f"Could not get docid from {url}.")
         docid = ""
     # Remove HTML tags from description
-    description = remove_html_tags(response.json()['description'])
+    description, _ = description_text_and_links(article)
     if description is None:
-        logging.error(f"Failed to remove HTML tags from {response.json()['description']}.")
-        description = response.json()['description']
+        logging.error(f"Failed to remove HTML tags from {article['description']}.")
+        description = article['description']
 
-    # Store title, description, and summary in retval in JSON format
     retval = {
         "url": url,
         "apiUrl": target_url(docid),
         "docId": docid,
-        "title": response.json()['title'],
-        "products": response.json()['products'],
+        "title": article['title'],
+        "products": article['products'],
         "description": description,
         "summary": summary,
-        "publishedDate": response.json()['created'],
-        "updatedDate": response.json()['modified'],
-        "referenceLink": link
+        "tableSummary": table_summary,
+        "publishedDate": article['created'],
+        "updatedDate": article['modified'],
+        "referenceLink": link,
+        # True when the summary was extracted from the description because Azure OpenAI failed
+        "degraded": degraded,
+        # Parsed Azure Updates API payload, reusable without downloading the article again
+        "article": article
     }
     logging.debug(retval)
-
     return retval
 
 
+# Result with an extractive summary for an article Azure OpenAI could not summarize
+def build_degraded_result(url, article):
+    logging.warning("Using an extractive summary for %s", url)
+    text, links = description_text_and_links(article)
+    link = ", ".join(links)
+    summary = extractive_summary(text)
+    return build_summary_result(url, article, summary, link, degraded=True)
+
+
+# Get Azure Updates article ID from URL passed as argument, make HTTP Get to Azure Updates API, and summarize the article
+def read_and_summary(client, deployment_name, url, system_prompt=None, table_system_prompt=None,
+                     degrade_on_failure=False, on_token=None):
+    """
+    Downloads an Azure Updates article and summarizes it.
+
+    When table_system_prompt is given, the slide summary and the table summary are
+    requested in a single call (falling back to one call per summary if the combined
+    output can't be parsed) and the table summary is returned as 'tableSummary'.
+
+    When degrade_on_failure is True and the summary can't be generated, the result
+    holds an extractive summary of the description and 'degraded' is True.
+
+    When on_token is given, the slide summary is streamed and on_token is called with
+    each text fragment (with the combined call, the slide summary is read from the JSON
+    answer while it is generated). The fallback calls are not streamed then, so that
+    the text already shown isn't repeated.
+    """
+    # Download data from URL (or take it from the bulk listing)
+    data = get_article_data(url)
+    if data is None:
+        return None
+    # Decode the article and parse its description once, and reuse them for the summaries and the result
+    article = ParsedArticle(data, docid_from_url(url))
+    prompt_to_use = system_prompt if system_prompt is not None else systemprompt
+
+    if table_system_prompt is not None:
+        combined = summarize_article_combined(
+            client, deployment_name, article, prompt_to_use, table_system_prompt, on_token=on_token
+        )
+        if combined is not None:
+            summary, table_summary, link = combined
+            return build_summary_result(url, article, summary, link, table_summary)
+        logging.warning("Combined summary failed, falling back to separate summary calls.")
+        on_token = None
+
+    if on_token is not None:
+        result = summarize_article(client, deployment_name, article, system_prompt, stream=True, on_token=on_token)
+    else:
+        result = summarize_article(client, deployment_name, article, system_prompt)
+    if result is None or result[0] is None:
+        logging.error("Summary was not generated.")
+        return build_degraded_result(url, article) if degrade_on_failure else None
+    summary, link = result
+
+    table_summary = None
+    if table_system_prompt is not None:
+        table_summary = summarize_article_for_table(client, deployment_name, article, table_system_prompt)
+
+    return build_summary_result(url, article, summary, link, table_summary)
+
+
+# Async version of read_and_summary for AsyncAzureOpenAI clients
+async def aread_and_summary(client, deployment_name, url, system_prompt=None, table_system_prompt=None,
+                            degrade_on_failure=False, on_token=None, *, http_client=None):
+    data = await aget_article_data(url, http_client)
+    if data is None:
+        return None
+
+    article = ParsedArticle(data, docid_from_url(url))
+    prompt_to_use = system_prompt if system_prompt is not None else systemprompt
+
+    if table_system_prompt is not None:
+        combined = await asummarize_article_combined(
+            client, deployment_name, article, prompt_to_use, table_system_prompt, on_token=on_token
+        )
+        if combined is not None:
+            summary, table_summary, link = combined
+            return build_summary_result(url, article, summary, link, table_summary)
+        logging.warning("Combined summary failed, falling back to separate summary calls.")
+        on_token = None
+
+    result = await asummarize_article(
+        client, deployment_name, article, system_prompt, stream=on_token is not None, on_token=on_token
+    )
+    if result is None or result[0] is None:
+        logging.error("Summary was not generated.")
+        return build_degraded_result(url, article) if degrade_on_failure else None
+    summary, link = result
+
+    table_summary = None
+    if table_system_prompt is not None:
+        table_summary = await asummarize_article_for_table(client, deployment_name, article, table_system_prompt)
+
+    return build_summary_result(url, article, summary, link, table_summary)
+
+
+# Read and summarize many articles from one event loop
+async def aread_and_summary_all(client, deployment_name, urls, system_prompt=None, concurrency=ASYNC_CONCURRENCY,
+                                table_system_prompt=None):
+    """
+    Runs aread_and_summary for all URLs concurrently over one shared httpx.AsyncClient.
+
+    Args:
+        client: AsyncAzureOpenAI client
+        deployment_name: Model deployment name
+        urls: List of Azure Updates article URLs
+        system_prompt: System prompt for the summary (default is Japanese)
+        concurrency: Maximum number of articles processed at the same time
+        table_system_prompt: Optional system prompt for the one-sentence table summary
+
+    Returns:
+        list: Results of aread_and_summary in the same order as urls (None for failures)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    async with async_http_client(max_connections=concurrency) as http_client:
+        async def read_one(url):
+            async with semaphore:
+                return await aread_and_summary(client, deployment_name, url, system_prompt, table_system_prompt,
+                                               http_client=http_client)
+
+        return await asyncio.gather(*(read_one(url) for url in urls))
+
+
 def main():
     from dotenv import load_dotenv
 
@@ -348,12 +1976,16 @@ def main():
     print(f"There are {len(urls)} Azure updates.")
     print('The included Azure Updates URLs are as follows:')
     print(urls)
+    if BULK_FETCH:
+        load_articles_in_bulk(start_date)
     for url in urls:
         result = read_and_summary(client, deployment_name, url)
         if result is None:
             continue
         print("--------------------")
         for key, value in result.items():
+            if key == "article":
+                continue
             print(f"{key}: {value}")
             print()
         print("--------------------")
@@ -0,0 +1,180 @@
+"""
+Historical backfill of the update store beyond the RSS feed window.
+
+The RSS feed only lists recent updates, so the store (UPDATE_STORE_PATH) can't
+answer quarterly or yearly decks from the feed alone. Backfill walks the
+Azure Updates API history instead: the date range is split into fixed windows
+of creation dates, the windows are listed in parallel under a requests per
+minute limit, and every article is stored with the link of its Azure Updates
+page. Each completed window is recorded in the store, so an interrupted
+backfill resumes where it stopped:
+
+    python backfill.py --start 2024-01-01 [--end 2024-12-31] [--window-days 30] [--workers 4] [--rpm 60]
+"""
+
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Load environment variables before azureupdatehelper reads its configuration
+load_dotenv()
+
+import azureupdatehelper as azup  # noqa: E402
+from rate_limiter import RateLimiter  # noqa: E402
+from update_store import UpdateStore  # noqa: E402
+
+# Days of article creation dates listed by one window
+BACKFILL_WINDOW_DAYS = int(os.getenv("BACKFILL_WINDOW_DAYS") or "30")
+# Number of windows listed at the same time
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY") or "4")
+# Maximum Azure Updates API requests per minute (0 = unlimited)
+BACKFILL_REQUESTS_PER_MINUTE = float(os.getenv("BACKFILL_REQUESTS_PER_MINUTE") or "60")
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+# Split a date range into windows aligned on multiples of window_days since the epoch
+def backfill_windows(start_date: datetime, end_date: datetime, window_days: int) -> List[Tuple[datetime, datetime]]:
+    """
+    The same range always gives the same windows, whatever the dates given, so
+    that the windows completed by a previous run are recognized.
+
+    Returns:
+        list: (start, end) UTC windows covering the range, newest first (end excluded).
+    """
+    length = timedelta(days=max(1, window_days))
+    start = EPOCH + ((start_date - EPOCH) // length) * length
+    windows = []
+    while start < end_date:
+        windows.append((start, start + length))
+        start += length
+    return windows[::-1]
+
+
+class Backfill:
+    """
+    Stores the articles created within a date range, one window at a time.
+    """
+
+    def __init__(self, store: UpdateStore, window_days: int = BACKFILL_WINDOW_DAYS,
+                 max_workers: int = BACKFILL_CONCURRENCY,
+                 requests_per_minute: float = BACKFILL_REQUESTS_PER_MINUTE, page_size: int = azup.BULK_PAGE_SIZE):
+        """
+        Args:
+            store: Update store the articles and the completed windows are written to.
+            window_days: Days of creation dates listed by one window.
+            max_workers: Number of windows listed at the same time.
+            requests_per_minute: Maximum Azure Updates API requests per minute (0 = unlimited).
+            page_size: Number of articles requested per page.
+        """
+        self.store = store
+        self.window_days = window_days
+        self.max_workers = max_workers
+        self.page_size = page_size
+        self.limiter = RateLimiter(requests_per_minute)
+
+    def fetch_page(self, start: datetime, end: datetime, skip: int) -> Optional[dict]:
+        """Get one page of the articles created within a window, within the request rate."""
+        self.limiter.acquire(0)
+        return azup.get_article_page(start, end, skip, self.page_size, count=skip == 0, by_created=True)
+
+    def backfill_window(self, window: Tuple[datetime, datetime]) -> Optional[int]:
+        """
+        Store every article created within a window and record the window as completed.
+
+        The current window isn't recorded, as updates are still being published in it.
+
+        Returns:
+            int: Number of articles stored, or None if a page could not be retrieved or
+                fewer articles than the listing counted were stored.
+        """
+        start, end = window
+        stored = set()
+        skip = 0
+        total = None
+        while True:
+            page = self.fetch_page(start, end, skip)
+            if page is None:
+                logging.warning("Backfill of %s - %s stopped after %d articles.", start.date(), end.date(),
+                                len(stored))
+                return None
+            if skip == 0 and isinstance(page.get("@odata.count"), int):
+                total = page["@odata.count"]
+            for article in page["value"]:
+                if article.get("id"):
+                    self.store.upsert_article(article, azup.update_url(article["id"]))
+                    stored.add(article["id"])
+            skip += len(page["value"])
+            if (total is not None and skip >= total) or len(page["value"]) < self.page_size:
+                break
+
+        # A window missing articles (the listing changed while it was paged) is listed again by the next run
+        if total is not None and len(stored) < total:
+            logging.warning("Backfill of %s - %s listed %d of %d articles.", start.date(), end.date(), len(stored), total)
+            return None
+        if end <= datetime.now(timezone.utc):
+            self.store.mark_backfilled(start, end, len(stored))
+        logging.info("Backfilled %d articles created from %s to %s.", len(stored), start.date(), end.date())
+        return len(stored)
+
+    def run(self, start_date: datetime, end_date: datetime) -> Dict[str, int]:
+        """
+        Backfill a date range, skipping the windows completed by a previous run.
+
+        Returns:
+            dict: Number of windows backfilled, skipped and failed, and of articles stored.
+        """
+        windows = backfill_windows(start_date, end_date, self.window_days)
+        pending = [window for window in windows if not self.store.is_backfilled(*window)]
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers), thread_name_prefix="backfill") as executor:
+            results = list(executor.map(self.backfill_window, pending))
+        return {
+            "backfilled": sum(1 for result in results if result is not None),
+            "skipped": len(windows) - len(pending),
+            "failed": sum(1 for result in results if result is None),
+            "articles": sum(result for result in results if result is not None),
+        }
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Backfill the update store from the Azure Updates API history')
+    parser.add_argument('--start', default=None, help='Start date (YYYY-MM-DD)')
+    parser.add_argument('--end', default=None, help='End date (YYYY-MM-DD, default: today)')
+    parser.add_argument('--days', type=int, default=365, help='How many days back to backfill without --start')
+    parser.add_argument('--window-days', type=int, default=BACKFILL_WINDOW_DAYS, help='Days listed by one window')
+    parser.add_argument('--workers', type=int, default=BACKFILL_CONCURRENCY, help='Windows listed at the same time')
+    parser.add_argument('--rpm', type=float, default=BACKFILL_REQUESTS_PER_MINUTE,
+                        help='Maximum API requests per minute (0 = unlimited)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'), format='%(asctime)s - %(levelname)s - %(message)s')
+    store = azup.get_update_store()
+    if store is None:
+        print("UPDATE_STORE_PATH is not set. Please check the .env file.")
+        sys.exit(1)
+
+    end_date = datetime.now().astimezone()
+    if args.end:
+        end_date = datetime.strptime(args.end, '%Y-%m-%d').astimezone() + timedelta(days=1)
+    if args.start:
+        start_date = datetime.strptime(args.start, '%Y-%m-%d').astimezone()
+    else:
+        start_date = end_date - timedelta(days=args.days)
+
+    backfill = Backfill(store, args.window_days, args.workers, args.rpm)
+    result = backfill.run(start_date, end_date)
+    print(json.dumps(result, ensure_ascii=False))
+    sys.exit(0 if result["failed"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the HTML extraction of Azure Updates descriptions.
+
+Downloads the descriptions of recent Azure Updates, checks that
+HTMLTextExtractor returns the same text and links as BeautifulSoup with
+html.parser, and compares the time both take:
+
+    python benchmark_html_extractor.py [--days 7] [--rounds 20]
+"""
+
+import argparse
+import sys
+import timeit
+
+from bs4 import BeautifulSoup
+
+import azureupdatehelper as azup
+from html_extractor import extract_text_and_links
+
+
+def beautifulsoup_text_and_links(html):
+    """Text and unique links as extracted before HTMLTextExtractor (two BeautifulSoup parses)."""
+    text = BeautifulSoup(html, 'html.parser').get_text()
+    soup = BeautifulSoup(html, 'html.parser')
+    return text, list(dict.fromkeys([a['href'] for a in soup.find_all('a', href=True)]))
+
+
+def fetch_descriptions(days):
+    """Download the descriptions of the updates published within the last days."""
+    descriptions = []
+    for url in azup.get_update_urls(days):
+        response = azup.get_article(url)
+        if response is not None:
+            descriptions.append(response.json().get('description') or "")
+    return descriptions
+
+
+def run(descriptions, rounds):
+    """Check both extractors agree and time them; returns the number of mismatching descriptions."""
+    mismatches = sum(
+        1 for html in descriptions if extract_text_and_links(html) != beautifulsoup_text_and_links(html)
+    )
+    size = sum(len(html) for html in descriptions)
+    print(f"{len(descriptions)} descriptions, {size / 1024:.1f} KiB, {mismatches} mismatches")
+
+    results = {}
+    for name, extract in (("BeautifulSoup", beautifulsoup_text_and_links), ("HTMLTextExtractor", extract_text_and_links)):
+        seconds = min(timeit.repeat(lambda: [extract(html) for html in descriptions], number=1, repeat=rounds))
+        results[name] = seconds
+        print(f"{name:<18} {seconds * 1000:8.2f} ms per pass ({seconds * 1e6 / len(descriptions):7.1f} us per description)")
+    print(f"Speedup: {results['BeautifulSoup'] / results['HTMLTextExtractor']:.1f}x")
+    return mismatches
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Benchmark HTML extraction on recent Azure Updates descriptions')
+    parser.add_argument('--days', type=int, default=7, help='How many days of updates to download')
+    parser.add_argument('--rounds', type=int, default=20, help='Number of timed passes (the fastest is reported)')
+    args = parser.parse_args()
+
+    descriptions = fetch_descriptions(args.days)
+    if not descriptions:
+        print("No Azure Updates descriptions could be downloaded.")
+        sys.exit(1)
+    sys.exit(1 if run(descriptions, args.rounds) else 0)
+
+
+if __name__ == "__main__":
+    main()
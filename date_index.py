@@ -0,0 +1,85 @@
+"""
+Date index over Azure Updates RSS feed entries.
+
+FeedDateIndex parses the published date of every entry once and keeps the
+timestamps sorted, so that date range queries are answered with a binary
+search and the dates of the first and last entries are read directly, instead
+of parsing every entry again on each call and Streamlit rerun.
+"""
+
+import logging
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+
+class FeedDateIndex:
+    """
+    Entries of one feed sorted by their published date.
+
+    Query results keep the order of the entries in the feed.
+    """
+
+    def __init__(self, entries: Sequence[Any], date_format: str):
+        """
+        Args:
+            entries: Feed entries with a 'published' attribute.
+            date_format: strptime format of the published dates.
+        """
+        self.entries = entries
+        # Timestamp of each entry in feed order (None when the date can't be parsed)
+        self._published: List[Optional[float]] = []
+        parsed = []
+        for position, entry in enumerate(entries):
+            try:
+                timestamp = datetime.strptime(entry.published, date_format).timestamp()
+            except Exception as e:
+                logging.error(f"Error processing entry: {getattr(entry, 'title', 'N/A')} - {e}")
+                self._published.append(None)
+                continue  # Skip entries with parsing errors
+            self._published.append(timestamp)
+            parsed.append((timestamp, position))
+        parsed.sort()
+        self._timestamps = [timestamp for timestamp, _ in parsed]
+        self._positions = [position for _, position in parsed]
+
+    def __len__(self) -> int:
+        return len(self._timestamps)
+
+    def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                include_start: bool = True, include_end: bool = True) -> List[Any]:
+        """
+        Get the entries published within a date range.
+
+        Args:
+            start: Earliest published date (timezone aware), or None for no lower bound.
+            end: Latest published date (timezone aware), or None for no upper bound.
+            include_start: Whether entries published exactly at start are included.
+            include_end: Whether entries published exactly at end are included.
+
+        Returns:
+            Matching entries in feed order.
+        """
+        low = 0
+        high = len(self._timestamps)
+        if start is not None:
+            bisect = bisect_left if include_start else bisect_right
+            low = bisect(self._timestamps, start.timestamp())
+        if end is not None:
+            bisect = bisect_right if include_end else bisect_left
+            high = bisect(self._timestamps, end.timestamp())
+        if low >= high:
+            return []
+        return [self.entries[position] for position in sorted(self._positions[low:high])]
+
+    def published_at(self, position: int) -> Optional[datetime]:
+        """
+        Published date (local time) of the entry at a position of the feed.
+
+        Returns:
+            The parsed date, or None if it could not be parsed.
+        """
+        timestamp = self._published[position]
+        if timestamp is None:
+            return None
+        return datetime.fromtimestamp(timestamp).astimezone()
@@ -0,0 +1,105 @@
+"""
+Process-wide stale-while-revalidate cache.
+
+Used to share the Azure Updates RSS feed between Streamlit sessions and reruns:
+fresh values are returned directly, slightly stale values are returned while a
+single background refresh runs, and concurrent misses wait for one load
+instead of each fetching the feed.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+
+class StaleWhileRevalidateCache:
+    """
+    Caches the result of a loader function with a TTL.
+
+    - age <= ttl: the cached value is returned.
+    - ttl < age <= ttl + stale: the cached value is returned and one background refresh starts.
+    - otherwise (or nothing cached): the caller loads the value; concurrent callers wait for that load.
+    """
+
+    def __init__(self, loader: Callable[[], Any], ttl_seconds: float, stale_seconds: float = 0):
+        """
+        Args:
+            loader: Function returning a fresh value. It may raise on failure.
+            ttl_seconds: Number of seconds a value is considered fresh.
+            stale_seconds: Number of extra seconds a value may be served while it is refreshed.
+        """
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.loads = 0
+        self._value: Any = None
+        self._loaded_at: Optional[float] = None
+        self._loading = False
+        self._generation = 0
+        self._condition = threading.Condition()
+
+    def get(self) -> Any:
+        """
+        Get the cached value, loading or refreshing it as needed.
+
+        Returns:
+            The cached value. If a load fails and an older value exists, the older value is returned.
+        """
+        with self._condition:
+            age = self._age()
+            if age is not None and age <= self.ttl_seconds:
+                return self._value
+            if age is not None and age <= self.ttl_seconds + self.stale_seconds:
+                if not self._loading:
+                    self._loading = True
+                    threading.Thread(target=self._load, daemon=True).start()
+                return self._value
+            if self._loading:
+                # Another caller is loading: wait for its result instead of loading again
+                generation = self._generation
+                while self._loading and self._generation == generation:
+                    self._condition.wait()
+                return self._value
+            self._loading = True
+
+        self._load()
+        with self._condition:
+            return self._value
+
+    def invalidate(self) -> None:
+        """Forget the cached value so the next get loads it again."""
+        with self._condition:
+            self._loaded_at = None
+
+    def age(self) -> Optional[float]:
+        """
+        Returns:
+            Seconds since the value was loaded, or None if nothing is cached.
+        """
+        with self._condition:
+            return self._age()
+
+    def _age(self) -> Optional[float]:
+        if self._loaded_at is None:
+            return None
+        return time.monotonic() - self._loaded_at
+
+    def _load(self) -> None:
+        try:
+            value = self.loader()
+        except Exception as e:
+            logging.error("Failed to refresh cached value: %s", e)
+            with self._condition:
+                self._loading = False
+                self._generation += 1
+                self._condition.notify_all()
+            return
+
+        with self._condition:
+            self._value = value
+            self._loaded_at = time.monotonic()
+            self.loads += 1
+            self._loading = False
+            self._generation += 1
+            self._condition.notify_all()
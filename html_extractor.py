@@ -0,0 +1,176 @@
+"""
+Single-pass HTML to text and link extraction.
+
+HTMLTextExtractor walks the markup once with the stdlib HTMLParser and keeps
+only what the summaries need: the text and the href of every <a> tag. It
+replaces BeautifulSoup(html, 'html.parser').get_text() and find_all('a',
+href=True) without building a tree, and reproduces their output: both use the
+same tokenizer, and the extractor applies the rules Beautiful Soup applies on
+top of it (entity conversion, collapsing of whitespace-only strings, strings
+hidden in <script>, <style>, <template>, <rt> and <rp>, comments and
+declarations left out, CDATA kept).
+"""
+
+from html.entities import html5
+from html.parser import HTMLParser
+from typing import List, Tuple
+
+# Named character references, with or without the trailing semicolon
+ENTITY_TO_CHARACTER = {}
+for _name, _character in html5.items():
+    ENTITY_TO_CHARACTER.setdefault(_name[:-1] if _name.endswith(';') else _name, _character)
+
+# Tags closed as soon as they are opened
+VOID_ELEMENTS = frozenset([
+    'area', 'base', 'basefont', 'bgsound', 'br', 'col', 'command', 'embed', 'frame', 'hr', 'image', 'img',
+    'input', 'isindex', 'keygen', 'link', 'menuitem', 'meta', 'nextid', 'param', 'source', 'spacer', 'track',
+    'wbr',
+])
+# Tags whose strings are not part of the text
+HIDDEN_STRING_ELEMENTS = frozenset(['script', 'style', 'template', 'rt', 'rp'])
+# Tags inside which whitespace-only strings are kept as is
+PRESERVE_WHITESPACE_ELEMENTS = frozenset(['pre', 'textarea'])
+ASCII_SPACES = frozenset('\x20\x0a\x09\x0c\x0d')
+
+
+class HTMLTextExtractor(HTMLParser):
+    """
+    Collects the text and the unique <a href> values of an HTML fragment.
+    """
+
+    def __init__(self):
+        # Character references are converted like Beautiful Soup does, not by HTMLParser
+        super().__init__(convert_charrefs=False)
+        self.text: List[str] = []
+        self.links = {}
+        self._data: List[str] = []
+        self._open: List[str] = []
+        self._hidden = 0
+        self._preserve = 0
+        self._closed_void: List[str] = []
+
+    def extract(self, html: str) -> Tuple[str, List[str]]:
+        """
+        Parse an HTML fragment.
+
+        Returns:
+            tuple: (text, links) where links keeps the order of first appearance.
+        """
+        self.feed(html)
+        self.close()
+        self._end_data()
+        return "".join(self.text), list(self.links)
+
+    def _end_data(self, keep: bool = True) -> None:
+        # A string ends: keep it if it is part of the text
+        if not self._data:
+            return
+        data = "".join(self._data)
+        self._data = []
+        if not keep or self._hidden:
+            return
+        if not self._preserve and all(c in ASCII_SPACES for c in data):
+            data = "\n" if "\n" in data else " "
+        self.text.append(data)
+
+    def _push(self, tag: str) -> None:
+        self._open.append(tag)
+        if tag in HIDDEN_STRING_ELEMENTS:
+            self._hidden += 1
+        if tag in PRESERVE_WHITESPACE_ELEMENTS:
+            self._preserve += 1
+
+    def _pop_to(self, tag: str) -> None:
+        # Close the most recent open tag with this name and every tag opened after it
+        for index in range(len(self._open) - 1, -1, -1):
+            if self._open[index] == tag:
+                for closed in self._open[index:]:
+                    if closed in HIDDEN_STRING_ELEMENTS:
+                        self._hidden -= 1
+                    if closed in PRESERVE_WHITESPACE_ELEMENTS:
+                        self._preserve -= 1
+                del self._open[index:]
+                return
+
+    def handle_starttag(self, tag, attrs, void=True):
+        self._end_data()
+        if tag == 'a':
+            href = None
+            for name, value in attrs:
+                if name == 'href':
+                    href = '' if value is None else value
+            if href is not None:
+                self.links.setdefault(href, None)
+        self._push(tag)
+        if void and tag in VOID_ELEMENTS:
+            self._close(tag)
+            self._closed_void.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, void=False)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        # </br> after <br> was already closed with the start tag
+        if tag in self._closed_void:
+            self._closed_void.remove(tag)
+            return
+        self._close(tag)
+
+    def _close(self, tag: str) -> None:
+        self._end_data()
+        self._pop_to(tag)
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_charref(self, name):
+        code = int(name[1:], 16) if name[:1] in ('x', 'X') else int(name)
+        data = None
+        if code < 256:
+            # Numeric references below 256 often mean Windows-1252 code points
+            try:
+                data = bytes([code]).decode('windows-1252')
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(code)
+            except (ValueError, OverflowError):
+                pass
+        self._data.append(data or "\N{REPLACEMENT CHARACTER}")
+
+    def handle_entityref(self, name):
+        # Unknown entities are literal text
+        self._data.append(ENTITY_TO_CHARACTER.get(name, "&" + name))
+
+    def unknown_decl(self, data):
+        self._end_data()
+        if data.upper().startswith('CDATA['):
+            self._data.append(data[len('CDATA['):])
+            # CDATA sections are text even where other strings are hidden
+            hidden, self._hidden = self._hidden, 0
+            self._end_data()
+            self._hidden = hidden
+
+    def handle_comment(self, data):
+        self._end_data()
+
+    def handle_decl(self, decl):
+        self._end_data()
+
+    def handle_pi(self, data):
+        self._end_data()
+
+
+def extract_text_and_links(html: str) -> Tuple[str, List[str]]:
+    """
+    Extract the plain text and the unique <a href> values of an HTML fragment in one pass.
+
+    Args:
+        html: HTML content.
+
+    Returns:
+        tuple: (text, links) where links keeps the order of first appearance.
+    """
+    return HTMLTextExtractor().extract(html or "")
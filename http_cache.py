@@ -0,0 +1,113 @@
+"""
+Validator cache for conditional HTTP requests.
+
+Keeps the ETag / Last-Modified validators of the last successful response for
+each URL together with the cached body, so that the next request can be sent
+with If-None-Match / If-Modified-Since and a 304 Not Modified answer can be
+served from the local copy.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class ValidatorCache:
+    """
+    Thread-safe LRU cache of (etag, last_modified, body) per URL.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        """
+        Args:
+            max_entries: Maximum number of URLs remembered.
+        """
+        self.max_entries = max_entries
+        self.not_modified = 0
+        self.stale = 0
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def request_headers(self, url: str) -> Dict[str, str]:
+        """
+        Build conditional request headers for a URL.
+
+        Returns:
+            Dictionary with If-None-Match and/or If-Modified-Since, empty if nothing is cached.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return {}
+            headers = {}
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+            return headers
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached entry for a URL.
+
+        Returns:
+            Dictionary with etag, last_modified and body, or None if the URL is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def store(self, url: str, etag: Optional[str], last_modified: Optional[str], body: Any) -> None:
+        """
+        Remember the validators and body of a successful response.
+
+        Responses without any validator are not stored, since they can't be revalidated.
+        """
+        etag = etag if isinstance(etag, str) and etag else None
+        last_modified = last_modified if isinstance(last_modified, str) and last_modified else None
+        if etag is None and last_modified is None:
+            return
+        with self._lock:
+            self._entries[url] = {"etag": etag, "last_modified": last_modified, "body": body}
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def mark_not_modified(self, url: str) -> Optional[Any]:
+        """
+        Record a 304 Not Modified answer.
+
+        Returns:
+            The cached body for the URL, or None if it is no longer cached.
+        """
+        entry = self.get(url)
+        if entry is None:
+            return None
+        with self._lock:
+            self.not_modified += 1
+        return entry["body"]
+
+    def serve_stale(self, url: str) -> Optional[Any]:
+        """
+        Fall back to the cached body when the server could not be reached.
+
+        Counted separately from 304 answers, since the body may be out of date.
+
+        Returns:
+            The cached body for the URL, or None if it is not cached.
+        """
+        entry = self.get(url)
+        if entry is None:
+            return None
+        with self._lock:
+            self.stale += 1
+        return entry["body"]
+
+    def clear(self) -> None:
+        """Forget all cached validators and bodies."""
+        with self._lock:
+            self._entries.clear()
+            self.not_modified = 0
+            self.stale = 0
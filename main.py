@@ -2,6 +2,10 @@ import streamlit as st
 import os
 import tempfile
 import logging
+import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Load environment variables first
@@ -18,6 +22,36 @@ from pptx import Presentation  # noqa: E402
 from pptx.util import Pt  # noqa: E402
 from datetime import datetime, timedelta  # noqa: E402
 from i18n_helper import i18n, initialize_language_from_query_params  # noqa: E402
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx  # noqa: E402
+from adaptive_concurrency import shared_limiter  # noqa: E402
+import prefetcher  # noqa: E402
+
+# Maximum number of Azure Updates fetched and summarized at the same time
+# (initial limit when the adaptive concurrency control is enabled)
+FETCH_CONCURRENCY = int(os.getenv('FETCH_CONCURRENCY') or '8')
+# Adjust the concurrency automatically from latency and throttling (between the min and max limits)
+ADAPTIVE_CONCURRENCY = os.getenv('ADAPTIVE_CONCURRENCY', 'true').lower() != 'false'
+FETCH_CONCURRENCY_MIN = int(os.getenv('FETCH_CONCURRENCY_MIN') or '1')
+FETCH_CONCURRENCY_MAX = int(os.getenv('FETCH_CONCURRENCY_MAX') or '32')
+
+# Seconds one deck generation may spend fetching and summarizing updates (0 = unlimited).
+# Updates not finished in time are left out of the deck with a marker instead of delaying it.
+GENERATION_TIME_BUDGET = float(os.getenv('GENERATION_TIME_BUDGET') or '600')
+
+# Show each summary while Azure OpenAI generates it (set STREAM_SUMMARIES=false to show them at the end).
+# With COMBINED_SUMMARY, the slide summary is streamed from the single combined call.
+STREAM_SUMMARIES = os.getenv('STREAM_SUMMARIES', 'true').lower() != 'false'
+# Seconds between two redraws of a streamed summary
+STREAM_REFRESH_INTERVAL = 0.1
+
+# Pre-summarize new updates in a background thread of the server (see prefetcher.py)
+PREFETCH_IN_BACKGROUND = os.getenv('PREFETCH_IN_BACKGROUND', 'false').lower() == 'true'
+
+# Process-wide limiter (kept in adaptive_concurrency, as this script is re-executed on every rerun),
+# so that the learned limit is kept between runs and bounds the updates in flight of all sessions
+concurrency_limiter = shared_limiter(
+    initial_limit=FETCH_CONCURRENCY, min_limit=FETCH_CONCURRENCY_MIN, max_limit=FETCH_CONCURRENCY_MAX
+)
 
 # Initialize language from query parameters before st.set_page_config
 initialize_language_from_query_params()
@@ -46,8 +80,8 @@ st.markdown(i18n.t("description"), unsafe_allow_html=True)
 # Today's date (YYYYMMDDHHMMSS) to avoid duplicate file names
 save_name = 'AzureUpdates' + datetime.now().strftime('%Y%m%d%H%M%S') + '.pptx'
 
-# Get data from Azure Updates API
-entries = azup.get_rss_feed_entries()
+# Get data from Azure Updates API (shared between sessions and reruns)
+entries = azup.get_cached_rss_feed_entries()
 st.write(i18n.t(
     "entries_count",
     oldest=azup.oldest_article_date(entries),
@@ -55,8 +89,17 @@ st.write(i18n.t(
     count=len(entries)
 ))
 
+# Start the background prefetcher once per server process
+if PREFETCH_IN_BACKGROUND:
+    prefetcher.start_background_prefetcher()
+
 # Specify how many days back to get updates with streamlit
-days = st.slider(i18n.t("slider_label"), 1, 90, 7)
+# (beyond the RSS feed window when the update store was backfilled)
+days = st.slider(i18n.t("slider_label"), 1, azup.available_days(), 7)
+# Products to make the deck for (all updates when none is selected)
+selected_products = st.multiselect(i18n.t("product_filter_label"), azup.update_products(entries))
+# Full-text search of the local store to make a deck of matching updates only
+search_query = st.text_input(i18n.t("search_label")) if azup.get_update_store() is not None else ""
 
 
 # Set title for Azure Updates slide
@@ -354,6 +397,39 @@ def display_update_info(title, url, published_date, summary, ref_label, ref_link
     st.write('')
 
 
+# Title of the feed entry for a URL (the URL itself if the entry is unknown)
+def entry_title(url):
+    return next((entry.get('title') for entry in entries if entry.get('link') == url), None) or url
+
+
+# Show a summary in a placeholder while it is being generated
+def streaming_summary_renderer(placeholder, title):
+    """
+    Creates an on_token callback rendering the streamed summary of an update.
+
+    Args:
+        placeholder: st.empty() placeholder of the update.
+        title: Title shown above the summary.
+
+    Returns:
+        Function receiving each text fragment; redraws at most every STREAM_REFRESH_INTERVAL seconds.
+    """
+    lock = threading.Lock()
+    state = {'text': '', 'drawn_at': 0.0}
+
+    def on_token(token):
+        with lock:
+            state['text'] += token
+            now = time.monotonic()
+            if now - state['drawn_at'] < STREAM_REFRESH_INTERVAL:
+                return
+            state['drawn_at'] = now
+            text = state['text']
+        placeholder.markdown(f"「{title}」<br><small>{text}▌</small>", unsafe_allow_html=True)
+
+    return on_token
+
+
 # Add to Azure Updates slide
 def create_update_slide(prs, title, published_date, url, summary, ref_label, ref_links):
     """Creates a new slide for an Azure Updates and configures its elements."""
@@ -401,7 +477,7 @@ def extract_update_data(result):
 
 
 # Fetch Azure Updates data (separated from process_update for summary table feature)
-def fetch_update_data(url, client, deployment_name, system_prompt):
+def fetch_update_data(url, client, deployment_name, system_prompt, table_summary_prompt=None, on_token=None):
     """
     Fetches and processes Azure Updates data from a given URL.
 
@@ -410,6 +486,9 @@ def fetch_update_data(url, client, deployment_name, system_prompt):
         client: Azure OpenAI client.
         deployment_name: Name of the Azure OpenAI deployment.
         system_prompt: System prompt for Azure OpenAI.
+        table_summary_prompt: System prompt for the table summary.
+            Defaults to the prompt for the current language.
+        on_token: Optional callback receiving the slide summary fragments while they are streamed.
 
     Returns:
         A dictionary containing the update data:
@@ -418,41 +497,51 @@ def fetch_update_data(url, client, deployment_name, system_prompt):
             'title': str,
             'published_date_text': str,
             'summary': str,
+            'table_summary': str or None,
             'reference_link_label': str,
-            'reference_links': list[str]
+            'reference_links': list[str],
+            'degraded': bool,
+            'skipped': bool
         }
+        'table_summary' is None when it could not be generated. 'degraded' is True when
+        the summary was extracted from the article because Azure OpenAI failed. 'skipped'
+        is True when the article could not be read (see skipped_update_data).
     """
+    # Get table summary prompt for current language
+    if table_summary_prompt is None:
+        table_summary_prompt = i18n.get_table_summary_prompt()
+
     # Process and log Azure Updates information
+    # (an extractive summary is used when Azure OpenAI fails, so the update keeps its slide)
     logging.info("***** Begin of Record *****")
-    result = azup.read_and_summary(client, deployment_name, url, system_prompt)
+    stream_kwargs = {} if on_token is None else {'on_token': on_token}
+    if azup.COMBINED_SUMMARY:
+        # Slide summary and table summary are generated with a single Azure OpenAI call
+        # (a streamed slide summary is read from the combined answer while it is generated)
+        result = azup.read_and_summary(
+            client, deployment_name, url, system_prompt, table_summary_prompt, degrade_on_failure=True,
+            **stream_kwargs
+        )
+    else:
+        result = azup.read_and_summary(
+            client, deployment_name, url, system_prompt, degrade_on_failure=True, **stream_kwargs
+        )
     logging.debug("Result: %s", result)
+    if result is None:
+        logging.warning(f"Could not get article, skipping {url}")
+        logging.info("***** End of Record *****")
+        return skipped_update_data(url)
     for key, value in result.items():
+        if key == 'article':
+            continue
         logging.info("%s : %s", key, value)
     logging.info("***** End of Record *****")
 
     # Generate one-sentence summary for table display
-    table_summary = None
-    try:
-        # Get table summary prompt for current language
-        table_summary_prompt = i18n.get_table_summary_prompt()
-
-        # Fetch article data again for table summary generation
-        article_response = azup.get_article(url)
-        if article_response is not None:
-            article_data = article_response.json()
-            # Generate one-sentence summary
-            table_summary = azup.summarize_article_for_table(
-                client, deployment_name, article_data, table_summary_prompt
-            )
-            if table_summary:
-                logging.debug(f"Generated table summary: {table_summary}")
-            else:
-                logging.warning(f"Failed to generate table summary for {url}")
-        else:
-            logging.warning(f"Failed to fetch article data for table summary: {url}")
-    except Exception as e:
-        logging.warning(f"Error generating table summary for {url}: {e}")
-        table_summary = None
+    table_summary = result.get('tableSummary')
+    if table_summary is None and not result.get('degraded'):
+        table_summary = generate_table_summary(url, result.get('article'), client, deployment_name,
+                                               table_summary_prompt)
 
     # Extract update data from the result
     (
@@ -472,12 +561,203 @@ def fetch_update_data(url, client, deployment_name, system_prompt):
         'summary': azure_update_summary,
         'table_summary': table_summary,
         'reference_link_label': reference_link_label,
-        'reference_links': reference_links
+        'reference_links': reference_links,
+        'degraded': bool(result.get('degraded')),
+        'skipped': False
     }
 
 
+# Generate the one-sentence table summary of an update summarized without the combined call
+def generate_table_summary(url, article_data, client, deployment_name, table_summary_prompt):
+    """
+    Args:
+        url: URL of the Azure Updates article.
+        article_data: Article payload already downloaded by read_and_summary.
+        client: Azure OpenAI client.
+        deployment_name: Name of the Azure OpenAI deployment.
+        table_summary_prompt: System prompt for the table summary.
+
+    Returns:
+        The table summary, or None if it could not be generated.
+    """
+    if article_data is None:
+        logging.warning(f"Failed to fetch article data for table summary: {url}")
+        return None
+    try:
+        # Generate one-sentence summary
+        table_summary = azup.summarize_article_for_table(client, deployment_name, article_data, table_summary_prompt)
+    except Exception as e:
+        logging.warning(f"Error generating table summary for {url}: {e}")
+        return None
+    if table_summary:
+        logging.debug(f"Generated table summary: {table_summary}")
+    else:
+        logging.warning(f"Failed to generate table summary for {url}")
+    return table_summary
+
+
+# Placeholder data for an update that could not be fetched or missed the deadline
+def skipped_update_data(url):
+    """
+    Builds update data marking an update as skipped, so the deck still lists it.
+
+    Args:
+        url: URL of the Azure Updates article.
+
+    Returns:
+        A dictionary in the format of fetch_update_data with 'skipped' set to True.
+    """
+    title = entry_title(url)
+    marker = i18n.t("update_skipped")
+    return {
+        'url': url,
+        'title': title,
+        'published_date_text': i18n.t("published_date", date="Unknown"),
+        'summary': marker,
+        'table_summary': marker,
+        'reference_link_label': i18n.t("reference_links"),
+        'reference_links': [],
+        'degraded': False,
+        'skipped': True
+    }
+
+
+# Fetch Azure Updates data for one URL unless the generation was cancelled before the update started
+def fetch_update_data_unless_cancelled(cancelled, deadline, url, *args, **kwargs):
+    if cancelled.is_set():
+        return skipped_update_data(url)
+    # The map step of long articles gives up at the deadline
+    with azup.generation_deadline(deadline):
+        return fetch_update_data(url, *args, **kwargs)
+
+
+# Fetch Azure Updates data for one URL while holding a slot of the adaptive limiter
+def fetch_update_data_with_limiter(limiter, url, client, deployment_name, system_prompt, table_summary_prompt,
+                                   cancelled=None, deadline=None, **kwargs):
+    with limiter.slot() as outcome:
+        # The deadline may have passed while this update waited for its slot
+        if cancelled is not None and cancelled.is_set():
+            outcome['measured'] = False
+            return skipped_update_data(url)
+        throttle_count = azup.throttle_count()
+        llm_calls = azup.llm_call_count()
+        with azup.generation_deadline(deadline):
+            data = fetch_update_data(url, client, deployment_name, system_prompt, table_summary_prompt, **kwargs)
+        # Azure OpenAI answered 429 while this update was processed
+        outcome['throttled'] = azup.throttle_count() != throttle_count
+        outcome['error'] = bool(data.get('skipped') or data.get('degraded'))
+        # Summaries answered from the caches say nothing about the latency of Azure OpenAI
+        outcome['measured'] = azup.llm_call_count() != llm_calls
+        return data
+
+
+# Drop the fragments streamed once the generation was cancelled
+def cancellable_on_token(on_token, cancelled):
+    # Summaries abandoned at the deadline must not overwrite the placeholders of the deck
+    return lambda token: None if cancelled.is_set() else on_token(token)
+
+
+# Submit the fetch of each URL (through the adaptive limiter when one is given)
+def submit_update_tasks(executor, urls, fetch_args, limiter, cancelled, deadline, on_tokens):
+    """
+    Args:
+        executor: ThreadPoolExecutor running the updates.
+        urls: List of Azure Updates article URLs.
+        fetch_args: (client, deployment_name, system_prompt, table_summary_prompt) of fetch_update_data.
+        limiter: Optional AIMDLimiter adjusting the number of updates in flight.
+        cancelled: threading.Event set when the remaining updates must not be started.
+        deadline: Optional time.monotonic() value bounding the map step of long articles.
+        on_tokens: Optional list of on_token callbacks (same order as urls).
+
+    Returns:
+        Dictionary mapping each future to the index of its URL.
+    """
+    futures = {}
+    for i, url in enumerate(urls):
+        kwargs = {} if on_tokens is None else {'on_token': cancellable_on_token(on_tokens[i], cancelled)}
+        if limiter is None:
+            future = executor.submit(
+                fetch_update_data_unless_cancelled, cancelled, deadline, url, *fetch_args, **kwargs
+            )
+        else:
+            future = executor.submit(
+                fetch_update_data_with_limiter, limiter, url, *fetch_args, cancelled=cancelled, deadline=deadline,
+                **kwargs
+            )
+        futures[future] = i
+    return futures
+
+
+# Update data of a finished task (a skipped update if it raised)
+def update_task_result(future, url):
+    try:
+        return future.result()
+    except Exception as e:
+        logging.error(f"Failed to fetch update {url}: {e}")
+        return skipped_update_data(url)
+
+
+# Fetch Azure Updates data for all URLs concurrently
+def fetch_all_update_data(urls, client, deployment_name, system_prompt, table_summary_prompt,
+                          max_workers=FETCH_CONCURRENCY, on_progress=None, limiter=None, deadline=None,
+                          on_tokens=None):
+    """
+    Fetches and processes Azure Updates data for several URLs with a bounded worker pool.
+
+    Args:
+        urls: List of Azure Updates article URLs.
+        client: Azure OpenAI client.
+        deployment_name: Name of the Azure OpenAI deployment.
+        system_prompt: System prompt for Azure OpenAI.
+        table_summary_prompt: System prompt for the table summary.
+        max_workers: Maximum number of updates processed at the same time.
+        on_progress: Optional callback called as on_progress(completed, total) when an update finishes.
+        limiter: Optional AIMDLimiter adjusting the number of updates in flight (up to its max_limit).
+        deadline: Optional time.monotonic() value. Updates not finished by then are returned as
+            skipped (see skipped_update_data); the updates not started yet are not fetched at all and
+            the summaries still being generated are no longer streamed.
+        on_tokens: Optional list of on_token callbacks (same order as urls) to stream the summaries.
+
+    Returns:
+        List of update data dictionaries (from fetch_update_data) in the same order as urls.
+    """
+    if not urls:
+        return []
+
+    # Worker threads need the Streamlit script context to use session state (i18n)
+    ctx = get_script_run_ctx()
+
+    def attach_script_run_ctx():
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+
+    updates_data = [None] * len(urls)
+    # Set at the deadline, so that the workers don't start the updates still waiting for a thread or a slot
+    cancelled = threading.Event()
+    workers = max(1, min(limiter.max_limit if limiter is not None else max_workers, len(urls)))
+    executor = ThreadPoolExecutor(max_workers=workers, initializer=attach_script_run_ctx)
+    try:
+        futures = submit_update_tasks(
+            executor, urls, (client, deployment_name, system_prompt, table_summary_prompt), limiter, cancelled,
+            deadline, on_tokens
+        )
+        for completed, future in enumerate(azup.completed_until(futures, deadline), start=1):
+            index = futures[future]
+            updates_data[index] = update_task_result(future, urls[index])
+            if on_progress is not None:
+                on_progress(completed, len(urls))
+    finally:
+        # Don't wait for updates abandoned at the deadline; queued ones are cancelled and
+        # the ones waiting for a slot of the limiter give up as soon as they get it
+        cancelled.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # Updates not finished by the deadline keep their place in the deck with a marker
+    return [data if data is not None else skipped_update_data(url) for data, url in zip(updates_data, urls)]
+
+
 # Create Azure Updates slide from fetched data
-def create_update_content_slide(prs, data, page_number):
+def create_update_content_slide(prs, data, page_number, placeholder=None):
     """
     Creates a slide for an Azure Updates from pre-fetched data.
 
@@ -485,16 +765,19 @@ def create_update_content_slide(prs, data, page_number):
         prs: The Presentation object.
         data: Dictionary containing update data (from fetch_update_data).
         page_number: The page number for this slide (for display purposes).
+        placeholder: Optional st.empty() placeholder where the summary was streamed;
+            the final update information replaces the streamed text.
     """
     # Display update information via Streamlit
-    display_update_info(
-        data['title'],
-        data['url'],
-        data['published_date_text'],
-        data['summary'],
-        data['reference_link_label'],
-        data['reference_links']
-    )
+    with placeholder.container() if placeholder is not None else nullcontext():
+        display_update_info(
+            data['title'],
+            data['url'],
+            data['published_date_text'],
+            data['summary'],
+            data['reference_link_label'],
+            data['reference_links']
+        )
 
     # Create and add the update slide to the presentation
     create_update_slide(
@@ -545,6 +828,38 @@ def end_date():
     return datetime.now().astimezone()
 
 
+# URLs of the updates to put in the deck, with their articles ready to be summarized
+def select_update_urls(start, end, products, query, deadline=None):
+    """
+    Lists the updates of the date range and products, syncs their articles into the local store
+    (or loads them in bulk) and keeps the ones matching the search query.
+
+    Args:
+        start: Earliest published date.
+        end: Latest published date.
+        products: Selected products (all updates when empty).
+        query: Full-text search query of the local store (all updates when empty).
+        deadline: Optional time.monotonic() value limiting the sync of the local store.
+
+    Returns:
+        List of Azure Updates URLs.
+    """
+    urls = azup.target_update_urls(entries, start)
+    # Only the updates of the selected products are downloaded and summarized
+    urls = azup.filter_urls_by_products(urls, products, entries)
+    if azup.get_update_store() is not None:
+        # Download only the new and modified updates, the others are read from the local store
+        azup.sync_update_store(
+            entries, start, end,
+            on_progress=lambda current, total: st.write(i18n.t("syncing_update_progress", current=current, total=total)),
+            deadline=deadline, links=urls
+        )
+    elif azup.BULK_FETCH:
+        # A few listing requests instead of one request per update
+        azup.load_articles_in_bulk(start, end)
+    return azup.filter_urls_by_search(urls, query, start, end)
+
+
 # Press button to get data from Azure Updates API and generate PPTX
 if st.button(i18n.t("button_text")):
     # Display error and exit if environment variables are missing
@@ -552,12 +867,14 @@ if st.button(i18n.t("button_text")):
         st.error(i18n.t("env_error"))
         st.stop()
 
+    # The sync of the local store and the fetch of the updates share the generation time budget
+    deadline = time.monotonic() + GENERATION_TIME_BUDGET if GENERATION_TIME_BUDGET > 0 else None
     st.write(i18n.t(
         "date_range",
         start=start_date(days).strftime("%Y-%m-%d"),
         end=end_date().strftime("%Y-%m-%d")
     ))
-    urls = azup.target_update_urls(entries, start_date(days))
+    urls = select_update_urls(start_date(days), end_date(), selected_products, search_query, deadline)
     display_update_urls(urls)
 
     # PPTX generation process
@@ -575,19 +892,39 @@ if st.button(i18n.t("button_text")):
     # Second slide (section title slide)
     slide, date_ph = create_section_title_slide(prs, len(urls))
 
-    # Get Azure OpenAI client
-    client, deployment_name = azup.azure_openai_client(os.getenv("API_KEY"), os.getenv("API_ENDPOINT"))
+    # Get Azure OpenAI client (shared between sessions to reuse its connections)
+    client, deployment_name = azup.get_azure_openai_client(os.getenv("API_KEY"), os.getenv("API_ENDPOINT"))
 
     # system prompt for Azure OpenAI
     system_prompt = i18n.get_system_prompt()
+    table_summary_prompt = i18n.get_table_summary_prompt()
 
     # Step 1: Fetch all updates data
     st.write(i18n.t("fetching_all_updates"))
-    updates_data = []
-    for i, url in enumerate(urls):
-        st.write(i18n.t("fetching_update_progress", current=i+1, total=len(urls)))
-        data = fetch_update_data(url, client, deployment_name, system_prompt)
-        updates_data.append(data)
+    # One placeholder per update, showing its summary while it is streamed
+    update_placeholders = [st.empty() for _ in urls] if STREAM_SUMMARIES else None
+    on_tokens = None
+    if update_placeholders is not None:
+        on_tokens = [
+            streaming_summary_renderer(placeholder, entry_title(url))
+            for placeholder, url in zip(update_placeholders, urls)
+        ]
+    updates_data = fetch_all_update_data(
+        urls, client, deployment_name, system_prompt, table_summary_prompt,
+        on_progress=lambda current, total: st.write(i18n.t("fetching_update_progress", current=current, total=total)),
+        limiter=concurrency_limiter if ADAPTIVE_CONCURRENCY else None,
+        deadline=deadline,
+        on_tokens=on_tokens
+    )
+    skipped_count = sum(1 for data in updates_data if data.get('skipped'))
+    degraded_count = sum(1 for data in updates_data if data.get('degraded'))
+    if skipped_count or degraded_count:
+        st.warning(i18n.t("partial_deck", skipped=skipped_count, degraded=degraded_count))
+    if ADAPTIVE_CONCURRENCY:
+        logging.info("Concurrency limiter state: %s", concurrency_limiter.snapshot())
+    summary_cache = azup.get_summary_cache()
+    if summary_cache is not None:
+        logging.info("Summary cache stats: %s", summary_cache.stats())
 
     # Step 2: Add summary table slides (using layout 2)
     st.write(i18n.t("adding_summary_table"))
@@ -598,7 +935,8 @@ if st.button(i18n.t("button_text")):
     for i, data in enumerate(updates_data):
         # Page number: Title(1) + Section(2) + Table pages + current index
         page_number = 3 + table_pages + i
-        create_update_content_slide(prs, data, page_number)
+        placeholder = update_placeholders[i] if update_placeholders is not None else None
+        create_update_content_slide(prs, data, page_number, placeholder)
 
     # Save PPTX
     prs.save(pptx_file.name)
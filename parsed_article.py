@@ -0,0 +1,46 @@
+"""
+Azure Updates article decoded and parsed once.
+
+ParsedArticle wraps the decoded Azure Updates API payload. It behaves like the
+JSON dict (article['title'], article.get('modified'), ...) and parses the HTML
+description only once, on first use, extracting the plain text and the unique
+link targets in the same pass. Summaries, table summaries and the result
+dictionary all read these values instead of parsing the description again.
+"""
+
+from typing import Any, List, Mapping, Optional
+
+from html_extractor import extract_text_and_links
+
+
+class ParsedArticle(dict):
+    """
+    Decoded Azure Updates API payload with its description parsed once.
+    """
+
+    def __init__(self, data: Mapping[str, Any], docid: Optional[str] = None):
+        """
+        Args:
+            data: Decoded JSON of the article.
+            docid: Azure Updates document ID of the article.
+        """
+        super().__init__(data)
+        self.docid = docid
+        self._text: Optional[str] = None
+        self._links: Optional[List[str]] = None
+
+    def _parse(self) -> None:
+        if self._links is None:
+            self._text, self._links = extract_text_and_links(self.get('description') or "")
+
+    @property
+    def text(self) -> str:
+        """Plain text of the description."""
+        self._parse()
+        return self._text
+
+    @property
+    def links(self) -> List[str]:
+        """Unique link targets of the description, in order of appearance."""
+        self._parse()
+        return self._links
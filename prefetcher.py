@@ -0,0 +1,239 @@
+"""
+Background pre-summarization of new Azure Updates.
+
+FeedPrefetcher polls the Azure Updates RSS feed, detects entries that are new
+or were modified since the last poll, and generates their slide and table
+summaries for every enabled language ahead of demand. The summaries are stored
+in the persistent summary cache (SUMMARY_CACHE_PATH), which read_and_summary
+consults first, so the first deck of the week doesn't pay for the Azure OpenAI
+calls.
+
+It runs either inside the Streamlit server (PREFETCH_IN_BACKGROUND=true) or as
+a separate process:
+
+    python prefetcher.py [--once] [--days 7] [--languages ja,en]
+"""
+
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables before azureupdatehelper reads its configuration
+load_dotenv()
+
+import azureupdatehelper as azup  # noqa: E402
+from i18n_helper import LANGUAGES, SYSTEM_PROMPTS, TABLE_SUMMARY_PROMPTS  # noqa: E402
+
+# Seconds between two polls of the RSS feed
+PREFETCH_INTERVAL = float(os.getenv("PREFETCH_INTERVAL") or "900")
+# How many days back updates are pre-summarized
+PREFETCH_DAYS = int(os.getenv("PREFETCH_DAYS") or "7")
+# Comma separated language codes to pre-summarize (all supported languages by default)
+PREFETCH_LANGUAGES = os.getenv("PREFETCH_LANGUAGES") or ",".join(LANGUAGES)
+# Number of summaries generated at the same time
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY") or "4")
+
+_background_prefetcher = None
+_background_prefetcher_started = False
+_background_prefetcher_lock = threading.Lock()
+
+
+# Parse a comma separated list of language codes, ignoring unsupported ones
+def parse_languages(value: str) -> List[str]:
+    languages = []
+    for code in (value or "").split(","):
+        code = code.strip()
+        if not code:
+            continue
+        if code not in LANGUAGES:
+            logging.warning("Unsupported prefetch language: %s", code)
+            continue
+        languages.append(code)
+    return languages
+
+
+# Version of a feed entry: changes when the update is modified
+def entry_version(entry) -> str:
+    return azup.feed_entry_version(entry)
+
+
+class FeedPrefetcher:
+    """
+    Polls the RSS feed and pre-summarizes new or modified updates.
+    """
+
+    def __init__(self, client, deployment_name: str, languages: List[str], days: int = PREFETCH_DAYS,
+                 interval: float = PREFETCH_INTERVAL, max_workers: int = PREFETCH_CONCURRENCY):
+        """
+        Args:
+            client: Azure OpenAI client.
+            deployment_name: Name of the Azure OpenAI deployment.
+            languages: Language codes whose summaries are generated.
+            days: How many days back updates are pre-summarized.
+            interval: Seconds between two polls.
+            max_workers: Number of summaries generated at the same time.
+        """
+        self.client = client
+        self.deployment_name = deployment_name
+        self.languages = languages
+        self.days = days
+        self.interval = interval
+        self.max_workers = max_workers
+        self.summarized = 0
+        self.failures = 0
+        # URL -> entry version of the updates summarized in every language
+        self._seen: Dict[str, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def changed_entries(self, entries) -> list:
+        """
+        Select the entries within the window that are new or modified since they were summarized.
+        """
+        start_date = datetime.now().astimezone() - timedelta(days=self.days)
+        urls = set(azup.target_update_urls(entries, start_date))
+        return [
+            entry for entry in entries
+            if entry.get("link") in urls and self._seen.get(entry.get("link")) != entry_version(entry)
+        ]
+
+    def summarize(self, url: str) -> bool:
+        """
+        Generate the summaries of one update in every language.
+
+        Returns:
+            True if every language succeeded.
+        """
+        ok = True
+        for language in self.languages:
+            result = azup.read_and_summary(
+                self.client, self.deployment_name, url,
+                SYSTEM_PROMPTS[language], TABLE_SUMMARY_PROMPTS[language]
+            )
+            if result is None or not result.get("tableSummary"):
+                logging.warning("Prefetch failed for %s (%s)", url, language)
+                ok = False
+        return ok
+
+    def poll_once(self) -> int:
+        """
+        Poll the feed once and pre-summarize the changed entries.
+
+        Returns:
+            Number of updates summarized in every language.
+        """
+        entries = azup.get_cached_rss_feed_entries()
+        changed = self.changed_entries(entries)
+        if not changed:
+            logging.debug("Prefetch: no new or modified updates.")
+            return 0
+
+        logging.info("Prefetch: summarizing %d new or modified updates.", len(changed))
+        start_date = datetime.now().astimezone() - timedelta(days=self.days)
+        if azup.get_update_store() is not None:
+            # Summaries are generated from the stored articles: store the new versions first
+            azup.sync_update_store(entries, start_date)
+        elif azup.BULK_FETCH:
+            azup.load_articles_in_bulk(start_date)
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as executor:
+            results = list(executor.map(lambda entry: self.summarize(entry.get("link")), changed))
+
+        summarized = 0
+        for entry, ok in zip(changed, results):
+            if ok:
+                # Failed updates are tried again at the next poll
+                self._seen[entry.get("link")] = entry_version(entry)
+                summarized += 1
+            else:
+                self.failures += 1
+        self.summarized += summarized
+        return summarized
+
+    def run_forever(self) -> None:
+        """Poll until stop is called."""
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                logging.error("Prefetch poll failed: %s", e)
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        """Start polling in a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="feed-prefetcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop polling and wait for the current poll to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+# Create a prefetcher from the environment, or None if it can't run
+def create_prefetcher(days: int = PREFETCH_DAYS, languages: Optional[List[str]] = None) -> Optional[FeedPrefetcher]:
+    if not azup.environment_check():
+        return None
+    if azup.get_summary_cache() is None:
+        logging.error("SUMMARY_CACHE_PATH is not set: pre-generated summaries would not be kept.")
+        return None
+    client, deployment_name = azup.get_azure_openai_client(os.getenv("API_KEY"), os.getenv("API_ENDPOINT"))
+    if client is None:
+        return None
+    languages = languages if languages is not None else parse_languages(PREFETCH_LANGUAGES)
+    return FeedPrefetcher(client, deployment_name, languages, days=days)
+
+
+# Start the process-wide background prefetcher once (safe to call on every Streamlit rerun)
+def start_background_prefetcher() -> Optional[FeedPrefetcher]:
+    global _background_prefetcher, _background_prefetcher_started
+    with _background_prefetcher_lock:
+        if not _background_prefetcher_started:
+            # Not retried on later reruns when the configuration is incomplete
+            _background_prefetcher_started = True
+            _background_prefetcher = create_prefetcher()
+            if _background_prefetcher is not None:
+                _background_prefetcher.start()
+                logging.info("Background prefetcher started for %s.", ", ".join(_background_prefetcher.languages))
+    return _background_prefetcher
+
+
+def main():
+    """Main function"""
+    import argparse
+    parser = argparse.ArgumentParser(description='Pre-summarize new Azure Updates into the summary cache')
+    parser.add_argument('--once', action='store_true', help='Poll the feed once and exit')
+    parser.add_argument('--days', type=int, default=PREFETCH_DAYS, help='How many days back to pre-summarize')
+    parser.add_argument('--languages', default=None, help='Comma separated language codes (e.g. ja,en)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'), format='%(asctime)s - %(levelname)s - %(message)s')
+    prefetcher = create_prefetcher(
+        days=args.days,
+        languages=parse_languages(args.languages) if args.languages is not None else None
+    )
+    if prefetcher is None:
+        print("Prefetcher could not start. Please check the .env file.")
+        sys.exit(1)
+
+    if args.once:
+        count = prefetcher.poll_once()
+        print(f"Pre-summarized {count} updates.")
+        sys.exit(0 if prefetcher.failures == 0 else 1)
+    try:
+        prefetcher.run_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
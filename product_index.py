@@ -0,0 +1,53 @@
+"""
+Product index over Azure Updates RSS feed entries.
+
+ProductIndex maps every category of the feed entries (Azure Updates lists the
+products, product categories, status and update type of each update as RSS
+categories) to the docIds of the updates, so that a deck limited to a few
+products is built from the matching URLs before any article is downloaded or
+summarized. Names are matched case-insensitively.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set
+
+
+class ProductIndex:
+    """
+    Inverted index from product names to docIds of one feed.
+    """
+
+    def __init__(self, entries: Sequence[Any], docid: Callable[[str], Optional[str]]):
+        """
+        Args:
+            entries: Feed entries with 'link' and 'tags' (RSS categories) attributes.
+            docid: Function returning the docId of an update URL.
+        """
+        self.entries = entries
+        # Display name (first spelling seen) and docIds of each product, by case-folded name
+        self._names: Dict[str, str] = {}
+        self._docids: Dict[str, Set[str]] = {}
+        for entry in entries:
+            entry_docid = docid(getattr(entry, 'link', None) or "")
+            if entry_docid:
+                self.add(entry_docid, [tag.get('term') for tag in getattr(entry, 'tags', None) or []])
+
+    def add(self, docid: str, products: Iterable[Optional[str]]) -> None:
+        """Index an update under each of its products."""
+        for product in products:
+            product = (product or "").strip()
+            if not product:
+                continue
+            key = product.casefold()
+            self._names.setdefault(key, product)
+            self._docids.setdefault(key, set()).add(docid)
+
+    def products(self) -> List[str]:
+        """Product names in alphabetical order."""
+        return sorted(self._names.values(), key=str.casefold)
+
+    def docids(self, products: Iterable[str]) -> Set[str]:
+        """DocIds of the updates about at least one of the products."""
+        docids = set()
+        for product in products:
+            docids |= self._docids.get(product.strip().casefold(), set())
+        return docids
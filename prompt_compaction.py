@@ -0,0 +1,176 @@
+"""
+Compaction of the article text sent to Azure OpenAI.
+
+Descriptions converted from HTML carry blank lines, indentation, "Learn more"
+lines and the same links several times, and long retirement notices run to
+thousands of tokens. compact_description normalizes the whitespace, drops
+boilerplate lines and repeated paragraphs, dedupes and caps the links, and
+cuts the text at a sentence boundary so that the prompt fits a token budget
+estimated offline with rate_limiter.estimate_tokens.
+"""
+
+import re
+import urllib.parse as urlparse
+from typing import List, Tuple
+
+from rate_limiter import estimate_tokens
+
+# Sentence boundaries (Latin and CJK full stops)
+SENTENCE_END = re.compile(r'(?<=[.!?。！？])\s+|(?<=[。！？])')
+
+# Lines that carry no information once the links are listed separately
+BOILERPLATE_LINE = re.compile(
+    r"^(?:"
+    r"(?:learn|read|find out) more(?: (?:here|about .{0,80}|at .{0,80}))?"
+    r"|(?:for )?more information(?:,? (?:see|visit|refer to) .{0,120})?"
+    r"|(?:click|see) here"
+    r"|詳細(?:は|について)?(?:こちら|以下).{0,40}"
+    r")\s*[.:!。]?$",
+    re.IGNORECASE
+)
+
+# Query parameters used for click tracking only
+TRACKING_PARAMETERS = ("utm_", "wt.mc_id", "ocid")
+
+# Appended to a truncated description
+TRUNCATION_MARK = "..."
+
+
+# Collapse runs of spaces and blank lines, keeping one paragraph per line
+def normalize_whitespace(text: str) -> str:
+    lines = (re.sub(r'[^\S\n]+', ' ', line).strip() for line in (text or "").splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+# Drop boilerplate lines and paragraphs repeated verbatim
+def remove_boilerplate(text: str) -> str:
+    seen = set()
+    lines = []
+    for line in text.splitlines():
+        if BOILERPLATE_LINE.match(line) or line in seen:
+            continue
+        seen.add(line)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+# Link without tracking parameters, fragment and trailing slash
+def normalize_link(link: str) -> str:
+    parts = urlparse.urlsplit(link.strip())
+    query = [
+        (key, value) for key, value in urlparse.parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMETERS)
+    ]
+    path = parts.path.rstrip("/") if parts.path != "/" else ""
+    return urlparse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlparse.urlencode(query), ""))
+
+
+# Dedupe links after normalization and keep the first max_links (0 = no limit)
+def compact_links(links: List[str], max_links: int = 0) -> List[str]:
+    compacted = list(dict.fromkeys(normalize_link(link) for link in links if link and link.strip()))
+    return compacted[:max_links] if max_links > 0 else compacted
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut a text to an estimated token count, at the last sentence or line boundary that fits.
+
+    Args:
+        text: Text to cut.
+        max_tokens: Estimated token budget, including the truncation mark.
+
+    Returns:
+        str: The text unchanged if it fits, otherwise its head followed by TRUNCATION_MARK.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    budget = max_tokens - estimate_tokens(TRUNCATION_MARK)
+    if budget <= 0:
+        return ""
+
+    # Ends of sentences and lines, in increasing order
+    cuts = sorted({match.start() for match in SENTENCE_END.finditer(text)} | {
+        match.start() for match in re.finditer("\n", text)
+    })
+    # Longest prefix ending at a boundary that fits (the estimate grows with the length)
+    low, high = 0, len(cuts)
+    while low < high:
+        middle = (low + high) // 2
+        if estimate_tokens(text[:cuts[middle]]) <= budget:
+            low = middle + 1
+        else:
+            high = middle
+    if low > 0:
+        return text[:cuts[low - 1]].rstrip() + TRUNCATION_MARK
+
+    # The first sentence alone is too long: cut it by characters
+    length = fitting_length(text, budget)
+    return text[:length].rstrip() + TRUNCATION_MARK if length else ""
+
+
+# Length of the longest prefix of a text within max_tokens estimated tokens
+def fitting_length(text: str, max_tokens: int) -> int:
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def split_into_chunks(text: str, max_tokens: int) -> List[str]:
+    """
+    Split a text into chunks of about max_tokens estimated tokens at sentence and line boundaries.
+
+    Sentences longer than max_tokens are cut by characters.
+
+    Args:
+        text: Text to split.
+        max_tokens: Estimated token budget of each chunk.
+
+    Returns:
+        list: Non-empty chunks in order.
+    """
+    chunks = []
+    current = ""
+    for line in text.splitlines():
+        separator = "\n"
+        for sentence in SENTENCE_END.split(line):
+            sentence = sentence.strip()
+            while sentence:
+                head = sentence[:max(1, fitting_length(sentence, max_tokens))]
+                sentence = sentence[len(head):].lstrip()
+                candidate = current + separator + head if current else head
+                if current and estimate_tokens(candidate) > max_tokens:
+                    chunks.append(current)
+                    candidate = head
+                current = candidate
+                separator = " "
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def compact_description(text: str, links: List[str], max_tokens: int = 0, max_links: int = 0,
+                        reserved_tokens: int = 0) -> Tuple[str, List[str]]:
+    """
+    Compact the plain-text description and the links of an article for the prompt.
+
+    Args:
+        text: Plain-text description.
+        links: Links found in the description.
+        max_tokens: Estimated token budget of the whole prompt (0 = no truncation).
+        max_links: Maximum number of links kept (0 = no limit).
+        reserved_tokens: Tokens of the rest of the prompt (title, products, labels).
+
+    Returns:
+        tuple: (text, links) compacted.
+    """
+    text = remove_boilerplate(normalize_whitespace(text))
+    links = compact_links(links, max_links)
+    if max_tokens > 0:
+        available = max_tokens - reserved_tokens - estimate_tokens(", ".join(links))
+        text = truncate_to_tokens(text, max(0, available))
+    return text, links
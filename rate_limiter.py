@@ -0,0 +1,164 @@
+"""
+Rate limiting for Azure OpenAI calls.
+
+Azure OpenAI deployments have a requests-per-minute (RPM) and a
+tokens-per-minute (TPM) quota. RateLimiter keeps one token bucket for each
+and tells callers how long to wait before sending a request, so parallel
+summaries queue up instead of failing with 429 Too Many Requests. When the
+service still answers 429, the Retry-After delay pauses every caller.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional
+
+
+# Approximate number of characters per token for ASCII text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of a text without a tokenizer.
+
+    ASCII text is counted as about 4 characters per token, other characters
+    (Japanese, Korean, Chinese, Thai, ...) as about one token each.
+
+    Args:
+        text: Text to estimate.
+
+    Returns:
+        Approximate token count.
+    """
+    if not text:
+        return 0
+    ascii_chars = sum(1 for char in text if ord(char) < 128)
+    return math.ceil(ascii_chars / CHARS_PER_TOKEN) + (len(text) - ascii_chars)
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """
+    Read the delay requested by a 429/503 response.
+
+    Supports retry-after-ms, retry-after in seconds and retry-after as an HTTP date.
+
+    Args:
+        headers: Response headers (case-insensitive mapping).
+
+    Returns:
+        Delay in seconds, or None if the headers don't specify one.
+    """
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return max(float(retry_after_ms) / 1000, 0.0)
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at capacity_per_minute / 60 per second.
+
+    Reservations may take the bucket below zero; the caller then waits until
+    the debt is repaid, which serves callers in the order they reserved.
+    """
+
+    def __init__(self, capacity_per_minute: float):
+        self.capacity = float(capacity_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """
+        Take amount tokens from the bucket.
+
+        Returns:
+            Seconds to wait before the reserved tokens are available.
+        """
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        # A single request larger than the bucket would never fit: wait for a full bucket instead
+        self.tokens -= min(amount, self.capacity)
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limiter shared by all threads.
+
+    A limit of 0 disables that bucket. pause() blocks every caller until the
+    Retry-After delay of a throttled response has passed.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        """
+        Args:
+            requests_per_minute: Allowed requests per minute (0 for unlimited).
+            tokens_per_minute: Allowed tokens per minute (0 for unlimited).
+        """
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.throttle_count = 0
+        self.waited_seconds = 0.0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> float:
+        """
+        Reserve capacity for one request of the given size.
+
+        Returns:
+            Seconds the caller has to wait before sending the request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self._paused_until - now, 0.0)
+            if self.request_bucket is not None:
+                wait = max(wait, self.request_bucket.reserve(1, now))
+            if self.token_bucket is not None:
+                wait = max(wait, self.token_bucket.reserve(tokens, now))
+            self.waited_seconds += wait
+            return wait
+
+    def acquire(self, tokens: int) -> None:
+        """Block until a request of the given size may be sent."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int) -> None:
+        """Wait without blocking the event loop until a request of the given size may be sent."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Pause all callers after a throttled (429) response.
+
+        Args:
+            seconds: Delay requested by the service (Retry-After).
+        """
+        with self._lock:
+            self.throttle_count += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
@@ -0,0 +1,224 @@
+"""
+Retry policy shared by the Azure Updates API and Azure OpenAI calls.
+
+Transient failures (connection errors, timeouts, 5xx) are retried with capped
+exponential backoff and full jitter. Throttled answers (429, or 503 with
+Retry-After) wait for the delay requested by the service. Each upstream has a
+retry budget that stops retries while most calls fail, so that retries can't
+multiply the load on a service that is already in trouble.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, NamedTuple, Optional
+
+
+class RetryDecision(NamedTuple):
+    """
+    How a failed call should be handled.
+
+    retry: Whether the failure is transient.
+    retry_after: Delay requested by the service (Retry-After), if any.
+    throttled: Whether the service throttled the call (429); throttled retries have their own limit.
+    maybe_processed: Whether the service may have processed the request (read timeouts, 5xx).
+        Such failures are only retried for idempotent calls.
+    """
+    retry: bool
+    retry_after: Optional[float] = None
+    throttled: bool = False
+    maybe_processed: bool = True
+
+
+# Decision for errors that must not be retried
+NO_RETRY = RetryDecision(False)
+
+
+class RetryableStatusError(Exception):
+    """
+    Raised inside a retried call for a response with a transient status code.
+
+    The response is kept so that the caller can log it once retries are exhausted.
+    """
+
+    def __init__(self, response: Any, retry_after: Optional[float] = None):
+        super().__init__(f"Transient HTTP status {getattr(response, 'status_code', None)}")
+        self.response = response
+        self.status_code = getattr(response, "status_code", None)
+        self.retry_after = retry_after
+
+
+class RetryBudget:
+    """
+    Token based retry budget (the retry throttling scheme of gRPC).
+
+    Every failure takes one token and every success gives back token_ratio
+    tokens. Retries are only allowed while more than half of the tokens are
+    left, so a healthy service gets its retries and a failing one gets at most
+    a few before callers stop retrying.
+    """
+
+    def __init__(self, max_tokens: float = 10.0, token_ratio: float = 0.1):
+        """
+        Args:
+            max_tokens: Size of the budget.
+            token_ratio: Tokens returned by each successful call.
+        """
+        self.max_tokens = max_tokens
+        self.token_ratio = token_ratio
+        self.tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def record_success(self) -> None:
+        """Give back part of a token after a successful call."""
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.token_ratio)
+
+    def record_failure(self) -> None:
+        """Take a token after a failed call."""
+        with self._lock:
+            self.tokens = max(0.0, self.tokens - 1)
+
+    def can_retry(self) -> bool:
+        """Whether the budget still allows a retry."""
+        with self._lock:
+            return self.tokens > self.max_tokens / 2
+
+
+class RetryPolicy:
+    """
+    Runs a call and retries it according to a classifier.
+
+    The classifier maps an exception to a RetryDecision. Transient failures are
+    retried up to max_attempts calls in total while the budget allows it,
+    throttled ones up to max_throttle_retries times.
+    """
+
+    def __init__(self, classify: Callable[[BaseException], RetryDecision], max_attempts: int = 3,
+                 base_delay: float = 0.5, max_delay: float = 30.0, max_throttle_retries: int = 8,
+                 max_retry_after: float = 120.0, budget: Optional[RetryBudget] = None,
+                 on_throttle: Optional[Callable[[float], None]] = None, name: str = "call"):
+        """
+        Args:
+            classify: Function returning the RetryDecision for an exception.
+            max_attempts: Maximum number of calls for transient failures (1 disables retries).
+            base_delay: Backoff before the first retry in seconds (doubled for every attempt).
+            max_delay: Maximum backoff in seconds.
+            max_throttle_retries: Maximum number of retries after throttled (429) answers.
+            max_retry_after: Longest Retry-After delay honored, in seconds.
+            budget: Optional retry budget shared by every policy of the same upstream.
+            on_throttle: Optional callback receiving the delay of a throttled answer. When set,
+                the callback is responsible for the wait (e.g. pausing a shared rate limiter).
+            name: Name of the upstream for log messages.
+        """
+        self.classify = classify
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_throttle_retries = max_throttle_retries
+        self.max_retry_after = max_retry_after
+        self.budget = budget
+        self.on_throttle = on_throttle
+        self.name = name
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Capped exponential backoff with full jitter.
+
+        Args:
+            attempt: Number of failed attempts so far, starting at 1.
+
+        Returns:
+            Random delay between 0 and min(max_delay, base_delay * 2 ** (attempt - 1)).
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def call(self, func: Callable[[], Any], idempotent: bool = True) -> Any:
+        """
+        Call func until it succeeds or the failure must not be retried.
+
+        Args:
+            func: Function without arguments performing one attempt.
+            idempotent: Whether func may be repeated safely when the service might have processed it.
+
+        Returns:
+            The return value of func. The last exception is raised when retries are exhausted.
+        """
+        failures = 0
+        throttles = 0
+        while True:
+            try:
+                result = func()
+            except Exception as e:
+                retry = self._retry_delay(e, idempotent, failures, throttles)
+                if retry is None:
+                    raise
+                throttled, delay = retry
+                if throttled:
+                    throttles += 1
+                else:
+                    failures += 1
+                if delay > 0:
+                    time.sleep(delay)
+                continue
+            self._record_success()
+            return result
+
+    async def acall(self, func: Callable[[], Any], idempotent: bool = True) -> Any:
+        """Async version of call for a coroutine function."""
+        failures = 0
+        throttles = 0
+        while True:
+            try:
+                result = await func()
+            except Exception as e:
+                retry = self._retry_delay(e, idempotent, failures, throttles)
+                if retry is None:
+                    raise
+                throttled, delay = retry
+                if throttled:
+                    throttles += 1
+                else:
+                    failures += 1
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                continue
+            self._record_success()
+            return result
+
+    def _record_success(self) -> None:
+        if self.budget is not None:
+            self.budget.record_success()
+
+    def _retry_delay(self, error: BaseException, idempotent: bool, failures: int, throttles: int):
+        # Returns (throttled, seconds to sleep) for a retry, or None to give up
+        decision = self.classify(error)
+        if not decision.retry or (decision.maybe_processed and not idempotent):
+            return None
+
+        if decision.throttled:
+            # Throttled retries wait for the Retry-After delay, so they don't count against the budget
+            if throttles >= self.max_throttle_retries:
+                return None
+            delay = decision.retry_after if decision.retry_after is not None else self.backoff(throttles + 1)
+            delay = min(delay, self.max_retry_after)
+            logging.warning("%s throttled the request. Retrying in %.1f seconds.", self.name, delay)
+            if self.on_throttle is not None:
+                self.on_throttle(delay)
+                return True, 0.0
+            return True, delay
+
+        if self.budget is not None:
+            self.budget.record_failure()
+            if not self.budget.can_retry():
+                logging.warning("Retry budget of %s exhausted, not retrying: %s", self.name, error)
+                return None
+        if failures + 1 >= self.max_attempts:
+            return None
+        delay = self.backoff(failures + 1)
+        if decision.retry_after is not None:
+            delay = max(delay, min(decision.retry_after, self.max_retry_after))
+        logging.warning("%s failed (%s). Retrying in %.1f seconds.", self.name, error, delay)
+        return False, delay
@@ -0,0 +1,153 @@
+"""
+Persistent on-disk cache for Azure OpenAI summaries.
+
+Summaries are stored in a SQLite file so that decks regenerated for the same
+articles, language and prompt are answered without calling Azure OpenAI again.
+Entries expire after a TTL and the least recently used entries are evicted when
+the cache grows beyond its maximum size.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class SummaryCache:
+    """
+    SQLite backed key-value cache with TTL and size based eviction.
+
+    The cache is safe to use from several threads and keeps hit/miss counters
+    for observability.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl_seconds: float = 30 * 24 * 60 * 60):
+        """
+        Open (or create) the cache file.
+
+        Args:
+            path: Path of the SQLite file (":memory:" for a process-local cache).
+            max_entries: Maximum number of entries kept; 0 disables size based eviction.
+            ttl_seconds: Lifetime of an entry in seconds; 0 disables expiry.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS summaries_accessed_at ON summaries (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Build a cache key from its parts.
+
+        Long parts such as system prompts should be passed through prompt_hash first.
+
+        Returns:
+            Key string joining all parts.
+        """
+        return "|".join("" if part is None else str(part) for part in parts)
+
+    @staticmethod
+    def prompt_hash(text: str) -> str:
+        """
+        Hash a prompt (or any text) for use in a cache key.
+
+        Returns:
+            Hex SHA-256 digest of the text.
+        """
+        return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Returns:
+            The cached value, or None if the key is missing or expired.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self._expired(row[1], now):
+                self._conn.execute("DELETE FROM summaries WHERE key = ?", (key,))
+                self._conn.commit()
+                self.evictions += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE summaries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a JSON serializable value and evict old entries if needed.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM summaries")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with hits, misses, evictions and the current number of entries.
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "entries": entries}
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    def _evict(self, now: float) -> None:
+        # Expired entries first, then the least recently used ones above max_entries
+        if self.ttl_seconds > 0:
+            cursor = self._conn.execute("DELETE FROM summaries WHERE created_at < ?", (now - self.ttl_seconds,))
+            self.evictions += max(cursor.rowcount, 0)
+        if self.max_entries > 0:
+            count = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+            if count > self.max_entries:
+                cursor = self._conn.execute(
+                    "DELETE FROM summaries WHERE key IN "
+                    "(SELECT key FROM summaries ORDER BY accessed_at ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+                self.evictions += max(cursor.rowcount, 0)
+                logging.debug("Evicted %d summary cache entries", cursor.rowcount)
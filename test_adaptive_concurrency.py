@@ -0,0 +1,175 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import adaptive_concurrency
+from adaptive_concurrency import AIMDLimiter, shared_limiter
+
+
+class TestAIMDLimiter(unittest.TestCase):
+    """Tests for AIMDLimiter"""
+
+    def test_initial_limit_is_clamped(self):
+        self.assertEqual(AIMDLimiter(initial_limit=100, max_limit=10).limit, 10)
+        self.assertEqual(AIMDLimiter(initial_limit=0, min_limit=2).limit, 2)
+
+    @patch('adaptive_concurrency.time.monotonic')
+    def test_additive_increase_on_success(self, mock_monotonic):
+        mock_monotonic.return_value = 10.0
+        limiter = AIMDLimiter(initial_limit=2, max_limit=4)
+        # About one window of successful tasks with stable latency raises the limit by one
+        for _ in range(3):
+            started_at = limiter.acquire()
+            limiter.release(started_at)
+        self.assertEqual(limiter.limit, 3)
+        self.assertEqual(limiter.changes()[-1]['reason'], 'success')
+
+    @patch('adaptive_concurrency.time.monotonic')
+    def test_limit_does_not_exceed_max(self, mock_monotonic):
+        mock_monotonic.return_value = 10.0
+        limiter = AIMDLimiter(initial_limit=2, max_limit=2)
+        for _ in range(10):
+            limiter.release(limiter.acquire())
+        self.assertEqual(limiter.limit, 2)
+
+    @patch('adaptive_concurrency.time.monotonic')
+    def test_multiplicative_decrease_on_throttling(self, mock_monotonic):
+        mock_monotonic.return_value = 10.0
+        limiter = AIMDLimiter(initial_limit=8)
+        limiter.release(limiter.acquire(), throttled=True)
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.changes()[-1], {
+            'time': limiter.changes()[-1]['time'], 'old': 8, 'new': 4, 'reason': 'throttled'
+        })
+
+    @patch('adaptive_concurrency.time.monotonic')
+    def test_concurrent_failures_cut_once(self, mock_monotonic):
+        mock_monotonic.return_value = 10.0
+        limiter = AIMDLimiter(initial_limit=8)
+        started = [limiter.acquire() for _ in range(4)]
+        mock_monotonic.return_value = 11.0
+        for started_at in started:
+            limiter.release(started_at, error=True)
+        self.assertEqual(limiter.limit, 4)
+
+    @patch('adaptive_concurrency.time.monotonic')
+    def test_decrease_on_latency_spike(self, mock_monotonic):
+        limiter = AIMDLimiter(initial_limit=8, latency_tolerance=2.0)
+        mock_monotonic.return_value = 10.0
+        started_at = limiter.acquire()
+        mock_monotonic.return_value = 11.0
+        limiter.release(started_at)
+        self.assertEqual(limiter.baseline_latency, 1.0)
+
+        started_at = limiter.acquire()
+        mock_monotonic.return_value = 16.0
+        limiter.release(started_at)
+        self.assertEqual(limiter.limit, 4)
+        self.assertIn('latency', limiter.changes()[-1]['reason'])
+
+    @patch('adaptive_concurrency.time.monotonic')
+    def test_limit_recovers_after_a_lasting_latency_shift(self, mock_monotonic):
+        limiter = AIMDLimiter(initial_limit=8, min_limit=1, max_limit=8, latency_tolerance=2.0)
+        now = 10.0
+
+        def run_task(latency):
+            nonlocal now
+            mock_monotonic.return_value = now
+            started_at = limiter.acquire()
+            now += latency
+            mock_monotonic.return_value = now
+            limiter.release(started_at)
+
+        for _ in range(5):
+            run_task(1.0)
+        lowest = limiter.limit
+        # The backend becomes three times slower for good
+        for _ in range(60):
+            run_task(3.0)
+            lowest = min(lowest, limiter.limit)
+
+        self.assertLess(lowest, 8)
+        self.assertGreater(limiter.baseline_latency, 2.5)
+        self.assertEqual(limiter.limit, 8)
+
+    @patch('adaptive_concurrency.time.monotonic')
+    def test_unmeasured_tasks_leave_the_baseline(self, mock_monotonic):
+        limiter = AIMDLimiter(initial_limit=4, latency_tolerance=2.0)
+        mock_monotonic.return_value = 10.0
+        started_at = limiter.acquire()
+        mock_monotonic.return_value = 11.0
+        limiter.release(started_at)
+        # Cache hits answered in a few milliseconds
+        for _ in range(20):
+            limiter.release(limiter.acquire(), measured=False)
+        self.assertEqual(limiter.baseline_latency, 1.0)
+        self.assertEqual(limiter.in_flight, 0)
+
+        started_at = limiter.acquire()
+        mock_monotonic.return_value = 12.5
+        limiter.release(started_at)
+        self.assertEqual(limiter.limit, 4)
+        self.assertNotIn('latency', [change['reason'][:7] for change in limiter.changes()])
+
+    @patch('adaptive_concurrency.time.monotonic')
+    def test_limit_does_not_go_below_min(self, mock_monotonic):
+        limiter = AIMDLimiter(initial_limit=2, min_limit=1)
+        for i in range(5):
+            mock_monotonic.return_value = 10.0 + i
+            limiter.release(limiter.acquire(), error=True)
+        self.assertEqual(limiter.limit, 1)
+
+    def test_slot_counts_exceptions_as_errors(self):
+        limiter = AIMDLimiter(initial_limit=4)
+        with self.assertRaises(ValueError):
+            with limiter.slot():
+                raise ValueError("failed")
+        self.assertEqual(limiter.limit, 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_acquire_blocks_at_limit(self):
+        limiter = AIMDLimiter(initial_limit=1, max_limit=1)
+        started_at = limiter.acquire()
+        acquired = threading.Event()
+
+        def worker():
+            limiter.release(limiter.acquire())
+            acquired.set()
+        thread = threading.Thread(target=worker)
+        thread.start()
+        time.sleep(0.05)
+        self.assertFalse(acquired.is_set())
+        limiter.release(started_at)
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+
+    def test_snapshot(self):
+        limiter = AIMDLimiter(initial_limit=3)
+        snapshot = limiter.snapshot()
+        self.assertEqual(snapshot['limit'], 3)
+        self.assertEqual(snapshot['in_flight'], 0)
+        self.assertEqual(snapshot['history'], [])
+
+
+class TestSharedLimiter(unittest.TestCase):
+    """Tests for shared_limiter"""
+
+    def setUp(self):
+        patcher = patch.object(adaptive_concurrency, '_shared_limiter', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_learned_limit_is_kept_between_calls(self):
+        limiter = shared_limiter(initial_limit=4, min_limit=1, max_limit=8)
+        limiter.release(limiter.acquire(), throttled=True)
+
+        same = shared_limiter(initial_limit=4, min_limit=1, max_limit=8)
+
+        self.assertIs(same, limiter)
+        self.assertEqual(same.limit, 2)
+        self.assertEqual(same.max_limit, 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
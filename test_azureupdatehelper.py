@@ -1,8 +1,20 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import azureupdatehelper
+import parsed_article
+import json
+import requests
+import asyncio
+import httpx
+import inspect
 import os
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import urllib.parse as urlparse
+from summary_cache import SummaryCache
+from http_cache import ValidatorCache
+from retry_policy import RetryBudget
 
 
 class TestEnvironmentCheck(unittest.TestCase):
@@ -29,15 +41,60 @@ class TestEnvironmentCheck(unittest.TestCase):
 
 
 class TestGetRssFeedEntries(unittest.TestCase):
-    @patch('azureupdatehelper.feedparser.parse')
-    def test_get_rss_feed_entries(self, mock_parse):
-        mock_feed = MagicMock()
-        mock_feed.entries = [{'id': '1', 'published': 'Thu, 31 Oct 2024 21:45:07 Z'}]
-        mock_parse.return_value = mock_feed
+    RSS = (b'<?xml version="1.0"?><rss version="2.0"><channel><title>Azure Updates</title>'
+           b'<item><title>Update 1</title><link>https://azure.microsoft.com/updates?id=1</link>'
+           b'<category>Azure Functions</category><pubDate>Thu, 31 Oct 2024 21:45:07 Z</pubDate></item>'
+           b'</channel></rss>')
+
+    def setUp(self):
+        patcher = patch.object(azureupdatehelper, '_validator_cache', ValidatorCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('azureupdatehelper.http_session')
+        self.session = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def response(self, status_code=200, content=RSS, headers=None):
+        return MagicMock(status_code=status_code, content=content, headers=headers or {})
+
+    def test_get_rss_feed_entries(self):
+        self.session.get.return_value = self.response()
 
         entries = azureupdatehelper.get_rss_feed_entries()
+
         self.assertEqual(len(entries), 1)
-        self.assertEqual(entries[0]['id'], '1')
+        self.assertEqual(entries[0].link, 'https://azure.microsoft.com/updates?id=1')
+        self.assertEqual(entries[0].tags[0].term, 'Azure Functions')
+        timeout = self.session.get.call_args[1]['timeout']
+        self.assertEqual(timeout, (azureupdatehelper.HTTP_CONNECT_TIMEOUT, azureupdatehelper.FEED_TIMEOUT))
+
+    def test_get_rss_feed_entries_timeout_does_not_block_later_downloads(self):
+        self.session.get.side_effect = [requests.ReadTimeout("read timed out")] * 3 + [self.response()]
+
+        for _ in range(3):
+            self.assertEqual(azureupdatehelper.get_rss_feed_entries(), [])
+        self.assertEqual(len(azureupdatehelper.get_rss_feed_entries()), 1)
+
+    def test_get_rss_feed_entries_conditional_request(self):
+        self.session.get.side_effect = [
+            self.response(headers={'ETag': '"v1"'}),
+            self.response(status_code=304, content=b''),
+            requests.ConnectionError("unreachable"),
+        ]
+
+        first = azureupdatehelper.get_rss_feed_entries()
+        second = azureupdatehelper.get_rss_feed_entries()
+        third = azureupdatehelper.get_rss_feed_entries()
+
+        self.assertEqual(self.session.get.call_args_list[1][1]['headers'], {'If-None-Match': '"v1"'})
+        self.assertIs(second, first)
+        self.assertIs(third, first)
+        self.assertEqual(azureupdatehelper._validator_cache.not_modified, 1)
+        self.assertEqual(azureupdatehelper._validator_cache.stale, 1)
+
+    def test_get_rss_feed_entries_error_status(self):
+        self.session.get.return_value = self.response(status_code=503, content=b'')
+        self.assertEqual(azureupdatehelper.get_rss_feed_entries(), [])
 
 
 class TestGetUpdateUrls(unittest.TestCase):
@@ -96,17 +153,20 @@ class TestGetUpdateUrls(unittest.TestCase):
 
 
 class TestGetArticle(unittest.TestCase):
-    @patch('azureupdatehelper.requests.get')
-    def test_get_article_calls_api(self, mock_get):
+    @patch('azureupdatehelper.http_session')
+    def test_get_article_calls_api(self, mock_http_session):
         mock_response = MagicMock()
         mock_response.text = '{"title":"Fake Title"}'
         mock_response.json.return_value = {"title": "Fake Title"}
         mock_response.status_code = 200
+        mock_get = mock_http_session.return_value.get
         mock_get.return_value = mock_response
 
         url = "https://fake.url/path?id=12345"
         response = azureupdatehelper.get_article(url)
         mock_get.assert_called_once()
+        self.assertEqual(mock_get.call_args[0][0], azureupdatehelper.BASE_URL + "12345")
+        self.assertEqual(mock_get.call_args[1]['timeout'], azureupdatehelper.http_timeout())
         self.assertIsNotNone(response)
         self.assertEqual(response.json()['title'], "Fake Title")
 
@@ -120,12 +180,143 @@ class TestGetArticle(unittest.TestCase):
         response = azureupdatehelper.get_article(url)
         self.assertIsNone(response)
 
+    @patch('retry_policy.time.sleep')
+    @patch('azureupdatehelper.http_session')
+    def test_get_article_timeout(self, mock_http_session, mock_sleep):
+        mock_http_session.return_value.get.side_effect = requests.Timeout("read timed out")
+        with patch.object(azureupdatehelper, '_article_retry_budget', RetryBudget()):
+            self.assertIsNone(azureupdatehelper.get_article("https://fake.url/path?id=12345"))
+        self.assertEqual(mock_http_session.return_value.get.call_count, azureupdatehelper.RETRY_MAX_ATTEMPTS)
+
+    @patch('retry_policy.time.sleep')
+    @patch('azureupdatehelper.http_session')
+    def test_get_article_retries_transient_status(self, mock_http_session, mock_sleep):
+        unavailable = MagicMock(status_code=503, headers=requests.structures.CaseInsensitiveDict({"Retry-After": "1"}))
+        ok = MagicMock(status_code=200, headers={})
+        mock_http_session.return_value.get.side_effect = [unavailable, ok]
+
+        with patch.object(azureupdatehelper, '_article_retry_budget', RetryBudget()):
+            response = azureupdatehelper.get_article("https://fake.url/path?id=12345")
+
+        self.assertIs(response, ok)
+        self.assertGreaterEqual(mock_sleep.call_args[0][0], 1.0)
+
+    @patch('azureupdatehelper.http_session')
+    def test_get_article_does_not_retry_not_found(self, mock_http_session):
+        mock_http_session.return_value.get.return_value = MagicMock(status_code=404, headers={})
+        self.assertIsNone(azureupdatehelper.get_article("https://fake.url/path?id=12345"))
+        mock_http_session.return_value.get.assert_called_once()
+
     def test_get_article_calls_api_faildocid(self):
         url = "https://fake.url/path?id=faildocid"
         response = azureupdatehelper.get_article(url)
         self.assertIsNone(response)
 
 
+class TestBulkArticles(unittest.TestCase):
+    start = datetime(2024, 11, 1, 9, 0, tzinfo=timezone.utc)
+
+    def setUp(self):
+        azureupdatehelper._bulk_articles.clear()
+        self.addCleanup(azureupdatehelper._bulk_articles.clear)
+
+    def page(self, first, count, total=None):
+        page = {"value": [{"id": str(i), "title": f"Update {i}"} for i in range(first, first + count)]}
+        if total is not None:
+            page["@odata.count"] = total
+        return page
+
+    def test_article_listing_url(self):
+        end = self.start + timedelta(days=7)
+        url = azureupdatehelper.article_listing_url(self.start, end, skip=200, top=100, count=True)
+        query = dict(urlparse.parse_qsl(urlparse.urlparse(url).query))
+
+        self.assertTrue(url.startswith(azureupdatehelper.BASE_URL.rstrip("/") + "?"))
+        self.assertEqual(query["$filter"], "modified ge 2024-11-01T09:00:00Z and created le 2024-11-08T09:00:00Z")
+        self.assertEqual(query["$select"], "id,title,products,description,created,modified")
+        # Pages listed concurrently with $skip need an order that modifications don't change
+        self.assertEqual(query["$orderby"], "created asc,id asc")
+        self.assertEqual((query["$top"], query["$skip"], query["$count"]), ("100", "200", "true"))
+
+    @patch('azureupdatehelper.http_session')
+    def test_get_article_page(self, mock_http_session):
+        mock_http_session.return_value.get.return_value = MagicMock(status_code=200, json=lambda: self.page(0, 2, 2))
+        self.assertEqual(len(azureupdatehelper.get_article_page(self.start)["value"]), 2)
+
+        mock_http_session.return_value.get.return_value = MagicMock(status_code=200, json=lambda: ["not a page"])
+        self.assertIsNone(azureupdatehelper.get_article_page(self.start))
+
+    @patch('azureupdatehelper.get_article_page')
+    def test_list_articles_fetches_remaining_pages_concurrently(self, mock_get_page):
+        mock_get_page.side_effect = lambda start, end, skip, top, count=False: self.page(skip, min(top, 250 - skip), 250)
+
+        articles = azureupdatehelper.list_articles(self.start, page_size=100)
+
+        self.assertEqual([article["id"] for article in articles], [str(i) for i in range(250)])
+        self.assertEqual(sorted(call[0][2] for call in mock_get_page.call_args_list), [0, 100, 200])
+        self.assertTrue(mock_get_page.call_args_list[0][1]["count"])
+
+    @patch('azureupdatehelper.get_article_page')
+    def test_list_articles_without_count(self, mock_get_page):
+        mock_get_page.side_effect = lambda start, end, skip, top, count=False: self.page(skip, min(top, 150 - skip))
+        self.assertEqual(len(azureupdatehelper.list_articles(self.start, page_size=100)), 150)
+
+    @patch('azureupdatehelper.get_article_page')
+    def test_list_articles_failed_page(self, mock_get_page):
+        mock_get_page.side_effect = lambda start, end, skip, top, count=False: \
+            None if skip == 100 else self.page(skip, 100, 300)
+        self.assertIsNone(azureupdatehelper.list_articles(self.start, page_size=100))
+        self.assertEqual(azureupdatehelper.load_articles_in_bulk(self.start), 0)
+
+    @patch('azureupdatehelper.summarize_article')
+    @patch('azureupdatehelper.get_article', return_value=None)
+    @patch('azureupdatehelper.list_articles')
+    def test_read_and_summary_uses_bulk_articles(self, mock_list_articles, mock_get_article, mock_summarize_article):
+        mock_list_articles.return_value = [{
+            "id": "12345", "title": "Listed", "products": ["Azure"], "description": "<p>Listed article</p>",
+            "created": "2024-11-01T10:00:00.0000000Z", "modified": "2024-11-02T10:00:00.0000000Z"
+        }]
+        mock_summarize_article.return_value = ("Fake Summary", "")
+
+        with patch('azureupdatehelper.BULK_FETCH', True):
+            self.assertEqual(azureupdatehelper.load_articles_in_bulk(self.start), 1)
+            result = azureupdatehelper.read_and_summary(MagicMock(), "Fake Deployment", "https://fake.url/path?id=12345")
+            azureupdatehelper.read_and_summary(MagicMock(), "Fake Deployment", "https://fake.url/path?id=67890")
+
+        self.assertEqual(result['title'], "Listed")
+        # Only the article missing from the listing is downloaded
+        mock_get_article.assert_called_once_with("https://fake.url/path?id=67890")
+
+    @patch('azureupdatehelper.list_articles')
+    def test_bulk_articles_disabled(self, mock_list_articles):
+        mock_list_articles.return_value = [{"id": "12345", "title": "Listed"}]
+        azureupdatehelper.load_articles_in_bulk(self.start)
+        with patch('azureupdatehelper.BULK_FETCH', False):
+            self.assertIsNone(azureupdatehelper.bulk_article("https://fake.url/path?id=12345"))
+
+
+class TestHttpSession(unittest.TestCase):
+    def setUp(self):
+        patcher = patch('azureupdatehelper._http_session', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_http_session_is_shared(self):
+        self.assertIs(azureupdatehelper.http_session(), azureupdatehelper.http_session())
+
+    @patch('azureupdatehelper.HTTP_POOL_SIZE', 4)
+    def test_http_session_pool_and_headers(self):
+        session = azureupdatehelper.http_session()
+        adapter = session.get_adapter("https://www.microsoft.com/")
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertEqual(session.headers["User-Agent"], azureupdatehelper.HEADERS["User-Agent"])
+
+    @patch('azureupdatehelper.HTTP_CONNECT_TIMEOUT', 2.0)
+    @patch('azureupdatehelper.HTTP_READ_TIMEOUT', 10.0)
+    def test_http_timeout(self):
+        self.assertEqual(azureupdatehelper.http_timeout(), (2.0, 10.0))
+
+
 class TestAzureOpenAIClient(unittest.TestCase):
     @patch('azureupdatehelper.logging.debug')
     def test_azure_openai_client(self, mock_debug):
@@ -170,6 +361,210 @@ class TestAzureOpenAIClient(unittest.TestCase):
         self.assertIsNone(deployment_name)
 
 
+class TestGetAzureOpenAIClient(unittest.TestCase):
+    endpoint = "https://example.com/deployments/test/?api-version=2024-08-01-preview"
+
+    def setUp(self):
+        azureupdatehelper.reset_azure_openai_clients()
+        self.addCleanup(azureupdatehelper.reset_azure_openai_clients)
+
+    def test_client_is_reused(self):
+        client, deployment_name = azureupdatehelper.get_azure_openai_client("fake_key", self.endpoint)
+        same_client, _ = azureupdatehelper.get_azure_openai_client("fake_key", self.endpoint)
+        self.assertIs(client, same_client)
+        self.assertEqual(deployment_name, "test")
+
+    @patch('azureupdatehelper.AOAI_POOL_SIZE', 3)
+    def test_client_has_pool_limits(self):
+        client, _ = azureupdatehelper.get_azure_openai_client("fake_key", self.endpoint)
+        pool = client._client._transport._pool
+        self.assertEqual(pool._max_connections, 3)
+
+    def test_client_is_rotated_when_key_changes(self):
+        old_client, _ = azureupdatehelper.get_azure_openai_client("old_key", self.endpoint)
+        new_client, _ = azureupdatehelper.get_azure_openai_client("new_key", self.endpoint)
+        self.assertIsNot(old_client, new_client)
+        self.assertEqual(new_client.api_key, "new_key")
+        self.assertEqual(len(azureupdatehelper._openai_clients), 1)
+        # The new client reuses the connection pool of the endpoint instead of leaking a new one
+        self.assertIs(new_client._client, old_client._client)
+        self.assertFalse(new_client._client.is_closed)
+        self.assertEqual(len(azureupdatehelper._openai_http_clients), 1)
+
+    def test_reset_creates_new_client(self):
+        client, _ = azureupdatehelper.get_azure_openai_client("fake_key", self.endpoint)
+        azureupdatehelper.reset_azure_openai_clients()
+        self.assertTrue(client._client.is_closed)
+        self.assertIsNot(client, azureupdatehelper.get_azure_openai_client("fake_key", self.endpoint)[0])
+
+    def test_invalid_endpoint(self):
+        client, deployment_name = azureupdatehelper.get_azure_openai_client("fake_key", "https://example.com/test/")
+        self.assertIsNone(client)
+        self.assertIsNone(deployment_name)
+        self.assertEqual(azureupdatehelper._openai_http_clients, {})
+
+
+class TestAsyncAzureOpenAIClient(unittest.TestCase):
+    def test_async_azure_openai_client(self):
+        client, deployment_name = azureupdatehelper.async_azure_openai_client(
+            "fake_key",
+            "https://example.com/deployments/test/?api-version=2024-08-01-preview"
+        )
+        self.assertIsInstance(client, azureupdatehelper.AsyncAzureOpenAI)
+        self.assertEqual(client.api_key, "fake_key")
+        self.assertEqual(deployment_name, "test")
+
+    def test_async_azure_openai_client_no_api_version(self):
+        client, deployment_name = azureupdatehelper.async_azure_openai_client(
+            "fake_key",
+            "https://example.com/deployments/test/"
+        )
+        self.assertIsNone(client)
+        self.assertIsNone(deployment_name)
+
+
+class TestAsyncArticleApi(unittest.IsolatedAsyncioTestCase):
+    article = {
+        "title": "Dummy article content",
+        "products": ["Azure"],
+        "description": "<p>Some description with <a href='https://example.com'>link</a></p>",
+        "created": "2024-11-01T10:00:00.0000000Z",
+        "modified": "2024-11-02T10:00:00.0000000Z"
+    }
+
+    def mock_http_client(self, status_code=200):
+        requested = []
+
+        def handler(request):
+            requested.append(request)
+            return httpx.Response(status_code, json=self.article)
+        # Configured like async_http_client, which sets the request headers of the client
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler), headers=azureupdatehelper.HEADERS), requested
+
+    def mock_openai_client(self, content="Fake Summary"):
+        client = MagicMock()
+        response = MagicMock()
+        response.choices = [MagicMock(message=MagicMock(content=content))]
+        client.chat.completions.create = AsyncMock(return_value=response)
+        return client
+
+    async def test_aget_article_calls_api(self):
+        http_client, requested = self.mock_http_client()
+        async with http_client:
+            response = await azureupdatehelper.aget_article("https://fake.url/path?id=12345", http_client)
+        self.assertEqual(response.json()['title'], "Dummy article content")
+        self.assertEqual(str(requested[0].url), azureupdatehelper.BASE_URL + "12345")
+        self.assertEqual(requested[0].headers["User-Agent"], azureupdatehelper.HEADERS["User-Agent"])
+
+    async def test_aget_article_not_found(self):
+        http_client, _ = self.mock_http_client(status_code=404)
+        async with http_client:
+            response = await azureupdatehelper.aget_article("https://fake.url/path?id=12345", http_client)
+        self.assertIsNone(response)
+
+    async def test_aget_article_no_id(self):
+        self.assertIsNone(await azureupdatehelper.aget_article("https://fake.url/path"))
+
+    async def test_asummarize_article_returns_summary(self):
+        client = self.mock_openai_client()
+        summary = await azureupdatehelper.asummarize_article(client, "Fake Deployment", self.article)
+        self.assertEqual(summary, ('Fake Summary', 'https://example.com'))
+        messages = client.chat.completions.create.call_args[1]['messages']
+        self.assertEqual(messages[0]['content'], azureupdatehelper.systemprompt)
+        self.assertEqual(messages[1]['content'], azureupdatehelper.build_summary_content(self.article)[0])
+
+    async def test_asummarize_article_returns_none_on_error(self):
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(side_effect=Exception("API error"))
+        self.assertIsNone(await azureupdatehelper.asummarize_article(client, "Fake Deployment", self.article))
+
+    async def test_asummarize_article_for_table(self):
+        client = self.mock_openai_client("One sentence")
+        summary = await azureupdatehelper.asummarize_article_for_table(
+            client, "Fake Deployment", self.article, "Table prompt")
+        self.assertEqual(summary, "One sentence")
+        messages = client.chat.completions.create.call_args[1]['messages']
+        self.assertEqual(messages[0]['content'], "Table prompt")
+
+    async def test_aread_and_summary(self):
+        client = self.mock_openai_client()
+        http_client, _ = self.mock_http_client()
+        async with http_client:
+            result = await azureupdatehelper.aread_and_summary(
+                client, "Fake Deployment", "https://fake.url/path?id=12345", http_client=http_client)
+        self.assertEqual(result['docId'], "12345")
+        self.assertEqual(result['summary'], "Fake Summary")
+        self.assertEqual(result['description'], "Some description with link")
+        self.assertEqual(result['referenceLink'], "https://example.com")
+        self.assertEqual(result['publishedDate'], self.article['created'])
+
+    async def test_aread_and_summary_streams_combined_call(self):
+        answer = json.dumps({"summary": "Long \"summary\"", "table_summary": "Short"})
+
+        async def stream():
+            for i in range(0, len(answer), 5):
+                yield MagicMock(choices=[MagicMock(delta=MagicMock(content=answer[i:i + 5]))])
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(side_effect=lambda **kwargs: stream())
+        http_client, _ = self.mock_http_client()
+        tokens = []
+        calls = azureupdatehelper.llm_call_count()
+
+        async with http_client:
+            result = await azureupdatehelper.aread_and_summary(
+                client, "Fake Deployment", "https://fake.url/path?id=12345", "Slide", "Table",
+                on_token=tokens.append, http_client=http_client)
+
+        self.assertEqual(client.chat.completions.create.call_count, 1)
+        self.assertEqual(azureupdatehelper.llm_call_count(), calls + 1)
+        self.assertEqual("".join(tokens), 'Long "summary"')
+        self.assertEqual(result['summary'], 'Long "summary"')
+        self.assertEqual(result['tableSummary'], "Short")
+
+    async def test_async_summaries_read_the_caches_off_the_event_loop(self):
+        loop_thread = threading.current_thread()
+        threads = []
+
+        def cached_summary(*args):
+            threads.append(threading.current_thread())
+            return None
+        client = self.mock_openai_client()
+        with patch('azureupdatehelper.cached_summary', side_effect=cached_summary), \
+                patch('azureupdatehelper.stored_article', side_effect=lambda url: threads.append(
+                    threading.current_thread())):
+            http_client, _ = self.mock_http_client()
+            async with http_client:
+                await azureupdatehelper.aread_and_summary(
+                    client, "Fake Deployment", "https://fake.url/path?id=12345", http_client=http_client)
+
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(loop_thread, threads)
+
+    def test_aread_and_summary_takes_the_arguments_of_read_and_summary(self):
+        sync_parameters = list(inspect.signature(azureupdatehelper.read_and_summary).parameters)
+        async_parameters = inspect.signature(azureupdatehelper.aread_and_summary).parameters
+        positional = [name for name, parameter in async_parameters.items()
+                      if parameter.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD]
+        self.assertEqual(positional, sync_parameters[:len(positional)])
+        self.assertEqual(async_parameters['http_client'].kind, inspect.Parameter.KEYWORD_ONLY)
+
+    async def test_aread_and_summary_summary_failure(self):
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(side_effect=Exception("API error"))
+        http_client, _ = self.mock_http_client()
+        async with http_client:
+            result = await azureupdatehelper.aread_and_summary(
+                client, "Fake Deployment", "https://fake.url/path?id=12345", http_client=http_client)
+        self.assertIsNone(result)
+
+    @patch('azureupdatehelper.aread_and_summary', new_callable=AsyncMock)
+    async def test_aread_and_summary_all_keeps_order(self, mock_aread_and_summary):
+        mock_aread_and_summary.side_effect = lambda client, deployment_name, url, *args, **kwargs: {"url": url}
+        urls = [f"https://fake.url/path?id={i}" for i in range(5)]
+        results = await azureupdatehelper.aread_and_summary_all(MagicMock(), "Fake Deployment", urls, concurrency=2)
+        self.assertEqual([result["url"] for result in results], urls)
+
+
 class TestSummarizeArticle(unittest.TestCase):
     def test_summarize_article_returns_summary(self):
         mock_client = MagicMock()
@@ -199,6 +594,433 @@ class TestSummarizeArticle(unittest.TestCase):
             ]
         )
 
+    def test_summarize_article_streams_tokens(self):
+        def chunk(content):
+            return MagicMock(choices=[MagicMock(delta=MagicMock(content=content))])
+        mock_client = MagicMock()
+        # The first chunk of Azure OpenAI only carries prompt filter results
+        mock_client.chat.completions.create.return_value = iter(
+            [MagicMock(choices=[]), chunk("Fake "), chunk(None), chunk("Summary")]
+        )
+        article = {"title": "Dummy", "products": ["Azure"], "description": "<p>Description</p>"}
+        tokens = []
+
+        summary = azureupdatehelper.summarize_article(
+            mock_client, "Fake Deployment", article, stream=True, on_token=tokens.append
+        )
+
+        self.assertEqual(summary, ("Fake Summary", ""))
+        self.assertEqual(tokens, ["Fake ", "Summary"])
+        self.assertTrue(mock_client.chat.completions.create.call_args[1]['stream'])
+
+
+class TestReadAndSummary(unittest.TestCase):
+    article = {
+        "title": "Dummy article content",
+        "products": ["Azure"],
+        "description": "<p>Some description with <a href='https://example.com'>link</a></p>",
+        "created": "2024-11-01T10:00:00.0000000Z",
+        "modified": "2024-11-02T10:00:00.0000000Z"
+    }
+
+    @patch('azureupdatehelper.summarize_article')
+    @patch('azureupdatehelper.get_article')
+    def test_read_and_summary_downloads_and_decodes_once(self, mock_get_article, mock_summarize_article):
+        mock_response = MagicMock()
+        mock_response.json.return_value = self.article
+        mock_get_article.return_value = mock_response
+        mock_summarize_article.return_value = ("Fake Summary", "https://example.com")
+
+        result = azureupdatehelper.read_and_summary(MagicMock(), "Fake Deployment", "https://fake.url/path?id=12345")
+
+        mock_get_article.assert_called_once()
+        mock_response.json.assert_called_once()
+        self.assertEqual(result['docId'], "12345")
+        self.assertEqual(result['summary'], "Fake Summary")
+        self.assertEqual(result['article'], self.article)
+
+    @patch('azureupdatehelper.get_article')
+    def test_read_and_summary_article_not_found(self, mock_get_article):
+        mock_get_article.return_value = None
+        self.assertIsNone(azureupdatehelper.read_and_summary(MagicMock(), "Fake Deployment", "https://fake.url/path?id=1"))
+
+    @patch('azureupdatehelper.summarize_article')
+    @patch('azureupdatehelper.get_article')
+    def test_read_and_summary_streams_without_table_prompt(self, mock_get_article, mock_summarize_article):
+        mock_get_article.return_value.json.return_value = self.article
+        mock_summarize_article.return_value = ("Fake Summary", "https://example.com")
+        on_token = MagicMock()
+
+        result = azureupdatehelper.read_and_summary(
+            MagicMock(), "Fake Deployment", "https://fake.url/path?id=12345", on_token=on_token
+        )
+
+        self.assertEqual(mock_summarize_article.call_args[1], {"stream": True, "on_token": on_token})
+        self.assertEqual(result['summary'], "Fake Summary")
+
+    @patch('azureupdatehelper.summarize_article')
+    @patch('azureupdatehelper.get_article')
+    def test_read_and_summary_summary_failure(self, mock_get_article, mock_summarize_article):
+        mock_get_article.return_value.json.return_value = self.article
+        mock_summarize_article.return_value = None
+        url = "https://fake.url/path?id=12345"
+
+        self.assertIsNone(azureupdatehelper.read_and_summary(MagicMock(), "Fake Deployment", url))
+
+        result = azureupdatehelper.read_and_summary(MagicMock(), "Fake Deployment", url, degrade_on_failure=True)
+        self.assertTrue(result['degraded'])
+        self.assertEqual(result['summary'], "Some description with link")
+        self.assertEqual(result['referenceLink'], "https://example.com")
+
+
+class TestBuildSummaryContent(unittest.TestCase):
+    @patch('azureupdatehelper.PROMPT_MAX_LINKS', 2)
+    @patch('azureupdatehelper.PROMPT_TOKEN_BUDGET', 200)
+    def test_long_description_is_compacted(self):
+        links = "".join(f"<a href='https://aka.ms/link{i}'>link {i}</a> " for i in range(5))
+        article = {
+            "title": "Retirement notice",
+            "products": ["Azure"],
+            "description": "<p>" + "This feature will be retired. " * 100 + "</p>" + links,
+        }
+
+        content, link = azureupdatehelper.build_summary_content(article)
+
+        self.assertLessEqual(azureupdatehelper.estimate_tokens(content), 200)
+        self.assertIn("retired....\n", content)
+        self.assertTrue(content.endswith("Links in description: https://aka.ms/link0, https://aka.ms/link1"))
+        # The result keeps every link of the description
+        self.assertEqual(link.count("https://aka.ms/"), 5)
+
+
+class TestExtractiveSummary(unittest.TestCase):
+    def test_extractive_summary_keeps_leading_sentences(self):
+        text = "First sentence.  Second one!\nThird? Fourth."
+        self.assertEqual(azureupdatehelper.extractive_summary(text), "First sentence. Second one! Third?")
+
+    def test_extractive_summary_japanese(self):
+        text = "一文目です。二文目です。三文目です。四文目です。"
+        self.assertEqual(azureupdatehelper.extractive_summary(text, max_sentences=2), "一文目です。二文目です。")
+
+    def test_extractive_summary_truncates_long_text(self):
+        summary = azureupdatehelper.extractive_summary("x" * 500, max_chars=100)
+        self.assertEqual(summary, "x" * 100 + "...")
+
+    def test_extractive_summary_empty(self):
+        self.assertEqual(azureupdatehelper.extractive_summary(None), "")
+
+
+class TestCombinedSummary(unittest.TestCase):
+    article = {
+        "title": "Dummy article content",
+        "products": ["Azure"],
+        "description": "<p>Some description with <a href='https://example.com'>link</a></p>",
+        "created": "2024-11-01T10:00:00.0000000Z",
+        "modified": "2024-11-02T10:00:00.0000000Z"
+    }
+
+    def mock_client(self, *contents):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [
+            MagicMock(choices=[MagicMock(message=MagicMock(content=content))]) for content in contents
+        ]
+        return client
+
+    def test_parse_combined_summary_valid(self):
+        parsed = azureupdatehelper.parse_combined_summary('{"summary": " Long ", "table_summary": "Short"}')
+        self.assertEqual(parsed, ("Long", "Short"))
+
+    def test_parse_combined_summary_invalid(self):
+        self.assertIsNone(azureupdatehelper.parse_combined_summary("not json"))
+        self.assertIsNone(azureupdatehelper.parse_combined_summary('["summary"]'))
+        self.assertIsNone(azureupdatehelper.parse_combined_summary('{"summary": "Long"}'))
+        self.assertIsNone(azureupdatehelper.parse_combined_summary('{"summary": "Long", "table_summary": ""}'))
+        self.assertIsNone(azureupdatehelper.parse_combined_summary(None))
+
+    def test_summarize_article_combined(self):
+        client = self.mock_client('{"summary": "Long", "table_summary": "Short"}')
+        result = azureupdatehelper.summarize_article_combined(client, "Fake Deployment", self.article, "Slide", "Table")
+
+        self.assertEqual(result, ("Long", "Short", "https://example.com"))
+        call_args = client.chat.completions.create.call_args[1]
+        self.assertEqual(call_args['response_format'], {"type": "json_object"})
+        self.assertIn("Slide", call_args['messages'][0]['content'])
+        self.assertIn("Table", call_args['messages'][0]['content'])
+        self.assertIn("JSON", call_args['messages'][0]['content'])
+
+    @patch('azureupdatehelper.get_article')
+    def test_read_and_summary_combined_uses_one_call(self, mock_get_article):
+        mock_get_article.return_value = MagicMock(json=MagicMock(return_value=self.article))
+        client = self.mock_client('{"summary": "Long", "table_summary": "Short"}')
+
+        result = azureupdatehelper.read_and_summary(
+            client, "Fake Deployment", "https://fake.url/path?id=12345", "Slide", "Table")
+
+        self.assertEqual(client.chat.completions.create.call_count, 1)
+        self.assertEqual(result['summary'], "Long")
+        self.assertEqual(result['tableSummary'], "Short")
+        self.assertEqual(result['referenceLink'], "https://example.com")
+
+    @patch('azureupdatehelper.get_article')
+    def test_read_and_summary_streams_combined_call(self, mock_get_article):
+        mock_get_article.return_value = MagicMock(json=MagicMock(return_value=self.article))
+        answer = json.dumps({"summary": "Long \"summary\"\nLine 2", "table_summary": "Short"})
+        client = MagicMock()
+        client.chat.completions.create.return_value = iter(
+            [MagicMock(choices=[MagicMock(delta=MagicMock(content=answer[i:i + 5]))]) for i in range(0, len(answer), 5)]
+        )
+        tokens = []
+
+        result = azureupdatehelper.read_and_summary(
+            client, "Fake Deployment", "https://fake.url/path?id=12345", "Slide", "Table", on_token=tokens.append)
+
+        # One call for both summaries; only the slide summary is shown while it is generated
+        self.assertEqual(client.chat.completions.create.call_count, 1)
+        self.assertTrue(client.chat.completions.create.call_args[1]['stream'])
+        self.assertEqual("".join(tokens), 'Long "summary"\nLine 2')
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual(result['summary'], 'Long "summary"\nLine 2')
+        self.assertEqual(result['tableSummary'], "Short")
+
+    def test_partial_json_string(self):
+        text = '{"table_summary": "Short", "summary": "Caf\\u00e9 \\"A\\'
+        self.assertEqual(azureupdatehelper.partial_json_string(text, "summary"), 'Café "A')
+        self.assertEqual(azureupdatehelper.partial_json_string(text + '"', "summary"), 'Café "A"')
+        self.assertEqual(azureupdatehelper.partial_json_string('{"summary": "\\ud83d\\ude0', "summary"), '')
+        self.assertIsNone(azureupdatehelper.partial_json_string('{"summa', "summary"))
+
+    @patch('azureupdatehelper.get_article')
+    def test_read_and_summary_combined_falls_back_to_two_calls(self, mock_get_article):
+        mock_get_article.return_value = MagicMock(json=MagicMock(return_value=self.article))
+        client = self.mock_client("not json", "Long", "Short")
+
+        result = azureupdatehelper.read_and_summary(
+            client, "Fake Deployment", "https://fake.url/path?id=12345", "Slide", "Table")
+
+        self.assertEqual(client.chat.completions.create.call_count, 3)
+        self.assertEqual(result['summary'], "Long")
+        self.assertEqual(result['tableSummary'], "Short")
+
+    @patch('parsed_article.extract_text_and_links', wraps=parsed_article.extract_text_and_links)
+    @patch('azureupdatehelper.get_article')
+    def test_read_and_summary_parses_description_once(self, mock_get_article, mock_extract):
+        mock_get_article.return_value = MagicMock(json=MagicMock(return_value=self.article))
+        client = self.mock_client("not json", "Long", "Short")
+
+        result = azureupdatehelper.read_and_summary(
+            client, "Fake Deployment", "https://fake.url/path?id=12345", "Slide", "Table")
+
+        # Combined call, slide summary, table summary and result share one parse of the description
+        mock_extract.assert_called_once_with(self.article['description'])
+        self.assertEqual(result['description'], "Some description with link")
+        self.assertEqual(result['referenceLink'], "https://example.com")
+
+    @patch('azureupdatehelper.get_article')
+    def test_read_and_summary_without_table_prompt(self, mock_get_article):
+        mock_get_article.return_value = MagicMock(json=MagicMock(return_value=self.article))
+        client = self.mock_client("Long")
+
+        result = azureupdatehelper.read_and_summary(client, "Fake Deployment", "https://fake.url/path?id=12345", "Slide")
+
+        self.assertEqual(client.chat.completions.create.call_count, 1)
+        self.assertNotIn('response_format', client.chat.completions.create.call_args[1])
+        self.assertIsNone(result['tableSummary'])
+
+
+class TestMapReduceSummary(unittest.TestCase):
+    article = {
+        "title": "Change log",
+        "products": ["Azure"],
+        "description": "".join(f"<p>Change {i}: a long entry of the change log of this update.</p>" for i in range(40)),
+    }
+
+    def setUp(self):
+        azureupdatehelper._chunk_cache.clear()
+        patchers = [
+            patch('azureupdatehelper.MAP_REDUCE_THRESHOLD', 200),
+            patch('azureupdatehelper.MAP_REDUCE_CHUNK_TOKENS', 150),
+            patch('azureupdatehelper.get_summary_cache', return_value=None),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def mock_client(self, fail_chunks=False):
+        def create(model, messages, **kwargs):
+            if messages[0]['content'] == azureupdatehelper.chunk_systemprompt:
+                if fail_chunks:
+                    raise ValueError("chunk failed")
+                part = messages[1]['content'].splitlines()[1]
+                return MagicMock(choices=[MagicMock(message=MagicMock(content=f"Notes of {part}"))])
+            return MagicMock(choices=[MagicMock(message=MagicMock(content="Final summary"))])
+        client = MagicMock()
+        client.chat.completions.create.side_effect = create
+        return client
+
+    def reduce_messages(self, client):
+        return [call[1]['messages'] for call in client.chat.completions.create.call_args_list
+                if call[1]['messages'][0]['content'] != azureupdatehelper.chunk_systemprompt]
+
+    def test_short_description_uses_one_call(self):
+        client = self.mock_client()
+        article = dict(self.article, description="<p>Short.</p>")
+        self.assertEqual(azureupdatehelper.summarize_article(client, "Fake Deployment", article, "Slide")[0],
+                         "Final summary")
+        self.assertEqual(client.chat.completions.create.call_count, 1)
+
+    def test_long_description_is_condensed_in_chunks(self):
+        chunks = azureupdatehelper.long_description_chunks(self.article)
+        self.assertGreater(len(chunks), 2)
+        client = self.mock_client()
+
+        summary, _ = azureupdatehelper.summarize_article(client, "Fake Deployment", self.article, "Slide")
+
+        self.assertEqual(summary, "Final summary")
+        self.assertEqual(client.chat.completions.create.call_count, len(chunks) + 1)
+        reduce_content = self.reduce_messages(client)[0][1]['content']
+        self.assertIn(f"Notes of Part {len(chunks)} of {len(chunks)}:", reduce_content)
+        self.assertNotIn("Change 39", reduce_content)
+
+    def test_chunk_summaries_are_cached(self):
+        client = self.mock_client()
+        azureupdatehelper.summarize_article(client, "Fake Deployment", self.article, "Slide")
+        calls = client.chat.completions.create.call_count
+
+        azureupdatehelper.summarize_article_for_table(client, "Fake Deployment", self.article, "Table")
+
+        self.assertEqual(client.chat.completions.create.call_count, calls + 1)
+
+    def test_chunk_failure_falls_back_to_truncated_description(self):
+        client = self.mock_client(fail_chunks=True)
+
+        summary, _ = azureupdatehelper.summarize_article(client, "Fake Deployment", self.article, "Slide")
+
+        self.assertEqual(summary, "Final summary")
+        self.assertEqual(self.reduce_messages(client)[0][1]['content'],
+                         azureupdatehelper.build_summary_content(self.article)[0])
+
+    @patch('azureupdatehelper.MAP_REDUCE_CONCURRENCY', 2)
+    def test_long_articles_do_not_queue_behind_each_other(self):
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+        client = self.mock_client()
+        create = client.chat.completions.create.side_effect
+
+        def slow_create(model, messages, **kwargs):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.05)
+            with lock:
+                state['running'] -= 1
+            return create(model, messages, **kwargs)
+        client.chat.completions.create.side_effect = slow_create
+        articles = [dict(self.article, title=f"Change log {i}", description=self.article['description'].replace(
+            "Change", f"Change of article {i}")) for i in range(2)]
+
+        threads = [threading.Thread(target=azureupdatehelper.summarize_article,
+                                    args=(client, "Fake Deployment", article, "Slide")) for article in articles]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(state['peak'], 4)
+
+    def test_map_step_gives_up_at_the_deadline(self):
+        release = threading.Event()
+        client = self.mock_client()
+        create = client.chat.completions.create.side_effect
+
+        def hanging_chunks(model, messages, **kwargs):
+            if messages[0]['content'] == azureupdatehelper.chunk_systemprompt:
+                release.wait(5)
+            return create(model, messages, **kwargs)
+        client.chat.completions.create.side_effect = hanging_chunks
+
+        started = time.monotonic()
+        try:
+            with azureupdatehelper.generation_deadline(time.monotonic() + 0.1):
+                summary, _ = azureupdatehelper.summarize_article(client, "Fake Deployment", self.article, "Slide")
+        finally:
+            release.set()
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(summary, "Final summary")
+        self.assertEqual(self.reduce_messages(client)[0][1]['content'],
+                         azureupdatehelper.build_summary_content(self.article)[0])
+        self.assertIsNone(azureupdatehelper.remaining_time())
+
+    def test_async_long_description_is_condensed_in_chunks(self):
+        chunks = azureupdatehelper.long_description_chunks(self.article)
+        client = MagicMock()
+        sync_client = self.mock_client()
+
+        async def create(**kwargs):
+            return sync_client.chat.completions.create(**kwargs)
+        client.chat.completions.create = AsyncMock(side_effect=create)
+
+        summary, _ = asyncio.run(azureupdatehelper.asummarize_article(client, "Fake Deployment", self.article, "Slide"))
+
+        self.assertEqual(summary, "Final summary")
+        self.assertEqual(client.chat.completions.create.call_count, len(chunks) + 1)
+
+
+class TestSummaryCacheIntegration(unittest.TestCase):
+    article = {
+        "id": "12345",
+        "title": "Dummy article content",
+        "products": ["Azure"],
+        "description": "<p>Some description</p>",
+        "created": "2024-11-01T10:00:00.0000000Z",
+        "modified": "2024-11-02T10:00:00.0000000Z"
+    }
+
+    def setUp(self):
+        self.cache = SummaryCache(":memory:")
+        patcher = patch('azureupdatehelper.get_summary_cache', return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def mock_client(self, *contents):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [
+            MagicMock(choices=[MagicMock(message=MagicMock(content=content))]) for content in contents
+        ]
+        return client
+
+    def test_summarize_article_uses_cache(self):
+        client = self.mock_client("Fake Summary")
+        first = azureupdatehelper.summarize_article(client, "gpt-4o", self.article, "Prompt")
+        second = azureupdatehelper.summarize_article(client, "gpt-4o", self.article, "Prompt")
+
+        self.assertEqual(first, second)
+        self.assertEqual(client.chat.completions.create.call_count, 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_summary_cache_key_depends_on_version_prompt_and_deployment(self):
+        client = self.mock_client("Summary 1", "Summary 2", "Summary 3", "Summary 4")
+        modified = dict(self.article, modified="2024-11-03T10:00:00.0000000Z")
+        azureupdatehelper.summarize_article(client, "gpt-4o", self.article, "Prompt")
+        azureupdatehelper.summarize_article(client, "gpt-4o", modified, "Prompt")
+        azureupdatehelper.summarize_article(client, "gpt-4o", self.article, "Other language prompt")
+        azureupdatehelper.summarize_article(client, "gpt-4o-mini", self.article, "Prompt")
+
+        self.assertEqual(client.chat.completions.create.call_count, 4)
+
+    def test_combined_summary_populates_both_kinds(self):
+        client = self.mock_client('{"summary": "Long", "table_summary": "Short"}')
+        azureupdatehelper.summarize_article_combined(client, "gpt-4o", self.article, "Slide", "Table")
+
+        self.assertEqual(azureupdatehelper.summarize_article(client, "gpt-4o", self.article, "Slide")[0], "Long")
+        self.assertEqual(azureupdatehelper.summarize_article_for_table(client, "gpt-4o", self.article, "Table"), "Short")
+        self.assertEqual(client.chat.completions.create.call_count, 1)
+
+    def test_failed_summary_is_not_cached(self):
+        client = self.mock_client('{"summary": "Long"}')
+        self.assertIsNone(azureupdatehelper.summarize_article_combined(client, "gpt-4o", self.article, "Slide", "Table"))
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
 
 class TestTargetUrl(unittest.TestCase):
     def test_target_url_valid_id(self):
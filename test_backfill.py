@@ -0,0 +1,150 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import azureupdatehelper
+from backfill import Backfill, backfill_windows
+from update_store import UpdateStore
+
+
+def api_article(docid, created):
+    return {
+        "id": docid,
+        "title": f"Title {docid}",
+        "products": ["Azure Functions"],
+        "description": f"<p>Description of {docid}</p>",
+        "created": created.strftime("%Y-%m-%dT%H:%M:%S.0000000Z"),
+        "modified": created.strftime("%Y-%m-%dT%H:%M:%S.0000000Z"),
+    }
+
+
+class FakeArticleApi:
+    """Pages of the article listing filtered by creation date, like the Azure Updates API"""
+
+    def __init__(self, articles, fail_before=None, extra_count=0):
+        self.articles = articles
+        self.fail_before = fail_before
+        # Added to the count, like an article created in the window while it is listed
+        self.extra_count = extra_count
+        self.calls = []
+
+    def get_article_page(self, start_date, end_date=None, skip=0, top=100, count=False, by_created=False):
+        self.calls.append((start_date, skip))
+        if self.fail_before is not None and start_date < self.fail_before:
+            return None
+        matching = [
+            article for article in self.articles
+            if start_date.strftime("%Y-%m-%dT%H:%M:%S") <= article["created"][:19] < end_date.strftime("%Y-%m-%dT%H:%M:%S")
+        ]
+        page = {"value": matching[skip:skip + top]}
+        if count:
+            page["@odata.count"] = len(matching) + self.extra_count
+        return page
+
+
+class TestBackfillWindows(unittest.TestCase):
+    """Tests for backfill_windows"""
+
+    def test_windows_cover_the_range_newest_first(self):
+        start = datetime(2024, 1, 15, tzinfo=timezone.utc)
+        end = datetime(2024, 4, 1, tzinfo=timezone.utc)
+
+        windows = backfill_windows(start, end, 30)
+
+        self.assertLessEqual(windows[-1][0], start)
+        self.assertGreaterEqual(windows[0][1], end)
+        for (newer_start, _), (_, older_end) in zip(windows, windows[1:]):
+            self.assertEqual(newer_start, older_end)
+
+    def test_windows_do_not_depend_on_the_exact_start(self):
+        end = datetime(2024, 4, 1, tzinfo=timezone.utc)
+        self.assertEqual(backfill_windows(datetime(2024, 1, 15, 9, tzinfo=timezone.utc), end, 30),
+                         backfill_windows(datetime(2024, 1, 16, tzinfo=timezone.utc), end, 30))
+
+
+class TestBackfill(unittest.TestCase):
+    """Tests for Backfill"""
+
+    def setUp(self):
+        self.store = UpdateStore(":memory:")
+        self.addCleanup(self.store.close)
+        base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.articles = [api_article(str(day), base + timedelta(days=day)) for day in range(0, 120, 3)]
+        self.start = base
+        self.end = base + timedelta(days=120)
+
+    def test_article_listing_url_by_created(self):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        url = azureupdatehelper.article_listing_url(start, start + timedelta(days=30), by_created=True)
+        query = parse_qs(urlparse(url).query)
+        self.assertEqual(query["$filter"], ["created ge 2024-01-01T00:00:00Z and created lt 2024-01-31T00:00:00Z"])
+        # Paged with $skip in an order that modifications don't change
+        self.assertEqual(query["$orderby"], ["created asc,id asc"])
+
+    def test_run_stores_every_article_with_its_link(self):
+        api = FakeArticleApi(self.articles)
+        with patch('azureupdatehelper.get_article_page', side_effect=api.get_article_page):
+            result = Backfill(self.store, window_days=30, max_workers=3, requests_per_minute=0,
+                              page_size=4).run(self.start, self.end)
+
+        self.assertEqual(result["failed"], 0)
+        self.assertEqual(result["articles"], len(self.articles))
+        self.assertEqual(self.store.stats()["articles"], len(self.articles))
+        self.assertEqual(self.store.get_article("3")["title"], "Title 3")
+        self.assertIn("https://azure.microsoft.com/updates?id=3", self.store.urls_between(self.start, self.end))
+
+    def test_run_resumes_after_a_failure(self):
+        failing = FakeArticleApi(self.articles, fail_before=self.start + timedelta(days=60))
+        with patch('azureupdatehelper.get_article_page', side_effect=failing.get_article_page):
+            first = Backfill(self.store, window_days=30, max_workers=2, requests_per_minute=0,
+                             page_size=4).run(self.start, self.end)
+        self.assertGreater(first["failed"], 0)
+        self.assertGreater(first["backfilled"], 0)
+
+        api = FakeArticleApi(self.articles)
+        with patch('azureupdatehelper.get_article_page', side_effect=api.get_article_page):
+            second = Backfill(self.store, window_days=30, max_workers=2, requests_per_minute=0,
+                              page_size=4).run(self.start, self.end)
+
+        self.assertEqual(second["failed"], 0)
+        self.assertEqual(second["skipped"], first["backfilled"])
+        # Only the windows that failed are listed again
+        self.assertTrue(all(start < self.start + timedelta(days=60) for start, _ in api.calls))
+        self.assertEqual(self.store.stats()["articles"], len(self.articles))
+
+    def test_incomplete_window_is_not_recorded(self):
+        api = FakeArticleApi(self.articles, extra_count=1)
+        with patch('azureupdatehelper.get_article_page', side_effect=api.get_article_page):
+            backfill = Backfill(self.store, window_days=30, max_workers=2, requests_per_minute=0, page_size=4)
+            first = backfill.run(self.start, self.end)
+            second = backfill.run(self.start, self.end)
+
+        self.assertEqual(first["backfilled"], 0)
+        self.assertEqual(first["failed"], second["failed"])
+        self.assertEqual(second["skipped"], 0)
+        self.assertEqual(self.store.stats()["articles"], len(self.articles))
+
+    def test_current_window_is_not_recorded(self):
+        now = datetime.now(timezone.utc)
+        api = FakeArticleApi([api_article("today", now - timedelta(minutes=1))])
+        with patch('azureupdatehelper.get_article_page', side_effect=api.get_article_page):
+            backfill = Backfill(self.store, window_days=30, max_workers=1, requests_per_minute=0)
+            backfill.run(now - timedelta(days=1), now)
+            result = backfill.run(now - timedelta(days=1), now)
+
+        self.assertEqual(result["skipped"], 0)
+        self.assertIsNotNone(self.store.get_article("today"))
+
+    @patch('azureupdatehelper.get_update_store')
+    def test_available_days_reaches_the_oldest_stored_update(self, mock_get_update_store):
+        mock_get_update_store.return_value = None
+        self.assertEqual(azureupdatehelper.available_days(), 90)
+
+        mock_get_update_store.return_value = self.store
+        self.store.upsert_article(api_article("old", datetime.now(timezone.utc) - timedelta(days=400)))
+        self.assertGreaterEqual(azureupdatehelper.available_days(), 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
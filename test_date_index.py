@@ -0,0 +1,74 @@
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import azureupdatehelper
+from date_index import FeedDateIndex
+
+DATE_FORMAT = '%a, %d %b %Y %H:%M:%S %z'
+
+
+def entry(published, link=None):
+    return MagicMock(published=published, link=link or published, title=link or published)
+
+
+class TestFeedDateIndex(unittest.TestCase):
+    """Tests for FeedDateIndex"""
+
+    def setUp(self):
+        # Newest first, as in the Azure Updates RSS feed, with one unparsable date
+        self.entries = [
+            entry('Sat, 02 Nov 2024 05:15:20 Z', 'c'),
+            entry('Fri, 01 Nov 2024 10:30:00 Z', 'b'),
+            entry('not a date', 'broken'),
+            entry('Thu, 31 Oct 2024 21:45:07 Z', 'a'),
+        ]
+        self.index = FeedDateIndex(self.entries, DATE_FORMAT)
+
+    def test_unparsable_entries_are_skipped(self):
+        self.assertEqual(len(self.index), 3)
+        self.assertIsNone(self.index.published_at(2))
+
+    def test_between_start_only_keeps_feed_order(self):
+        start = datetime(2024, 11, 1, tzinfo=timezone.utc)
+        self.assertEqual([e.link for e in self.index.between(start)], ['c', 'b'])
+
+    def test_between_start_and_end(self):
+        start = datetime(2024, 10, 31, tzinfo=timezone.utc)
+        end = datetime(2024, 11, 1, 23, 59, tzinfo=timezone.utc)
+        self.assertEqual([e.link for e in self.index.between(start, end)], ['b', 'a'])
+
+    def test_between_bounds_inclusion(self):
+        exact = datetime(2024, 11, 1, 10, 30, tzinfo=timezone.utc)
+        self.assertEqual([e.link for e in self.index.between(exact)], ['c', 'b'])
+        self.assertEqual([e.link for e in self.index.between(exact, include_start=False)], ['c'])
+        self.assertEqual([e.link for e in self.index.between(end=exact)], ['b', 'a'])
+        self.assertEqual([e.link for e in self.index.between(end=exact, include_end=False)], ['a'])
+
+    def test_between_empty_range(self):
+        start = datetime(2024, 12, 1, tzinfo=timezone.utc)
+        self.assertEqual(self.index.between(start), [])
+        self.assertEqual(FeedDateIndex([], DATE_FORMAT).between(start), [])
+
+
+class TestFeedDateIndexCache(unittest.TestCase):
+    """Tests for azureupdatehelper.feed_date_index"""
+
+    @patch('azureupdatehelper._date_index', None)
+    def test_index_is_reused_until_feed_changes(self):
+        entries = [entry('Sat, 02 Nov 2024 05:15:20 Z')]
+        index = azureupdatehelper.feed_date_index(entries)
+        self.assertIs(azureupdatehelper.feed_date_index(entries), index)
+        self.assertIsNot(azureupdatehelper.feed_date_index(list(entries)), index)
+
+    @patch('azureupdatehelper._date_index', None)
+    def test_target_update_urls_with_end_date(self):
+        entries = [entry('Sat, 02 Nov 2024 05:15:20 Z', 'c'), entry('Thu, 31 Oct 2024 21:45:07 Z', 'a')]
+        urls = azureupdatehelper.target_update_urls(
+            entries, datetime(2024, 10, 1, tzinfo=timezone.utc), datetime(2024, 11, 1, tzinfo=timezone.utc)
+        )
+        self.assertEqual(urls, ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+
+import azureupdatehelper
+from feed_cache import StaleWhileRevalidateCache
+
+
+class TestStaleWhileRevalidateCache(unittest.TestCase):
+    """Tests for StaleWhileRevalidateCache"""
+
+    def test_fresh_value_is_reused(self):
+        """Test that the loader runs once while the value is fresh"""
+        loader = MagicMock(return_value=['entry'])
+        cache = StaleWhileRevalidateCache(loader, ttl_seconds=60)
+
+        self.assertEqual(cache.get(), ['entry'])
+        self.assertEqual(cache.get(), ['entry'])
+        loader.assert_called_once()
+
+    @patch('feed_cache.time.monotonic')
+    def test_stale_value_is_returned_while_refreshing(self, mock_monotonic):
+        """Test that a stale value is served and refreshed in the background"""
+        mock_monotonic.return_value = 0.0
+        refreshed = threading.Event()
+        values = iter(['old', 'new'])
+
+        def loader():
+            value = next(values)
+            if value == 'new':
+                refreshed.set()
+            return value
+        cache = StaleWhileRevalidateCache(loader, ttl_seconds=10, stale_seconds=100)
+        self.assertEqual(cache.get(), 'old')
+
+        mock_monotonic.return_value = 50.0
+        self.assertEqual(cache.get(), 'old')
+        self.assertTrue(refreshed.wait(1))
+        for _ in range(100):
+            if cache.loads == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(cache.get(), 'new')
+
+    @patch('feed_cache.time.monotonic')
+    def test_expired_value_is_loaded_synchronously(self, mock_monotonic):
+        """Test that a value older than ttl + stale is reloaded before returning"""
+        mock_monotonic.return_value = 0.0
+        values = iter(['old', 'new'])
+        cache = StaleWhileRevalidateCache(lambda: next(values), ttl_seconds=10, stale_seconds=10)
+        cache.get()
+
+        mock_monotonic.return_value = 100.0
+        self.assertEqual(cache.get(), 'new')
+
+    def test_concurrent_misses_load_once(self):
+        """Test that concurrent callers share a single load"""
+        calls = []
+        started = threading.Event()
+
+        def loader():
+            calls.append(1)
+            started.set()
+            time.sleep(0.05)
+            return 'value'
+        cache = StaleWhileRevalidateCache(loader, ttl_seconds=60)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(5)]
+        threads[0].start()
+        started.wait(1)
+        for thread in threads[1:]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 5)
+
+    @patch('feed_cache.time.monotonic')
+    def test_failed_refresh_keeps_previous_value(self, mock_monotonic):
+        """Test that a failing loader does not replace the cached value"""
+        mock_monotonic.return_value = 0.0
+        loader = MagicMock(side_effect=['value', Exception('network error')])
+        cache = StaleWhileRevalidateCache(loader, ttl_seconds=10)
+        cache.get()
+
+        mock_monotonic.return_value = 100.0
+        self.assertEqual(cache.get(), 'value')
+
+    def test_failed_first_load_returns_none(self):
+        """Test that a failing first load returns None and is retried later"""
+        loader = MagicMock(side_effect=[Exception('network error'), 'value'])
+        cache = StaleWhileRevalidateCache(loader, ttl_seconds=10)
+
+        self.assertIsNone(cache.get())
+        self.assertEqual(cache.get(), 'value')
+
+    def test_invalidate(self):
+        """Test that invalidate forces a reload"""
+        loader = MagicMock(side_effect=['old', 'new'])
+        cache = StaleWhileRevalidateCache(loader, ttl_seconds=60)
+        cache.get()
+        cache.invalidate()
+        self.assertEqual(cache.get(), 'new')
+
+
+class TestGetCachedRssFeedEntries(unittest.TestCase):
+    """Tests for azureupdatehelper.get_cached_rss_feed_entries"""
+
+    def setUp(self):
+        azureupdatehelper._feed_cache.invalidate()
+        self.addCleanup(azureupdatehelper._feed_cache.invalidate)
+
+    @patch('azureupdatehelper.download_feed', return_value=MagicMock(status_code=200, headers={}))
+    @patch('azureupdatehelper.feedparser.parse')
+    def test_feed_is_parsed_once(self, mock_parse, mock_download_feed):
+        mock_parse.return_value = MagicMock(entries=[{'id': '1'}])
+
+        self.assertEqual(azureupdatehelper.get_cached_rss_feed_entries(), [{'id': '1'}])
+        self.assertEqual(azureupdatehelper.get_cached_rss_feed_entries(), [{'id': '1'}])
+        mock_parse.assert_called_once()
+
+    @patch('azureupdatehelper.download_feed', return_value=MagicMock(status_code=200, headers={}))
+    @patch('azureupdatehelper.feedparser.parse')
+    def test_empty_feed_is_not_cached(self, mock_parse, mock_download_feed):
+        mock_parse.side_effect = [MagicMock(entries=[]), MagicMock(entries=[{'id': '1'}])]
+
+        self.assertEqual(azureupdatehelper.get_cached_rss_feed_entries(), [])
+        self.assertEqual(azureupdatehelper.get_cached_rss_feed_entries(), [{'id': '1'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import random
+import unittest
+
+from bs4 import BeautifulSoup
+
+from html_extractor import HTMLTextExtractor, extract_text_and_links
+
+# Azure Updates style descriptions and markup edge cases
+CASES = [
+    "",
+    "Plain text without markup",
+    "<p>Azure Kubernetes Service (AKS) now supports <a href=\"https://learn.microsoft.com/azure/aks/\">"
+    "node auto-provisioning</a> in public preview.&nbsp;</p>\n<ul>\n<li>Region: East US &amp; West US</li>\n"
+    "<li>See the <a href=\"https://aka.ms/aks\">docs</a> and <a href=\"https://learn.microsoft.com/azure/aks/\">"
+    "this page</a></li>\n</ul>",
+    "<p>日本語の説明です。<a href='https://example.com/ja'>詳細</a>をご覧ください。</p>",
+    "<div>\n  <p>  spaced  </p>\n\n  <p>\tTabbed</p>\r\n</div>",
+    "<pre>\n  keep   </pre><textarea>  \n </textarea>",
+    "a<script>var x = '<a href=\"no\">';</script>b<style>p { color: red }</style>c",
+    "<template><p>hidden</p><a href='https://in.template'>t</a></template>shown",
+    "<ruby>漢<rp>(</rp><rt>kan</rt><rp>)</rp></ruby>",
+    "a<!-- comment -->b<![CDATA[cdata]]>c<?pi data?>d<!DOCTYPE html>e",
+    "&foo; &amp; &copy &notit; &#147; &#x41; &#X42; &#129; &#0; &#1114112;",
+    "<a href>empty</a><a href=''>quoted</a><a href=1 href=2>dup</a><A HREF='&amp;q'>upper</A><a>none</a>",
+    "a<br>\n</br>b<br/>c<hr/>d<img src='x.png'>e",
+    "<b><i>unclosed</b> tail</i> more",
+    "x < y and y > z & w",
+    "<p>Unterminated <a href=\"https://example.com",
+]
+
+
+def beautifulsoup_text_and_links(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    return soup.get_text(), list(dict.fromkeys([a['href'] for a in soup.find_all('a', href=True)]))
+
+
+class TestHTMLTextExtractor(unittest.TestCase):
+    """Tests for HTMLTextExtractor"""
+
+    def test_matches_beautifulsoup(self):
+        for html in CASES:
+            with self.subTest(html=html):
+                self.assertEqual(extract_text_and_links(html), beautifulsoup_text_and_links(html))
+
+    def test_matches_beautifulsoup_on_random_markup(self):
+        pieces = [
+            '<p>', '</p>', '<a href="x">', "<a href='y&amp;z'>", '<a href>', '</a>', '<br>', '</br>', '<br/>',
+            '<script>', '</script>', '<template>', '</template>', '<rt>', '</rt>', '<pre>', '</pre>', '<b>', '</b>',
+            ' ', '\n', ' \n\t', 'text', '日本語', '&amp;', '&foo;', '&#147;', '<!--c-->', '<![CDATA[cd]]>',
+            '<!DOCTYPE html>', '<', '&', '</',
+        ]
+        rng = random.Random(0)
+        for _ in range(2000):
+            html = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 20)))
+            self.assertEqual(extract_text_and_links(html), beautifulsoup_text_and_links(html), html)
+
+    def test_text_and_links(self):
+        text, links = extract_text_and_links(CASES[2])
+        self.assertIn("Region: East US & West US", text)
+        self.assertEqual(links, ["https://learn.microsoft.com/azure/aks/", "https://aka.ms/aks"])
+
+    def test_none(self):
+        self.assertEqual(extract_text_and_links(None), ("", []))
+
+    def test_extract(self):
+        extractor = HTMLTextExtractor()
+        self.assertEqual(extractor.extract("<a href='x'>y</a>"), ("y", ["x"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
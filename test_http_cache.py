@@ -0,0 +1,143 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import azureupdatehelper
+from http_cache import ValidatorCache
+
+
+RSS_BODY = """<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0"><channel><title>Azure Updates</title>
+<item><title>Update 1</title><link>https://azure.microsoft.com/updates?id=1</link>
+<pubDate>Thu, 31 Oct 2024 21:45:07 Z</pubDate></item>
+</channel></rss>"""
+
+ARTICLE_BODY = json.dumps({
+    "id": "1",
+    "title": "Update 1",
+    "products": ["Azure"],
+    "description": "<p>Description</p>",
+    "created": "2024-10-31T21:45:07.0000000Z",
+    "modified": "2024-10-31T21:45:07.0000000Z"
+})
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Stand-in for the Azure Updates API that supports conditional requests"""
+    requests_seen = []
+
+    def do_GET(self):
+        if self.path.endswith("/rss"):
+            body, etag, content_type = RSS_BODY, '"rss-v1"', "application/rss+xml"
+        else:
+            body, etag, content_type = ARTICLE_BODY, '"article-v1"', "application/json"
+        last_modified = "Thu, 31 Oct 2024 21:45:07 GMT"
+        not_modified = self.headers.get("If-None-Match") == etag
+        self.requests_seen.append((self.path, self.headers.get("If-None-Match"), not_modified))
+        if not_modified:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestValidatorCache(unittest.TestCase):
+    """Tests for ValidatorCache"""
+
+    def test_request_headers(self):
+        cache = ValidatorCache()
+        self.assertEqual(cache.request_headers("https://example.com"), {})
+        cache.store("https://example.com", '"v1"', "Thu, 31 Oct 2024 21:45:07 GMT", "body")
+        self.assertEqual(cache.request_headers("https://example.com"), {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Thu, 31 Oct 2024 21:45:07 GMT"
+        })
+
+    def test_responses_without_validators_are_not_stored(self):
+        cache = ValidatorCache()
+        cache.store("https://example.com", None, "", "body")
+        self.assertIsNone(cache.get("https://example.com"))
+
+    def test_mark_not_modified_returns_body(self):
+        cache = ValidatorCache()
+        cache.store("https://example.com", '"v1"', None, "body")
+        self.assertEqual(cache.mark_not_modified("https://example.com"), "body")
+        self.assertIsNone(cache.mark_not_modified("https://example.com/other"))
+        self.assertEqual(cache.not_modified, 1)
+
+    def test_serve_stale_is_not_counted_as_not_modified(self):
+        cache = ValidatorCache()
+        cache.store("https://example.com", '"v1"', None, "body")
+        self.assertEqual(cache.serve_stale("https://example.com"), "body")
+        self.assertIsNone(cache.serve_stale("https://example.com/other"))
+        self.assertEqual(cache.stale, 1)
+        self.assertEqual(cache.not_modified, 0)
+
+    def test_least_recently_used_entry_is_dropped(self):
+        cache = ValidatorCache(max_entries=2)
+        cache.store("a", '"a"', None, "A")
+        cache.store("b", '"b"', None, "B")
+        cache.get("a")
+        cache.store("c", '"c"', None, "C")
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+
+
+class TestConditionalRequests(unittest.TestCase):
+    """Tests for conditional GET against a local stand-in HTTP server"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}/api/v2/azure/"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StandInHandler.requests_seen.clear()
+        azureupdatehelper._validator_cache.clear()
+        self.addCleanup(azureupdatehelper._validator_cache.clear)
+        patcher = patch("azureupdatehelper.BASE_URL", self.base_url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_rss_feed_uses_conditional_request(self):
+        first = azureupdatehelper.get_rss_feed_entries()
+        second = azureupdatehelper.get_rss_feed_entries()
+
+        self.assertEqual(len(first), 1)
+        self.assertEqual(second, first)
+        self.assertEqual([seen[2] for seen in StandInHandler.requests_seen], [False, True])
+        self.assertEqual(StandInHandler.requests_seen[1][1], '"rss-v1"')
+
+    def test_article_uses_conditional_request(self):
+        url = "https://azure.microsoft.com/updates?id=1"
+        first = azureupdatehelper.get_article(url)
+        second = azureupdatehelper.get_article(url)
+
+        self.assertEqual(first.json()["title"], "Update 1")
+        self.assertIs(second, first)
+        self.assertEqual([seen[2] for seen in StandInHandler.requests_seen], [False, True])
+        self.assertEqual(azureupdatehelper._validator_cache.not_modified, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
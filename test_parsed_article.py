@@ -0,0 +1,54 @@
+import unittest
+from unittest.mock import patch
+
+import parsed_article
+from parsed_article import ParsedArticle, extract_text_and_links
+
+
+class TestExtractTextAndLinks(unittest.TestCase):
+    """Tests for extract_text_and_links"""
+
+    def test_text_and_unique_links(self):
+        html = ("<p>Read <a href='https://a.example'>A</a>, <a href='https://b.example'>B</a>"
+                " and <a href='https://a.example'>A again</a>.</p><a name='anchor'>no href</a>")
+        text, links = extract_text_and_links(html)
+        self.assertEqual(text, "Read A, B and A again.no href")
+        self.assertEqual(links, ["https://a.example", "https://b.example"])
+
+    def test_empty_html(self):
+        self.assertEqual(extract_text_and_links(""), ("", []))
+        self.assertEqual(extract_text_and_links(None), ("", []))
+
+
+class TestParsedArticle(unittest.TestCase):
+    """Tests for ParsedArticle"""
+
+    article = {
+        "title": "Title",
+        "products": ["Azure"],
+        "description": "<p>Text with <a href='https://example.com'>link</a></p>",
+    }
+
+    def test_behaves_like_the_decoded_json(self):
+        article = ParsedArticle(self.article, docid="12345")
+        self.assertEqual(article, self.article)
+        self.assertEqual(article['title'], "Title")
+        self.assertEqual(article.docid, "12345")
+
+    def test_description_is_parsed_once_on_first_use(self):
+        with patch('parsed_article.extract_text_and_links', wraps=parsed_article.extract_text_and_links) as mock_extract:
+            article = ParsedArticle(self.article)
+            mock_extract.assert_not_called()
+            self.assertEqual(article.text, "Text with link")
+            self.assertEqual(article.links, ["https://example.com"])
+            self.assertEqual(article.text, "Text with link")
+        mock_extract.assert_called_once()
+
+    def test_missing_description(self):
+        article = ParsedArticle({"title": "Title"})
+        self.assertEqual(article.text, "")
+        self.assertEqual(article.links, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
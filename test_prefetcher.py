@@ -0,0 +1,100 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock
+
+from feedparser import FeedParserDict
+
+import prefetcher
+from i18n_helper import SYSTEM_PROMPTS, TABLE_SUMMARY_PROMPTS
+
+
+def feed_entry(link, days_ago=1, updated=None):
+    published = (datetime.now().astimezone() - timedelta(days=days_ago)).strftime('%a, %d %b %Y %H:%M:%S %z')
+    entry = FeedParserDict(link=link, title=link, published=published)
+    if updated is not None:
+        entry['updated'] = updated
+    return entry
+
+
+def summary_result(url, *args):
+    return {'url': url, 'summary': 'summary', 'tableSummary': 'table summary'}
+
+
+class TestParseLanguages(unittest.TestCase):
+    """Tests for parse_languages"""
+
+    def test_parse_languages_ignores_unknown_codes(self):
+        self.assertEqual(prefetcher.parse_languages(' ja, xx,en ,'), ['ja', 'en'])
+
+    def test_parse_languages_empty(self):
+        self.assertEqual(prefetcher.parse_languages(''), [])
+
+
+@patch('prefetcher.azup.read_and_summary')
+@patch('prefetcher.azup.get_cached_rss_feed_entries')
+class TestFeedPrefetcher(unittest.TestCase):
+    """Tests for FeedPrefetcher"""
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.prefetcher = prefetcher.FeedPrefetcher(self.client, 'gpt-4o', ['ja', 'en'], days=7, max_workers=2)
+
+    def test_poll_summarizes_recent_entries_in_every_language(self, mock_entries, mock_read_and_summary):
+        mock_entries.return_value = [feed_entry('https://a'), feed_entry('https://old', days_ago=30)]
+        mock_read_and_summary.side_effect = summary_result
+
+        self.assertEqual(self.prefetcher.poll_once(), 1)
+
+        mock_read_and_summary.assert_any_call(
+            self.client, 'gpt-4o', 'https://a', SYSTEM_PROMPTS['ja'], TABLE_SUMMARY_PROMPTS['ja'])
+        mock_read_and_summary.assert_any_call(
+            self.client, 'gpt-4o', 'https://a', SYSTEM_PROMPTS['en'], TABLE_SUMMARY_PROMPTS['en'])
+        self.assertEqual(mock_read_and_summary.call_count, 2)
+
+    def test_poll_skips_entries_already_summarized(self, mock_entries, mock_read_and_summary):
+        mock_entries.return_value = [feed_entry('https://a', updated='v1')]
+        mock_read_and_summary.side_effect = summary_result
+
+        self.prefetcher.poll_once()
+        mock_read_and_summary.reset_mock()
+        self.assertEqual(self.prefetcher.poll_once(), 0)
+        mock_read_and_summary.assert_not_called()
+
+        # A modified entry is summarized again
+        mock_entries.return_value = [feed_entry('https://a', updated='v2')]
+        self.assertEqual(self.prefetcher.poll_once(), 1)
+
+    def test_failed_entries_are_retried(self, mock_entries, mock_read_and_summary):
+        mock_entries.return_value = [feed_entry('https://a')]
+        mock_read_and_summary.return_value = None
+
+        self.assertEqual(self.prefetcher.poll_once(), 0)
+        self.assertEqual(self.prefetcher.failures, 1)
+
+        mock_read_and_summary.side_effect = summary_result
+        self.assertEqual(self.prefetcher.poll_once(), 1)
+
+
+class TestStartBackgroundPrefetcher(unittest.TestCase):
+    """Tests for start_background_prefetcher"""
+
+    @patch('prefetcher._background_prefetcher', None)
+    @patch('prefetcher._background_prefetcher_started', False)
+    @patch('prefetcher.create_prefetcher')
+    def test_started_once(self, mock_create):
+        instance = mock_create.return_value
+
+        self.assertIs(prefetcher.start_background_prefetcher(), instance)
+        self.assertIs(prefetcher.start_background_prefetcher(), instance)
+
+        mock_create.assert_called_once()
+        instance.start.assert_called_once()
+
+    @patch('prefetcher.azup.get_summary_cache', return_value=None)
+    @patch('prefetcher.azup.environment_check', return_value=True)
+    def test_requires_summary_cache(self, mock_environment_check, mock_get_summary_cache):
+        self.assertIsNone(prefetcher.create_prefetcher())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+from unittest.mock import patch
+
+from feedparser import FeedParserDict
+
+import azureupdatehelper
+from product_index import ProductIndex
+from update_store import UpdateStore
+
+
+def entry(docid, *categories):
+    return FeedParserDict(link=f"https://azure.microsoft.com/updates?id={docid}", title=docid,
+                          published="Sat, 02 Nov 2024 05:15:20 Z",
+                          tags=[FeedParserDict(term=category, scheme=None, label=None) for category in categories])
+
+
+class TestProductIndex(unittest.TestCase):
+    """Tests for ProductIndex"""
+
+    def setUp(self):
+        self.entries = [
+            entry("1", "Launched", "Azure Cosmos DB", "Databases"),
+            entry("2", "In preview", "Azure Functions", "Compute"),
+            entry("3", "Retirements", "azure cosmos db", "Azure Synapse Analytics"),
+            entry("4"),
+        ]
+        self.index = ProductIndex(self.entries, azureupdatehelper.docid_from_url)
+
+    def test_products_are_sorted_and_case_insensitive(self):
+        self.assertEqual(self.index.products(), [
+            "Azure Cosmos DB", "Azure Functions", "Azure Synapse Analytics", "Compute", "Databases",
+            "In preview", "Launched", "Retirements",
+        ])
+
+    def test_docids(self):
+        self.assertEqual(self.index.docids(["AZURE COSMOS DB"]), {"1", "3"})
+        self.assertEqual(self.index.docids(["Azure Functions", "Retirements"]), {"2", "3"})
+        self.assertEqual(self.index.docids(["Azure Kubernetes Service"]), set())
+        self.assertEqual(self.index.docids([]), set())
+
+    def test_add(self):
+        self.index.add("5", ["Azure Functions", "", None])
+        self.assertEqual(self.index.docids(["azure functions"]), {"2", "5"})
+
+
+class TestProductFilter(unittest.TestCase):
+    """Tests for the product filter in azureupdatehelper"""
+
+    def setUp(self):
+        self.entries = [
+            entry("1", "Azure Cosmos DB"),
+            entry("2", "Azure Functions"),
+            entry("3", "Azure SQL Database"),
+        ]
+        self.urls = [e.link for e in self.entries] + ["https://azure.microsoft.com/updates?id=old"]
+        self.store = UpdateStore(":memory:")
+        self.addCleanup(self.store.close)
+        self.store.upsert_article({"id": "old", "title": "Old update", "products": ["Azure Functions", "Azure Monitor"],
+                                   "description": "", "created": None, "modified": None})
+        patcher = patch('azureupdatehelper.get_update_store', return_value=None)
+        self.mock_get_update_store = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_no_products_keeps_every_url(self):
+        self.assertEqual(azureupdatehelper.filter_urls_by_products(self.urls, [], self.entries), self.urls)
+
+    def test_filter_by_feed_categories(self):
+        self.assertEqual(azureupdatehelper.filter_urls_by_products(self.urls, ["azure functions"], self.entries),
+                         [self.urls[1]])
+        self.assertEqual(azureupdatehelper.update_products(self.entries),
+                         ["Azure Cosmos DB", "Azure Functions", "Azure SQL Database"])
+
+    def test_filter_includes_stored_products(self):
+        self.mock_get_update_store.return_value = self.store
+
+        self.assertEqual(azureupdatehelper.filter_urls_by_products(self.urls, ["Azure Functions"], self.entries),
+                         [self.urls[1], self.urls[3]])
+        self.assertEqual(azureupdatehelper.filter_urls_by_products(self.urls, ["Azure Monitor"], self.entries),
+                         [self.urls[3]])
+        self.assertEqual(azureupdatehelper.update_products(self.entries),
+                         ["Azure Cosmos DB", "Azure Functions", "Azure Monitor", "Azure SQL Database"])
+
+    def test_index_is_built_once_per_feed(self):
+        self.assertIs(azureupdatehelper.feed_product_index(self.entries),
+                      azureupdatehelper.feed_product_index(self.entries))
+        self.assertIsNot(azureupdatehelper.feed_product_index(self.entries),
+                         azureupdatehelper.feed_product_index(list(self.entries)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+
+from prompt_compaction import (
+    TRUNCATION_MARK, compact_description, compact_links, normalize_link, normalize_whitespace,
+    remove_boilerplate, split_into_chunks, truncate_to_tokens
+)
+from rate_limiter import estimate_tokens
+
+
+class TestNormalization(unittest.TestCase):
+    """Tests for whitespace and boilerplate removal"""
+
+    def test_normalize_whitespace(self):
+        text = "\n\n  Azure   Functions\tnow\xa0supports  \n\n\n  Python 3.12.  \r\n"
+        self.assertEqual(normalize_whitespace(text), "Azure Functions now supports\nPython 3.12.")
+
+    def test_remove_boilerplate(self):
+        text = "\n".join([
+            "Azure Functions now supports Python 3.12.",
+            "Learn more.",
+            "For more information, see the documentation.",
+            "Azure Functions now supports Python 3.12.",
+            "Read more about the retirement:",
+            "詳細はこちらをご覧ください。",
+            "Learn more about pricing in the new tiers, which start at $10 per month, and plan your migration now.",
+        ])
+        self.assertEqual(remove_boilerplate(text).splitlines(), [
+            "Azure Functions now supports Python 3.12.",
+            "Learn more about pricing in the new tiers, which start at $10 per month, and plan your migration now.",
+        ])
+
+
+class TestCompactLinks(unittest.TestCase):
+    """Tests for link deduplication"""
+
+    def test_normalize_link(self):
+        self.assertEqual(
+            normalize_link("HTTPS://Learn.Microsoft.com/azure/aks/?WT.mc_id=abc&view=1&utm_source=x#intro"),
+            "https://learn.microsoft.com/azure/aks?view=1"
+        )
+        self.assertEqual(normalize_link("https://aka.ms/"), "https://aka.ms")
+
+    def test_dedupe_and_cap(self):
+        links = ["https://aka.ms/a", "https://aka.ms/a/", "https://aka.ms/a#x", "", "https://aka.ms/b", "https://aka.ms/c"]
+        self.assertEqual(compact_links(links), ["https://aka.ms/a", "https://aka.ms/b", "https://aka.ms/c"])
+        self.assertEqual(compact_links(links, max_links=2), ["https://aka.ms/a", "https://aka.ms/b"])
+
+
+class TestTruncateToTokens(unittest.TestCase):
+    """Tests for truncate_to_tokens"""
+
+    def test_text_within_budget_is_unchanged(self):
+        self.assertEqual(truncate_to_tokens("Short text.", 100), "Short text.")
+
+    def test_cut_at_sentence_boundary(self):
+        text = "First sentence here. Second sentence here. Third sentence here."
+        truncated = truncate_to_tokens(text, 12)
+        self.assertEqual(truncated, "First sentence here. Second sentence here." + TRUNCATION_MARK)
+        self.assertLessEqual(estimate_tokens(truncated), 12)
+
+    def test_cut_cjk_sentences(self):
+        text = "一つ目の文です。二つ目の文です。三つ目の文です。"
+        self.assertEqual(truncate_to_tokens(text, 18), "一つ目の文です。二つ目の文です。" + TRUNCATION_MARK)
+
+    def test_cut_long_sentence_by_characters(self):
+        truncated = truncate_to_tokens("x" * 400, 10)
+        self.assertTrue(truncated.endswith(TRUNCATION_MARK))
+        self.assertLessEqual(estimate_tokens(truncated), 10)
+
+    def test_no_budget(self):
+        self.assertEqual(truncate_to_tokens("Some text.", 0), "")
+
+
+class TestSplitIntoChunks(unittest.TestCase):
+    """Tests for split_into_chunks"""
+
+    def test_chunks_fit_and_keep_the_text(self):
+        text = "\n".join(" ".join(f"Entry {i}.{j} of the change log." for j in range(5)) for i in range(20))
+        chunks = split_into_chunks(text, 60)
+
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(estimate_tokens(chunk), 60)
+        self.assertEqual(" ".join(chunks).split(), text.split())
+
+    def test_long_sentence_is_cut(self):
+        chunks = split_into_chunks("y" * 100, 10)
+        self.assertEqual("".join(chunks), "y" * 100)
+        self.assertTrue(all(estimate_tokens(chunk) <= 10 for chunk in chunks))
+
+    def test_empty_text(self):
+        self.assertEqual(split_into_chunks("", 10), [])
+
+
+class TestCompactDescription(unittest.TestCase):
+    """Tests for compact_description"""
+
+    def test_budget_includes_links_and_reserved_tokens(self):
+        text = " ".join(f"Sentence number {i} of a long retirement notice." for i in range(200))
+        links = [f"https://aka.ms/link{i}" for i in range(30)]
+
+        compacted, kept = compact_description(text, links, max_tokens=300, max_links=5, reserved_tokens=20)
+
+        self.assertEqual(len(kept), 5)
+        self.assertTrue(compacted.endswith("notice." + TRUNCATION_MARK))
+        self.assertLessEqual(estimate_tokens(compacted) + estimate_tokens(", ".join(kept)) + 20, 300)
+
+    def test_no_budget_keeps_whole_text(self):
+        text = "Sentence. " * 500
+        compacted, _ = compact_description(text, [], max_tokens=0)
+        self.assertEqual(compacted, text.strip())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+import httpx
+import openai
+
+import azureupdatehelper
+from rate_limiter import RateLimiter, TokenBucket, estimate_tokens, retry_after_seconds
+from retry_policy import RetryBudget
+
+
+class TestEstimateTokens(unittest.TestCase):
+    """Tests for estimate_tokens"""
+
+    def test_ascii_text(self):
+        self.assertEqual(estimate_tokens("a" * 40), 10)
+
+    def test_non_ascii_text(self):
+        self.assertEqual(estimate_tokens("日本語"), 3)
+
+    def test_empty_text(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens(None), 0)
+
+
+class TestRetryAfterSeconds(unittest.TestCase):
+    """Tests for retry_after_seconds"""
+
+    def test_retry_after_seconds(self):
+        self.assertEqual(retry_after_seconds({"retry-after": "7"}), 7.0)
+
+    def test_retry_after_ms_takes_precedence(self):
+        self.assertEqual(retry_after_seconds({"retry-after-ms": "1500", "retry-after": "7"}), 1.5)
+
+    def test_retry_after_http_date(self):
+        with patch('rate_limiter.time.time', return_value=1730411100.0):
+            self.assertEqual(retry_after_seconds({"retry-after": "Thu, 31 Oct 2024 21:45:10 GMT"}), 10.0)
+
+    def test_missing_or_invalid(self):
+        self.assertIsNone(retry_after_seconds(None))
+        self.assertIsNone(retry_after_seconds({}))
+        self.assertIsNone(retry_after_seconds({"retry-after": "soon"}))
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Tests for TokenBucket"""
+
+    def test_reserve_within_capacity(self):
+        bucket = TokenBucket(60)
+        self.assertEqual(bucket.reserve(60, bucket.updated_at), 0.0)
+
+    def test_reserve_beyond_capacity_waits_for_refill(self):
+        bucket = TokenBucket(60)
+        now = bucket.updated_at
+        bucket.reserve(60, now)
+        # One token per second: the next request waits 1 second, the one after 2 seconds
+        self.assertAlmostEqual(bucket.reserve(1, now), 1.0)
+        self.assertAlmostEqual(bucket.reserve(1, now), 2.0)
+
+    def test_refill_over_time(self):
+        bucket = TokenBucket(60)
+        now = bucket.updated_at
+        bucket.reserve(60, now)
+        self.assertEqual(bucket.reserve(10, now + 10), 0.0)
+
+    def test_oversized_request_waits_for_full_bucket(self):
+        bucket = TokenBucket(60)
+        now = bucket.updated_at
+        bucket.reserve(1, now)
+        self.assertAlmostEqual(bucket.reserve(1000, now), 1.0)
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Tests for RateLimiter"""
+
+    @patch('rate_limiter.time.monotonic', return_value=100.0)
+    def test_unlimited(self, mock_monotonic):
+        limiter = RateLimiter()
+        for _ in range(100):
+            self.assertEqual(limiter.reserve(10000), 0.0)
+
+    @patch('rate_limiter.time.monotonic', return_value=100.0)
+    def test_requests_per_minute(self, mock_monotonic):
+        limiter = RateLimiter(requests_per_minute=2)
+        self.assertEqual(limiter.reserve(1), 0.0)
+        self.assertEqual(limiter.reserve(1), 0.0)
+        self.assertAlmostEqual(limiter.reserve(1), 30.0)
+
+    @patch('rate_limiter.time.monotonic', return_value=100.0)
+    def test_tokens_per_minute(self, mock_monotonic):
+        limiter = RateLimiter(tokens_per_minute=600)
+        self.assertEqual(limiter.reserve(600), 0.0)
+        self.assertAlmostEqual(limiter.reserve(100), 10.0)
+
+    @patch('rate_limiter.time.monotonic', return_value=100.0)
+    def test_pause(self, mock_monotonic):
+        limiter = RateLimiter()
+        limiter.pause(5)
+        self.assertAlmostEqual(limiter.reserve(1), 5.0)
+        self.assertEqual(limiter.throttle_count, 1)
+
+    @patch('rate_limiter.time.sleep')
+    @patch('rate_limiter.time.monotonic', return_value=100.0)
+    def test_acquire_sleeps(self, mock_monotonic, mock_sleep):
+        limiter = RateLimiter(requests_per_minute=1)
+        limiter.acquire(1)
+        mock_sleep.assert_not_called()
+        limiter.acquire(1)
+        mock_sleep.assert_called_once()
+        self.assertAlmostEqual(mock_sleep.call_args[0][0], 60.0)
+
+
+def rate_limit_error(retry_after="2"):
+    request = httpx.Request("POST", "https://example.com/openai/deployments/test/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return openai.RateLimitError("Too Many Requests", response=response, body=None)
+
+
+def server_error():
+    request = httpx.Request("POST", "https://example.com/openai/deployments/test/chat/completions")
+    response = httpx.Response(500, request=request)
+    return openai.InternalServerError("Internal Server Error", response=response, body=None)
+
+
+class TestChatCompletion(unittest.TestCase):
+    """Tests for azureupdatehelper.chat_completion"""
+
+    def setUp(self):
+        self.limiter = MagicMock()
+        patcher = patch('azureupdatehelper._rate_limiter', self.limiter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_estimated_tokens_are_reserved(self):
+        client = MagicMock()
+        messages = [{"role": "system", "content": "a" * 40}, {"role": "user", "content": "日本語"}]
+        azureupdatehelper.chat_completion(client, model="gpt-4o", messages=messages)
+
+        self.limiter.acquire.assert_called_once_with(10 + 3 + azureupdatehelper.COMPLETION_TOKENS_ESTIMATE)
+        client.chat.completions.create.assert_called_once_with(model="gpt-4o", messages=messages)
+
+    def test_throttled_request_is_queued_again(self):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [rate_limit_error("2"), "response"]
+
+        response = azureupdatehelper.chat_completion(client, model="gpt-4o", messages=[])
+
+        self.assertEqual(response, "response")
+        self.limiter.pause.assert_called_once_with(2.0)
+        self.assertEqual(self.limiter.acquire.call_count, 2)
+
+    @patch('azureupdatehelper.AOAI_RATE_LIMIT_RETRIES', 1)
+    def test_gives_up_after_retries(self):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [rate_limit_error(), rate_limit_error()]
+
+        with self.assertRaises(openai.RateLimitError):
+            azureupdatehelper.chat_completion(client, model="gpt-4o", messages=[])
+
+    @patch('retry_policy.time.sleep')
+    def test_server_errors_are_retried_with_backoff(self, mock_sleep):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [server_error(), "response"]
+
+        with patch('azureupdatehelper._llm_retry_budget', RetryBudget()):
+            response = azureupdatehelper.chat_completion(client, model="gpt-4o", messages=[])
+
+        self.assertEqual(response, "response")
+        mock_sleep.assert_called_once()
+        self.limiter.pause.assert_not_called()
+
+    def test_other_errors_are_not_retried(self):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = ValueError("bad request")
+
+        with self.assertRaises(ValueError):
+            azureupdatehelper.chat_completion(client, model="gpt-4o", messages=[])
+        self.limiter.pause.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import asyncio
+import unittest
+from unittest.mock import patch, MagicMock
+
+from retry_policy import NO_RETRY, RetryBudget, RetryDecision, RetryPolicy, RetryableStatusError
+
+
+class TransientError(Exception):
+    pass
+
+
+class ThrottledError(Exception):
+    pass
+
+
+class ProcessedError(Exception):
+    pass
+
+
+def classify(error):
+    if isinstance(error, TransientError):
+        return RetryDecision(True, maybe_processed=False)
+    if isinstance(error, ThrottledError):
+        return RetryDecision(True, retry_after=3.0, throttled=True, maybe_processed=False)
+    if isinstance(error, ProcessedError):
+        return RetryDecision(True)
+    return NO_RETRY
+
+
+class TestRetryBudget(unittest.TestCase):
+    """Tests for RetryBudget"""
+
+    def test_budget_stops_retries_after_failures(self):
+        budget = RetryBudget(max_tokens=4, token_ratio=0.5)
+        budget.record_failure()
+        self.assertTrue(budget.can_retry())
+        budget.record_failure()
+        self.assertFalse(budget.can_retry())
+
+    def test_successes_refill_budget(self):
+        budget = RetryBudget(max_tokens=4, token_ratio=0.5)
+        budget.record_failure()
+        budget.record_failure()
+        budget.record_success()
+        self.assertTrue(budget.can_retry())
+        for _ in range(10):
+            budget.record_success()
+        self.assertEqual(budget.tokens, 4)
+
+
+@patch('retry_policy.time.sleep')
+class TestRetryPolicy(unittest.TestCase):
+    """Tests for RetryPolicy"""
+
+    def test_success_is_not_retried(self, mock_sleep):
+        func = MagicMock(return_value="ok")
+        self.assertEqual(RetryPolicy(classify).call(func), "ok")
+        func.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    def test_transient_failure_is_retried(self, mock_sleep):
+        func = MagicMock(side_effect=[TransientError(), TransientError(), "ok"])
+        self.assertEqual(RetryPolicy(classify, max_attempts=3).call(func), "ok")
+        self.assertEqual(func.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_gives_up_after_max_attempts(self, mock_sleep):
+        func = MagicMock(side_effect=TransientError())
+        with self.assertRaises(TransientError):
+            RetryPolicy(classify, max_attempts=3).call(func)
+        self.assertEqual(func.call_count, 3)
+
+    def test_fatal_error_is_raised_immediately(self, mock_sleep):
+        func = MagicMock(side_effect=ValueError())
+        with self.assertRaises(ValueError):
+            RetryPolicy(classify).call(func)
+        func.assert_called_once()
+
+    def test_non_idempotent_call_is_not_retried_when_maybe_processed(self, mock_sleep):
+        func = MagicMock(side_effect=[ProcessedError(), "ok"])
+        with self.assertRaises(ProcessedError):
+            RetryPolicy(classify).call(func, idempotent=False)
+        func = MagicMock(side_effect=[TransientError(), "ok"])
+        self.assertEqual(RetryPolicy(classify).call(func, idempotent=False), "ok")
+
+    def test_throttled_call_waits_for_retry_after(self, mock_sleep):
+        func = MagicMock(side_effect=[ThrottledError(), "ok"])
+        self.assertEqual(RetryPolicy(classify).call(func), "ok")
+        mock_sleep.assert_called_once_with(3.0)
+
+    def test_throttled_call_delegates_wait(self, mock_sleep):
+        on_throttle = MagicMock()
+        func = MagicMock(side_effect=[ThrottledError(), "ok"])
+        self.assertEqual(RetryPolicy(classify, on_throttle=on_throttle).call(func), "ok")
+        on_throttle.assert_called_once_with(3.0)
+        mock_sleep.assert_not_called()
+
+    def test_throttled_retries_are_limited(self, mock_sleep):
+        func = MagicMock(side_effect=ThrottledError())
+        with self.assertRaises(ThrottledError):
+            RetryPolicy(classify, max_throttle_retries=2).call(func)
+        self.assertEqual(func.call_count, 3)
+
+    def test_exhausted_budget_stops_retries(self, mock_sleep):
+        budget = RetryBudget(max_tokens=2, token_ratio=0.1)
+        func = MagicMock(side_effect=TransientError())
+        with self.assertRaises(TransientError):
+            RetryPolicy(classify, max_attempts=5, budget=budget).call(func)
+        # The first failure leaves 1 token, which is not more than half of the budget
+        func.assert_called_once()
+
+    def test_backoff_is_capped(self, mock_sleep):
+        policy = RetryPolicy(classify, base_delay=1.0, max_delay=4.0)
+        with patch('retry_policy.random.uniform', side_effect=lambda low, high: high):
+            self.assertEqual([policy.backoff(attempt) for attempt in range(1, 6)], [1.0, 2.0, 4.0, 4.0, 4.0])
+
+    def test_retry_after_is_a_lower_bound_for_transient_errors(self, mock_sleep):
+        def classify_with_retry_after(error):
+            return RetryDecision(True, retry_after=5.0)
+        func = MagicMock(side_effect=[RetryableStatusError(MagicMock(status_code=503)), "ok"])
+        RetryPolicy(classify_with_retry_after, base_delay=0.1).call(func)
+        self.assertEqual(mock_sleep.call_args[0][0], 5.0)
+
+
+class TestRetryPolicyAsync(unittest.TestCase):
+    """Tests for RetryPolicy.acall"""
+
+    @patch('retry_policy.asyncio.sleep')
+    def test_acall_retries(self, mock_sleep):
+        calls = []
+
+        async def sleep(delay):
+            calls.append(delay)
+        mock_sleep.side_effect = sleep
+
+        attempts = iter([TransientError(), "ok"])
+
+        async def func():
+            result = next(attempts)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        self.assertEqual(asyncio.run(RetryPolicy(classify).acall(func)), "ok")
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
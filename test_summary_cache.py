@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from summary_cache import SummaryCache
+
+
+class TestSummaryCache(unittest.TestCase):
+    """Tests for SummaryCache"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'summaries.sqlite3')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_and_set(self):
+        """Test that stored values are returned and counted as hits"""
+        cache = SummaryCache(self.path)
+        self.assertIsNone(cache.get('key'))
+        cache.set('key', 'Summary')
+        self.assertEqual(cache.get('key'), 'Summary')
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'evictions': 0, 'entries': 1})
+        cache.close()
+
+    def test_persists_between_instances(self):
+        """Test that values survive reopening the cache file"""
+        cache = SummaryCache(self.path)
+        cache.set('key', '要約')
+        cache.close()
+
+        reopened = SummaryCache(self.path)
+        self.assertEqual(reopened.get('key'), '要約')
+        reopened.close()
+
+    @patch('summary_cache.time.time')
+    def test_ttl_expiry(self, mock_time):
+        """Test that entries older than the TTL are treated as misses"""
+        mock_time.return_value = 1000.0
+        cache = SummaryCache(self.path, ttl_seconds=60)
+        cache.set('key', 'Summary')
+
+        mock_time.return_value = 1061.0
+        self.assertIsNone(cache.get('key'))
+        stats = cache.stats()
+        self.assertEqual(stats['entries'], 0)
+        self.assertEqual(stats['evictions'], 1)
+        cache.close()
+
+    @patch('summary_cache.time.time')
+    def test_size_eviction_removes_least_recently_used(self, mock_time):
+        """Test that the least recently used entry is evicted above max_entries"""
+        cache = SummaryCache(self.path, max_entries=2, ttl_seconds=0)
+        mock_time.return_value = 1.0
+        cache.set('a', 'A')
+        mock_time.return_value = 2.0
+        cache.set('b', 'B')
+        mock_time.return_value = 3.0
+        cache.get('a')
+        mock_time.return_value = 4.0
+        cache.set('c', 'C')
+
+        self.assertEqual(cache.get('a'), 'A')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 'C')
+        self.assertEqual(cache.stats()['evictions'], 1)
+        cache.close()
+
+    def test_make_key_and_prompt_hash(self):
+        """Test cache key helpers"""
+        self.assertEqual(SummaryCache.make_key('summary', '123', None, 'gpt-4o'), 'summary|123||gpt-4o')
+        self.assertEqual(SummaryCache.prompt_hash('prompt'), SummaryCache.prompt_hash('prompt'))
+        self.assertNotEqual(SummaryCache.prompt_hash('prompt ja'), SummaryCache.prompt_hash('prompt en'))
+
+    def test_clear(self):
+        """Test that clear removes entries and resets counters"""
+        cache = SummaryCache(self.path)
+        cache.set('key', 'Summary')
+        cache.get('key')
+        cache.clear()
+        self.assertEqual(cache.stats(), {'hits': 0, 'misses': 0, 'evictions': 0, 'entries': 0})
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,12 @@
 import unittest
 from unittest.mock import patch, MagicMock
 import main
+from adaptive_concurrency import AIMDLimiter, shared_limiter
 from pptx import Presentation
 import tempfile
 import os
+import threading
+import time
 
 
 class TestFetchUpdateData(unittest.TestCase):
@@ -18,24 +21,23 @@ class TestFetchUpdateData(unittest.TestCase):
         mock_summarize_for_table, mock_get_table_prompt
     ):
         """Test that fetch_update_data returns data in the correct format"""
+        article_data = {
+            'title': 'Test Azure Update',
+            'products': ['Azure Service'],
+            'description': '<p>Test description</p>'
+        }
         # Mock the read_and_summary response
         mock_read_and_summary.return_value = {
             'title': 'Test Azure Update',
             'publishedDate': '2024-01-15T10:30:00.000Z',
             'url': 'https://example.com/update/123',
             'summary': 'Line 1 summary\nLine 2 summary\nLine 3 summary',
-            'referenceLink': 'https://docs.example.com/ref1, https://docs.example.com/ref2'
+            'referenceLink': 'https://docs.example.com/ref1, https://docs.example.com/ref2',
+            'article': article_data
         }
 
         # Mock table summary generation
         mock_get_table_prompt.return_value = 'Test table summary prompt'
-        mock_article_response = MagicMock()
-        mock_article_response.json.return_value = {
-            'title': 'Test Azure Update',
-            'products': ['Azure Service'],
-            'description': '<p>Test description</p>'
-        }
-        mock_get_article.return_value = mock_article_response
         mock_summarize_for_table.return_value = 'One sentence summary for table'
 
         mock_client = MagicMock()
@@ -63,9 +65,15 @@ class TestFetchUpdateData(unittest.TestCase):
         self.assertIsInstance(result['reference_links'], list)
         self.assertEqual(len(result['reference_links']), 2)
 
-        # Verify that read_and_summary was called
+        # Verify that read_and_summary was called with the table summary prompt (combined mode)
         mock_read_and_summary.assert_called_once_with(
-            mock_client, deployment_name, url, system_prompt
+            mock_client, deployment_name, url, system_prompt, 'Test table summary prompt', degrade_on_failure=True
+        )
+
+        # Verify that the article downloaded by read_and_summary is reused for the table summary
+        mock_get_article.assert_not_called()
+        mock_summarize_for_table.assert_called_once_with(
+            mock_client, deployment_name, article_data, 'Test table summary prompt'
         )
 
     @patch('main.i18n.get_table_summary_prompt')
@@ -86,9 +94,8 @@ class TestFetchUpdateData(unittest.TestCase):
             'referenceLink': ''
         }
 
-        # Mock table summary generation failure
+        # Mock table summary generation failure (no article payload in the result)
         mock_get_table_prompt.return_value = 'Test table summary prompt'
-        mock_get_article.return_value = None  # Simulate failure
 
         mock_client = MagicMock()
         deployment_name = 'gpt-4o'
@@ -104,6 +111,374 @@ class TestFetchUpdateData(unittest.TestCase):
         self.assertEqual(result['summary'], '')
         self.assertEqual(result['table_summary'], None)
         self.assertEqual(result['reference_links'], [])
+        mock_get_article.assert_not_called()
+        mock_summarize_for_table.assert_not_called()
+
+    @patch('main.azup.summarize_article_for_table')
+    @patch('main.azup.read_and_summary')
+    def test_fetch_update_data_uses_combined_table_summary(self, mock_read_and_summary, mock_summarize_for_table):
+        """Test that a table summary from the combined call is used without another LLM call"""
+        mock_read_and_summary.return_value = {
+            'title': 'Test Azure Update',
+            'publishedDate': '2024-01-15T10:30:00.000Z',
+            'url': 'https://example.com/update/123',
+            'summary': 'Summary',
+            'tableSummary': 'Combined table summary',
+            'referenceLink': '',
+            'article': {'title': 'Test Azure Update', 'products': [], 'description': ''}
+        }
+
+        result = main.fetch_update_data('https://azure.microsoft.com/updates/test', MagicMock(), 'gpt-4o',
+                                        'Test prompt', 'Table prompt')
+
+        self.assertEqual(result['table_summary'], 'Combined table summary')
+        mock_summarize_for_table.assert_not_called()
+
+    @patch('main.azup.COMBINED_SUMMARY', False)
+    @patch('main.azup.summarize_article_for_table')
+    @patch('main.azup.read_and_summary')
+    def test_fetch_update_data_without_combined_summary(self, mock_read_and_summary, mock_summarize_for_table):
+        """Test that the table summary is generated separately when combined mode is disabled"""
+        article_data = {'title': 'Test Azure Update', 'products': [], 'description': ''}
+        mock_read_and_summary.return_value = {
+            'title': 'Test Azure Update',
+            'publishedDate': '',
+            'url': 'https://example.com/update/123',
+            'summary': 'Summary',
+            'referenceLink': '',
+            'article': article_data
+        }
+        mock_summarize_for_table.return_value = 'Separate table summary'
+        mock_client = MagicMock()
+        url = 'https://azure.microsoft.com/updates/test'
+
+        result = main.fetch_update_data(url, mock_client, 'gpt-4o', 'Test prompt', 'Table prompt')
+
+        mock_read_and_summary.assert_called_once_with(
+            mock_client, 'gpt-4o', url, 'Test prompt', degrade_on_failure=True
+        )
+        mock_summarize_for_table.assert_called_once_with(mock_client, 'gpt-4o', article_data, 'Table prompt')
+        self.assertEqual(result['table_summary'], 'Separate table summary')
+
+    @patch('main.i18n.t')
+    @patch('main.azup.read_and_summary')
+    def test_fetch_update_data_marks_unavailable_update_as_skipped(self, mock_read_and_summary, mock_t):
+        """Test that an article that can't be downloaded is returned as a skipped marker"""
+        mock_read_and_summary.return_value = None
+        mock_t.side_effect = lambda key, **kwargs: key
+        url = 'https://azure.microsoft.com/updates?id=404'
+
+        result = main.fetch_update_data(url, MagicMock(), 'gpt-4o', 'Test prompt', 'Table prompt')
+
+        self.assertTrue(result['skipped'])
+        self.assertEqual(result['url'], url)
+        self.assertEqual(result['summary'], 'update_skipped')
+        self.assertEqual(result['reference_links'], [])
+
+    @patch('main.azup.summarize_article_for_table')
+    @patch('main.azup.read_and_summary')
+    def test_fetch_update_data_degraded_skips_table_summary(self, mock_read_and_summary, mock_summarize_for_table):
+        """Test that a degraded result doesn't call Azure OpenAI again for the table summary"""
+        mock_read_and_summary.return_value = {
+            'title': 'Degraded update',
+            'publishedDate': '2024-01-15T10:30:00.000Z',
+            'url': 'https://example.com/update/1',
+            'summary': 'First sentence of the description.',
+            'referenceLink': '',
+            'tableSummary': None,
+            'degraded': True,
+            'article': {'title': 'Degraded update', 'products': [], 'description': ''}
+        }
+
+        result = main.fetch_update_data('https://example.com/update/1', MagicMock(), 'gpt-4o', 'p', 'Table prompt')
+
+        mock_summarize_for_table.assert_not_called()
+        self.assertTrue(result['degraded'])
+        self.assertFalse(result['skipped'])
+        self.assertEqual(result['summary'], 'First sentence of the description.')
+
+
+class TestStreamingSummary(unittest.TestCase):
+    """Tests for streaming summaries to the UI"""
+
+    @patch('main.azup.summarize_article_for_table')
+    @patch('main.azup.read_and_summary')
+    def test_fetch_update_data_streams_summary(self, mock_read_and_summary, mock_summarize_for_table):
+        """Test that the on_token callback is passed to the combined read_and_summary call"""
+        mock_read_and_summary.return_value = {
+            'title': 'Streamed update',
+            'publishedDate': '2024-01-15T10:30:00.000Z',
+            'url': 'https://example.com/update/1',
+            'summary': 'Streamed summary',
+            'tableSummary': 'Table summary',
+            'referenceLink': '',
+            'article': {'title': 'Streamed update', 'products': [], 'description': ''}
+        }
+        on_token = MagicMock()
+        client = MagicMock()
+
+        result = main.fetch_update_data('u', client, 'gpt-4o', 'Test prompt', 'Table prompt', on_token=on_token)
+
+        mock_read_and_summary.assert_called_once_with(
+            client, 'gpt-4o', 'u', 'Test prompt', 'Table prompt', degrade_on_failure=True, on_token=on_token
+        )
+        mock_summarize_for_table.assert_not_called()
+        self.assertEqual(result['summary'], 'Streamed summary')
+        self.assertEqual(result['table_summary'], 'Table summary')
+
+    @patch('main.azup.get_summary_cache', return_value=None)
+    @patch('main.azup.get_update_store', return_value=None)
+    @patch('main.azup.get_article')
+    def test_default_streaming_makes_one_call_per_update(self, mock_get_article, mock_get_update_store,
+                                                         mock_get_summary_cache):
+        """Test that streaming with the default settings makes one Azure OpenAI call per update"""
+        self.assertTrue(main.STREAM_SUMMARIES)
+        self.assertTrue(main.azup.COMBINED_SUMMARY)
+        article = {'title': 'Streamed update', 'products': ['Azure'], 'description': '<p>Description</p>',
+                   'created': '2024-01-15T10:30:00.0000000Z', 'modified': '2024-01-15T10:30:00.0000000Z'}
+        mock_get_article.return_value = MagicMock(json=MagicMock(return_value=article))
+        answer = '{"summary": "Slide summary", "table_summary": "Table summary"}'
+        client = MagicMock()
+        client.chat.completions.create.side_effect = lambda **kwargs: iter(
+            [MagicMock(choices=[MagicMock(delta=MagicMock(content=answer[i:i + 8]))]) for i in range(0, len(answer), 8)]
+        )
+        tokens = []
+
+        results = [
+            main.fetch_update_data(f'https://azure.microsoft.com/updates?id={i}', client, 'gpt-4o', 'Slide', 'Table',
+                                   on_token=tokens.append)
+            for i in range(3)
+        ]
+
+        self.assertEqual(client.chat.completions.create.call_count, 3)
+        self.assertEqual([data['table_summary'] for data in results], ['Table summary'] * 3)
+        self.assertEqual("".join(tokens), 'Slide summary' * 3)
+
+    @patch('main.fetch_update_data')
+    def test_fetch_all_update_data_passes_stream_callbacks(self, mock_fetch):
+        """Test that each URL gets its own on_token callback"""
+        def fake_fetch(url, *args, on_token=None):
+            on_token(f'token {url}')
+            return {'url': url}
+        mock_fetch.side_effect = fake_fetch
+        on_tokens = [MagicMock(), MagicMock()]
+        client = MagicMock()
+
+        main.fetch_all_update_data(['a', 'b'], client, 'gpt-4o', 'prompt', 'table prompt', on_tokens=on_tokens)
+
+        on_tokens[0].assert_called_once_with('token a')
+        on_tokens[1].assert_called_once_with('token b')
+
+    @patch('main.STREAM_REFRESH_INTERVAL', 0)
+    def test_streaming_summary_renderer_shows_text_so_far(self):
+        """Test that the placeholder shows the accumulated summary"""
+        placeholder = MagicMock()
+        on_token = main.streaming_summary_renderer(placeholder, 'Title')
+
+        on_token('Hello ')
+        on_token('world')
+
+        self.assertIn('Hello world', placeholder.markdown.call_args[0][0])
+        self.assertIn('Title', placeholder.markdown.call_args[0][0])
+
+
+class TestFetchAllUpdateData(unittest.TestCase):
+    """Tests for fetch_all_update_data function"""
+
+    @patch('main.fetch_update_data')
+    def test_fetch_all_update_data_keeps_original_order(self, mock_fetch):
+        """Test that results are returned in URL order even when they finish out of order"""
+        def fake_fetch(url, client, deployment_name, system_prompt, table_summary_prompt):
+            # Earlier URLs take longer so that they finish last
+            time.sleep(0.01 * (5 - int(url)))
+            return {'url': url}
+        mock_fetch.side_effect = fake_fetch
+
+        urls = [str(i) for i in range(5)]
+        result = main.fetch_all_update_data(urls, MagicMock(), 'gpt-4o', 'prompt', 'table prompt', max_workers=5)
+
+        self.assertEqual([data['url'] for data in result], urls)
+        self.assertEqual(mock_fetch.call_count, 5)
+
+    @patch('main.fetch_update_data')
+    def test_fetch_all_update_data_respects_concurrency_limit(self, mock_fetch):
+        """Test that no more than max_workers updates are processed at the same time"""
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+
+        def fake_fetch(url, *args):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.02)
+            with lock:
+                state['running'] -= 1
+            return {'url': url}
+        mock_fetch.side_effect = fake_fetch
+
+        urls = [f'https://example.com/{i}' for i in range(10)]
+        main.fetch_all_update_data(urls, MagicMock(), 'gpt-4o', 'prompt', 'table prompt', max_workers=3)
+
+        self.assertLessEqual(state['peak'], 3)
+        self.assertGreater(state['peak'], 1)
+
+    @patch('main.fetch_update_data')
+    def test_fetch_all_update_data_reports_progress(self, mock_fetch):
+        """Test that the progress callback is called once per update"""
+        mock_fetch.side_effect = lambda url, *args: {'url': url}
+        progress = []
+
+        urls = ['a', 'b', 'c']
+        main.fetch_all_update_data(
+            urls, MagicMock(), 'gpt-4o', 'prompt', 'table prompt',
+            on_progress=lambda current, total: progress.append((current, total))
+        )
+
+        self.assertEqual(progress, [(1, 3), (2, 3), (3, 3)])
+
+    @patch('main.fetch_update_data')
+    def test_fetch_all_update_data_passes_prompts(self, mock_fetch):
+        """Test that both prompts are passed to fetch_update_data"""
+        mock_fetch.return_value = {}
+        client = MagicMock()
+
+        main.fetch_all_update_data(['a'], client, 'gpt-4o', 'prompt', 'table prompt')
+
+        mock_fetch.assert_called_once_with('a', client, 'gpt-4o', 'prompt', 'table prompt')
+
+    @patch('main.fetch_update_data')
+    def test_fetch_all_update_data_with_adaptive_limiter(self, mock_fetch):
+        """Test that the adaptive limiter bounds the updates in flight and learns from throttling"""
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+
+        def fake_fetch(url, *args):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.01)
+            if url == 'throttled':
+                main.azup._rate_limiter.throttle_count += 1
+            with lock:
+                state['running'] -= 1
+            return {'url': url}
+        mock_fetch.side_effect = fake_fetch
+
+        limiter = AIMDLimiter(initial_limit=2, max_limit=2)
+        urls = ['throttled'] + [f'https://example.com/{i}' for i in range(5)]
+        with patch.object(main.azup._rate_limiter, 'throttle_count', 0):
+            result = main.fetch_all_update_data(
+                urls, MagicMock(), 'gpt-4o', 'prompt', 'table prompt', limiter=limiter
+            )
+
+        self.assertEqual([data['url'] for data in result], urls)
+        self.assertLessEqual(state['peak'], 2)
+        self.assertEqual(limiter.changes()[0]['reason'], 'throttled')
+
+    @patch('main.fetch_update_data')
+    def test_adaptive_limiter_measures_only_azure_openai_calls(self, mock_fetch):
+        """Test that updates answered from the caches don't feed the latency baseline"""
+        def fake_fetch(url, *args):
+            if url == 'generated':
+                time.sleep(0.02)
+                main.azup._llm_calls.count = main.azup.llm_call_count() + 1
+            return {'url': url}
+        mock_fetch.side_effect = fake_fetch
+
+        limiter = AIMDLimiter(initial_limit=1, max_limit=1)
+        main.fetch_all_update_data(['cached'] * 3, MagicMock(), 'gpt-4o', 'prompt', 'table prompt', limiter=limiter)
+        self.assertIsNone(limiter.baseline_latency)
+
+        main.fetch_all_update_data(['generated'], MagicMock(), 'gpt-4o', 'prompt', 'table prompt', limiter=limiter)
+        self.assertGreaterEqual(limiter.baseline_latency, 0.02)
+
+    @patch('main.i18n.t')
+    @patch('main.fetch_update_data')
+    def test_fetch_all_update_data_skips_updates_after_deadline(self, mock_fetch, mock_t):
+        """Test that updates not finished by the deadline are returned as skipped without waiting"""
+        release = threading.Event()
+        mock_t.side_effect = lambda key, **kwargs: key
+
+        def fake_fetch(url, *args):
+            if url == 'slow':
+                release.wait(5)
+            return {'url': url, 'skipped': False}
+        mock_fetch.side_effect = fake_fetch
+
+        started = time.monotonic()
+        try:
+            result = main.fetch_all_update_data(
+                ['fast', 'slow'], MagicMock(), 'gpt-4o', 'prompt', 'table prompt',
+                max_workers=2, deadline=time.monotonic() + 0.2
+            )
+        finally:
+            release.set()
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(result[0], {'url': 'fast', 'skipped': False})
+        self.assertTrue(result[1]['skipped'])
+        self.assertEqual(result[1]['url'], 'slow')
+
+    @patch('main.i18n.t')
+    @patch('main.fetch_update_data')
+    def test_updates_waiting_for_the_limiter_are_not_started_after_deadline(self, mock_fetch, mock_t):
+        """Test that the deadline stops the updates queued on the limiter and the streaming of abandoned ones"""
+        release = threading.Event()
+        mock_t.side_effect = lambda key, **kwargs: key
+        started = []
+
+        def fake_fetch(url, *args, on_token=None):
+            started.append(url)
+            if url == 'slow':
+                release.wait(5)
+                on_token('late token')
+            return {'url': url, 'skipped': False}
+        mock_fetch.side_effect = fake_fetch
+        on_tokens = [MagicMock() for _ in range(4)]
+
+        limiter = AIMDLimiter(initial_limit=1, max_limit=4)
+        try:
+            result = main.fetch_all_update_data(
+                ['slow', 'a', 'b', 'c'], MagicMock(), 'gpt-4o', 'prompt', 'table prompt',
+                limiter=limiter, deadline=time.monotonic() + 0.2, on_tokens=on_tokens
+            )
+        finally:
+            release.set()
+        # Let the abandoned update and the workers waiting for its slot finish
+        for _ in range(100):
+            if limiter.in_flight == 0:
+                break
+            time.sleep(0.01)
+
+        self.assertTrue(all(data['skipped'] for data in result))
+        self.assertEqual(started, ['slow'])
+        on_tokens[0].assert_not_called()
+        self.assertEqual(limiter.in_flight, 0)
+
+    @patch('main.i18n.t')
+    @patch('main.fetch_update_data')
+    def test_fetch_all_update_data_skips_failed_updates(self, mock_fetch, mock_t):
+        """Test that an exception in one update doesn't abort the whole generation"""
+        mock_t.side_effect = lambda key, **kwargs: key
+
+        def fake_fetch(url, *args):
+            if url == 'broken':
+                raise RuntimeError('boom')
+            return {'url': url}
+        mock_fetch.side_effect = fake_fetch
+
+        result = main.fetch_all_update_data(['ok', 'broken'], MagicMock(), 'gpt-4o', 'prompt', 'table prompt')
+
+        self.assertEqual(result[0], {'url': 'ok'})
+        self.assertTrue(result[1]['skipped'])
+
+    def test_concurrency_limiter_is_shared_by_the_process(self):
+        """Test that reruns of the script get the limiter that learned from the previous runs"""
+        self.assertIs(main.concurrency_limiter, shared_limiter())
+
+    def test_fetch_all_update_data_empty_urls(self):
+        """Test that an empty URL list returns an empty list"""
+        self.assertEqual(main.fetch_all_update_data([], MagicMock(), 'gpt-4o', 'prompt', 'table prompt'), [])
 
 
 class TestCreateUpdateContentSlide(unittest.TestCase):
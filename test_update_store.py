@@ -0,0 +1,281 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from feedparser import FeedParserDict
+
+import azureupdatehelper
+from parsed_article import ParsedArticle
+from update_store import UpdateStore, parse_api_datetime
+
+
+def api_article(docid, title="Title", modified="2024-11-02T10:00:00.0000000Z"):
+    return {
+        "id": docid,
+        "title": title,
+        "products": ["Azure Cosmos DB"],
+        "description": f"<p>Description of {docid} with <a href='https://example.com/{docid}'>link</a></p>",
+        "created": "2024-11-01T10:00:00.0000000Z",
+        "modified": modified,
+    }
+
+
+class TestUpdateStore(unittest.TestCase):
+    """Tests for UpdateStore"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'updates.sqlite3')
+        self.store = UpdateStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.temp_dir.cleanup()
+
+    def test_parse_api_datetime(self):
+        self.assertEqual(parse_api_datetime("2024-11-01T10:00:00.0000000Z"),
+                         datetime(2024, 11, 1, 10, tzinfo=timezone.utc).timestamp())
+        self.assertIsNone(parse_api_datetime(None))
+        self.assertIsNone(parse_api_datetime("not a date"))
+
+    def test_upsert_and_get_article(self):
+        self.store.upsert_article(api_article("1"), "https://azure.microsoft.com/updates?id=1", feed_version="v1")
+
+        self.assertEqual(self.store.get_article("1"), api_article("1"))
+        self.assertEqual(self.store.feed_version("1"), "v1")
+        self.assertIsNone(self.store.get_article("2"))
+        self.assertIsNone(self.store.feed_version("2"))
+
+    def test_upsert_keeps_link_published_and_feed_version(self):
+        published = datetime(2024, 11, 3, tzinfo=timezone.utc).timestamp()
+        self.store.upsert_article(api_article("1"), "https://azure.microsoft.com/updates?id=1", published, "v1")
+        self.store.upsert_article(ParsedArticle(api_article("1", title="New title")))
+
+        self.assertEqual(self.store.get_article("1")["title"], "New title")
+        self.assertEqual(self.store.feed_version("1"), "v1")
+        self.assertEqual(self.store.urls_between(datetime(2024, 11, 2, 12, tzinfo=timezone.utc)),
+                         ["https://azure.microsoft.com/updates?id=1"])
+
+    def test_urls_between(self):
+        for day in range(1, 6):
+            self.store.upsert_article(api_article(str(day)), f"https://azure.microsoft.com/updates?id={day}",
+                                      datetime(2024, 11, day, tzinfo=timezone.utc).timestamp())
+
+        urls = self.store.urls_between(datetime(2024, 11, 2, tzinfo=timezone.utc), datetime(2024, 11, 4, tzinfo=timezone.utc))
+        self.assertEqual(urls, [f"https://azure.microsoft.com/updates?id={day}" for day in (4, 3, 2)])
+        self.assertEqual(len(self.store.urls_between()), 5)
+
+    def test_summaries_per_version(self):
+        self.store.set_summary("1", "summary", "prompt-ja", "gpt-4o", "v1", "要約")
+        self.store.set_summary("1", "table", "prompt-ja", "gpt-4o", "v1", "一文の要約")
+
+        self.assertEqual(self.store.get_summary("1", "summary", "prompt-ja", "gpt-4o", "v1"), "要約")
+        self.assertEqual(self.store.get_summary("1", "table", "prompt-ja", "gpt-4o", "v1"), "一文の要約")
+        self.assertIsNone(self.store.get_summary("1", "summary", "prompt-en", "gpt-4o", "v1"))
+        # A modified article needs new summaries
+        self.assertIsNone(self.store.get_summary("1", "summary", "prompt-ja", "gpt-4o", "v2"))
+
+    def test_persists_between_instances(self):
+        self.store.upsert_article(api_article("1"))
+        self.store.close()
+        self.store = UpdateStore(self.path)
+        self.assertEqual(self.store.get_article("1")["title"], "Title")
+        self.assertEqual(self.store.stats(), {"articles": 1, "summaries": 0, "backfilled_windows": 0,
+                                              "oldest": "2024-11-01", "latest": "2024-11-01"})
+
+
+class TestUpdateStoreSearch(unittest.TestCase):
+    """Tests for the full-text and product search of UpdateStore"""
+
+    def setUp(self):
+        self.store = UpdateStore(":memory:")
+        self.addCleanup(self.store.close)
+        updates = [
+            ("1", "Generally available: Vector search in Azure Cosmos DB", ["Azure Cosmos DB"], 1),
+            ("2", "Public preview: Flex Consumption plan", ["Azure Functions"], 2),
+            ("3", "Retirement: Azure Cosmos DB analytical store", ["Azure Cosmos DB", "Azure Synapse Analytics"], 3),
+            ("4", "Generally available: Azure SQL Database Hyperscale", ["Azure SQL Database"], 4),
+        ]
+        for docid, title, products, day in updates:
+            article = dict(api_article(docid, title), products=products)
+            self.store.upsert_article(article, f"https://azure.microsoft.com/updates?id={docid}",
+                                      datetime(2024, 11, day, tzinfo=timezone.utc).timestamp())
+
+    def ids(self, results):
+        return [result["id"] for result in results]
+
+    def test_search_words_in_title_and_products(self):
+        self.assertEqual(sorted(self.ids(self.store.search("cosmos"))), ["1", "3"])
+        self.assertEqual(self.ids(self.store.search("cosmos retirement")), ["3"])
+        self.assertEqual(self.ids(self.store.search('"flex consumption"')), ["2"])
+        self.assertEqual(self.store.search("kubernetes"), [])
+
+    def test_search_description_and_short_terms(self):
+        self.assertEqual(self.ids(self.store.search("Description of 2")), ["2"])
+        self.assertEqual(sorted(self.ids(self.store.search("Cosmos DB"))), ["1", "3"])
+
+    def test_title_matches_rank_first(self):
+        self.store.upsert_article(dict(api_article("5", "Azure Monitor update"), description="<p>Works with Hyperscale</p>"))
+        self.assertEqual(self.ids(self.store.search("hyperscale")), ["4", "5"])
+
+    def test_search_summaries_is_updated_incrementally(self):
+        self.assertEqual(self.store.search("ベクトル検索"), [])
+        self.store.set_summary("1", "summary", "prompt-ja", "gpt-4o", "v1", "Azure Cosmos DB のベクトル検索が一般提供")
+
+        self.assertEqual(self.ids(self.store.search("ベクトル検索")), ["1"])
+
+    def test_filter_by_product_and_date(self):
+        self.assertEqual(self.ids(self.store.search(products=["azure cosmos db"])), ["3", "1"])
+        self.assertEqual(self.ids(self.store.search(products=["Azure Functions", "Azure SQL Database"])), ["4", "2"])
+        self.assertEqual(self.ids(self.store.search(start=datetime(2024, 11, 2, tzinfo=timezone.utc),
+                                                    end=datetime(2024, 11, 3, tzinfo=timezone.utc))), ["3", "2"])
+        self.assertEqual(self.ids(self.store.search("cosmos", start=datetime(2024, 11, 2, tzinfo=timezone.utc))), ["3"])
+        self.assertEqual(len(self.store.search(limit=2)), 2)
+
+    def test_reindexes_modified_articles(self):
+        self.store.upsert_article(dict(api_article("2", "Public preview: Durable Functions"), products=["Azure Functions"]))
+
+        self.assertEqual(self.store.search("flex"), [])
+        self.assertEqual(self.ids(self.store.search("durable")), ["2"])
+        self.assertEqual(self.store.search("durable")[0]["link"], "https://azure.microsoft.com/updates?id=2")
+
+    def test_index_is_built_for_existing_stores(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'updates.sqlite3')
+            store = UpdateStore(path)
+            store.upsert_article(api_article("1", "Vector search"))
+            store._conn.execute("DROP TABLE updates_fts")
+            store.close()
+
+            store = UpdateStore(path)
+            self.assertEqual(self.ids(store.search("vector")), ["1"])
+            store.close()
+
+    @patch('azureupdatehelper.get_update_store')
+    def test_filter_urls_by_search(self, mock_get_update_store):
+        urls = [f"https://azure.microsoft.com/updates?id={docid}" for docid in ("4", "3", "2", "1")]
+        mock_get_update_store.return_value = self.store
+
+        self.assertEqual(azureupdatehelper.filter_urls_by_search(urls, "cosmos"), [urls[1], urls[3]])
+        self.assertEqual(azureupdatehelper.filter_urls_by_search(urls, "  "), urls)
+
+        mock_get_update_store.return_value = None
+        self.assertEqual(azureupdatehelper.filter_urls_by_search(urls, "cosmos"), urls)
+
+
+class TestUpdateStoreIntegration(unittest.TestCase):
+    """Tests for the update store in azureupdatehelper"""
+
+    def setUp(self):
+        self.store = UpdateStore(":memory:")
+        patcher = patch('azureupdatehelper.get_update_store', return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.store.close)
+
+    def entry(self, docid, days_ago, updated=None):
+        published = (datetime.now().astimezone() - timedelta(days=days_ago)).strftime(azureupdatehelper.DATE_FORMAT)
+        return FeedParserDict(link=f"https://azure.microsoft.com/updates?id={docid}", title=docid, published=published,
+                              updated=updated or published)
+
+    def response(self, article):
+        return MagicMock(status_code=200, text="", json=MagicMock(return_value=article))
+
+    @patch('azureupdatehelper.get_article')
+    def test_sync_downloads_only_new_and_modified_entries(self, mock_get_article):
+        mock_get_article.side_effect = lambda url: self.response(api_article(azureupdatehelper.docid_from_url(url)))
+        entries = [self.entry("1", 1), self.entry("2", 2), self.entry("3", 30)]
+
+        result = azureupdatehelper.sync_update_store(entries, datetime.now().astimezone() - timedelta(days=7))
+        self.assertEqual(result, {"synced": 2, "unchanged": 0, "failed": 0, "skipped": 0})
+
+        entries[1] = self.entry("2", 2, updated="Sat, 02 Nov 2024 05:15:20 Z")
+        mock_get_article.reset_mock()
+        result = azureupdatehelper.sync_update_store(entries, datetime.now().astimezone() - timedelta(days=7))
+
+        self.assertEqual(result, {"synced": 1, "unchanged": 1, "failed": 0, "skipped": 0})
+        mock_get_article.assert_called_once_with("https://azure.microsoft.com/updates?id=2")
+
+    @patch('azureupdatehelper.get_article', return_value=None)
+    def test_sync_failure(self, mock_get_article):
+        result = azureupdatehelper.sync_update_store([self.entry("1", 1)])
+        self.assertEqual(result, {"synced": 0, "unchanged": 0, "failed": 1, "skipped": 0})
+        self.assertIsNone(self.store.feed_version("1"))
+
+    @patch('azureupdatehelper.get_article')
+    def test_sync_reports_progress_and_stops_at_deadline(self, mock_get_article):
+        release = threading.Event()
+
+        def get_article(url):
+            if url.endswith("=slow"):
+                release.wait(5)
+            return self.response(api_article(azureupdatehelper.docid_from_url(url)))
+        mock_get_article.side_effect = get_article
+        entries = [self.entry("slow", 1)] + [self.entry(str(i), 2) for i in range(4)]
+        progress = []
+
+        try:
+            result = azureupdatehelper.sync_update_store(
+                entries, max_workers=1, on_progress=lambda current, total: progress.append((current, total)),
+                deadline=time.monotonic() + 0.2
+            )
+        finally:
+            release.set()
+
+        self.assertEqual(result, {"synced": 0, "unchanged": 0, "failed": 0, "skipped": 5})
+        self.assertEqual(progress, [])
+        time.sleep(0.1)
+        self.assertEqual(mock_get_article.call_count, 1)
+
+        result = azureupdatehelper.sync_update_store(
+            entries, on_progress=lambda current, total: progress.append((current, total))
+        )
+        self.assertEqual(result, {"synced": 4, "unchanged": 1, "failed": 0, "skipped": 0})
+        self.assertEqual(progress, [(1, 4), (2, 4), (3, 4), (4, 4)])
+
+    @patch('azureupdatehelper.get_article')
+    def test_sync_selected_links_reuses_the_feed_date_index(self, mock_get_article):
+        mock_get_article.side_effect = lambda url: self.response(api_article(azureupdatehelper.docid_from_url(url)))
+        entries = [self.entry("1", 1), self.entry("2", 2), self.entry("3", 3)]
+        index = azureupdatehelper.feed_date_index(entries)
+
+        result = azureupdatehelper.sync_update_store(entries, links=["https://azure.microsoft.com/updates?id=2"])
+
+        self.assertEqual(result, {"synced": 1, "unchanged": 0, "failed": 0, "skipped": 0})
+        mock_get_article.assert_called_once_with("https://azure.microsoft.com/updates?id=2")
+        self.assertIs(azureupdatehelper.feed_date_index(entries), index)
+
+    def test_target_update_urls_include_stored_updates(self):
+        old = (datetime.now().astimezone() - timedelta(days=200)).timestamp()
+        self.store.upsert_article(api_article("old"), "https://azure.microsoft.com/updates?id=old", old)
+        entries = [self.entry("1", 1)]
+
+        urls = azureupdatehelper.target_update_urls(entries, datetime.now().astimezone() - timedelta(days=365))
+
+        self.assertEqual(urls, ["https://azure.microsoft.com/updates?id=1", "https://azure.microsoft.com/updates?id=old"])
+
+    @patch('azureupdatehelper.get_summary_cache', return_value=None)
+    @patch('azureupdatehelper.get_article')
+    def test_read_and_summary_is_answered_from_the_store(self, mock_get_article, mock_get_summary_cache):
+        url = "https://azure.microsoft.com/updates?id=1"
+        mock_get_article.return_value = self.response(api_article("1"))
+        client = MagicMock()
+        client.chat.completions.create.return_value = MagicMock(
+            choices=[MagicMock(message=MagicMock(content='{"summary": "Long", "table_summary": "Short"}'))]
+        )
+
+        first = azureupdatehelper.read_and_summary(client, "Fake Deployment", url, "Slide", "Table")
+        second = azureupdatehelper.read_and_summary(client, "Fake Deployment", url, "Slide", "Table")
+
+        mock_get_article.assert_called_once()
+        self.assertEqual(client.chat.completions.create.call_count, 1)
+        self.assertEqual((second['summary'], second['tableSummary']), (first['summary'], first['tableSummary']))
+        self.assertEqual(second['article'], api_article("1"))
+
+
+if __name__ == '__main__':
+    unittest.main()
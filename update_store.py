@@ -0,0 +1,441 @@
+"""
+Local store of Azure Updates articles and their summaries.
+
+UpdateStore keeps every synced article (title, products, description, its
+plain text and links, created/modified dates and the published date of the
+feed) and the summaries generated for it in a SQLite file, so that decks for
+any date range and language are answered locally whenever possible. Only
+articles that are new or whose feed entry changed are downloaded again.
+
+The store also keeps a full-text index (FTS5) of the title, products,
+description and summaries of every article and a product index, both updated
+whenever an article or a summary is stored, so that updates are searched by
+keyword, product and date range without generating a deck:
+
+    python update_store.py sync [--days 7 | --start 2024-10-01 [--end 2024-12-31]]
+    python update_store.py search "Cosmos DB" [--product "Azure Cosmos DB"] [--days 90]
+    python update_store.py stats
+
+The file is set with UPDATE_STORE_PATH.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+from html_extractor import extract_text_and_links
+from parsed_article import ParsedArticle
+
+# Fields of the stored articles returned like the Azure Updates API article
+ARTICLE_FIELDS = ("id", "title", "products", "description", "created", "modified")
+
+# Full-text tokenizers in order of preference: trigram matches substrings (Japanese summaries have
+# no spaces between words), unicode61 is available with SQLite versions older than 3.34
+FTS_TOKENIZERS = ("trigram", "unicode61")
+# Columns of the full-text index and their weight in the ranking
+FTS_COLUMNS = ("title", "products", "text", "summaries")
+FTS_WEIGHTS = (10.0, 5.0, 1.0, 1.0)
+# Shortest term the trigram tokenizer can match (shorter terms are matched with LIKE)
+TRIGRAM_LENGTH = 3
+
+
+# Parse an Azure Updates API date ("2024-11-01T10:00:00.0000000Z") into a UTC timestamp
+def parse_api_datetime(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        logging.warning("Could not parse article date: %s", value)
+        return None
+
+
+class UpdateStore:
+    """
+    SQLite store of articles and summaries, safe to use from several threads.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the store file.
+
+        Args:
+            path: Path of the SQLite file (":memory:" for a process-local store).
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "id TEXT PRIMARY KEY, link TEXT, title TEXT NOT NULL, products TEXT NOT NULL, "
+            "description TEXT NOT NULL, text TEXT NOT NULL, links TEXT NOT NULL, created TEXT, modified TEXT, "
+            "published REAL, feed_version TEXT, synced_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS articles_published ON articles (published);"
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "id TEXT NOT NULL, kind TEXT NOT NULL, prompt_hash TEXT NOT NULL, deployment TEXT NOT NULL, "
+            "version TEXT NOT NULL, summary TEXT NOT NULL, created_at REAL NOT NULL, "
+            "PRIMARY KEY (id, kind, prompt_hash, deployment));"
+            "CREATE TABLE IF NOT EXISTS backfill_windows ("
+            "start REAL NOT NULL, end REAL NOT NULL, articles INTEGER NOT NULL, completed_at REAL NOT NULL, "
+            "PRIMARY KEY (start, end));"
+            "CREATE TABLE IF NOT EXISTS article_products ("
+            "product TEXT NOT NULL COLLATE NOCASE, id TEXT NOT NULL, PRIMARY KEY (product, id));"
+            "CREATE INDEX IF NOT EXISTS article_products_id ON article_products (id);"
+        )
+        self.tokenizer = self._create_search_index()
+        self._conn.commit()
+
+    def _create_search_index(self) -> str:
+        # Create the full-text index and fill it with the articles stored before it existed
+        row = self._conn.execute("SELECT sql FROM sqlite_master WHERE name = 'updates_fts'").fetchone()
+        if row is not None:
+            return next(tokenizer for tokenizer in FTS_TOKENIZERS if tokenizer in row[0])
+        for tokenizer in FTS_TOKENIZERS:
+            try:
+                self._conn.execute(
+                    f"CREATE VIRTUAL TABLE updates_fts USING fts5({', '.join(FTS_COLUMNS)}, tokenize='{tokenizer}')"
+                )
+                break
+            except sqlite3.OperationalError:
+                if tokenizer == FTS_TOKENIZERS[-1]:
+                    raise
+        for (docid,) in self._conn.execute("SELECT id FROM articles").fetchall():
+            self._index_article(docid)
+        return tokenizer
+
+    def _index_article(self, docid: str) -> None:
+        # Update the full-text and product indexes of a stored article (the caller holds the lock)
+        row = self._conn.execute("SELECT rowid, title, products, text FROM articles WHERE id = ?", (docid,)).fetchone()
+        if row is None:
+            return
+        rowid, title, products, text = row
+        products = json.loads(products)
+        summaries = self._conn.execute(
+            "SELECT group_concat(summary, char(10)) FROM summaries WHERE id = ?", (docid,)
+        ).fetchone()[0]
+        self._conn.execute("DELETE FROM updates_fts WHERE rowid = ?", (rowid,))
+        self._conn.execute(
+            "INSERT INTO updates_fts (rowid, title, products, text, summaries) VALUES (?, ?, ?, ?, ?)",
+            (rowid, title, ", ".join(products), text, summaries or "")
+        )
+        self._conn.execute("DELETE FROM article_products WHERE id = ?", (docid,))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO article_products (product, id) VALUES (?, ?)",
+            [(product, docid) for product in products if product]
+        )
+
+    def upsert_article(self, article: Mapping[str, Any], link: Optional[str] = None, published: Optional[float] = None,
+                       feed_version: Optional[str] = None) -> None:
+        """
+        Store an article, replacing the previous version.
+
+        Args:
+            article: Decoded Azure Updates API article (dict or ParsedArticle).
+            link: URL of the update in the feed (kept from the previous version if omitted).
+            published: Published date of the feed entry as a UTC timestamp
+                (kept from the previous version, or taken from 'created', if omitted).
+            feed_version: Version of the feed entry the article was synced for.
+        """
+        if isinstance(article, ParsedArticle):
+            text, links = article.text, article.links
+        else:
+            text, links = extract_text_and_links(article.get('description'))
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO articles (id, link, title, products, description, text, links, created, modified, "
+                "published, feed_version, synced_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET link = COALESCE(excluded.link, link), title = excluded.title, "
+                "products = excluded.products, description = excluded.description, text = excluded.text, "
+                "links = excluded.links, created = excluded.created, modified = excluded.modified, "
+                "published = COALESCE(?, published, excluded.published), "
+                "feed_version = COALESCE(excluded.feed_version, feed_version), synced_at = excluded.synced_at",
+                (
+                    article['id'], link, article.get('title') or "",
+                    json.dumps(list(article.get('products') or []), ensure_ascii=False),
+                    article.get('description') or "", text, json.dumps(links, ensure_ascii=False),
+                    article.get('created'), article.get('modified'),
+                    published if published is not None else parse_api_datetime(article.get('created')),
+                    feed_version, time.time(), published
+                )
+            )
+            self._index_article(article['id'])
+            self._conn.commit()
+
+    def get_article(self, docid: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a stored article.
+
+        Returns:
+            Article with the fields of the Azure Updates API (ARTICLE_FIELDS), or None if it is not stored.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, title, products, description, created, modified FROM articles WHERE id = ?", (docid,)
+            ).fetchone()
+        if row is None:
+            return None
+        article = dict(zip(ARTICLE_FIELDS, row))
+        article['products'] = json.loads(article['products'])
+        return article
+
+    def feed_version(self, docid: str) -> Optional[str]:
+        """Version of the feed entry the article was last synced for, or None if it is not stored."""
+        with self._lock:
+            row = self._conn.execute("SELECT feed_version FROM articles WHERE id = ?", (docid,)).fetchone()
+        return row[0] if row is not None else None
+
+    def urls_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[str]:
+        """
+        URLs of the stored updates published within a date range, newest first.
+
+        Args:
+            start: Earliest published date (timezone aware), or None for no lower bound.
+            end: Latest published date (timezone aware), or None for no upper bound.
+        """
+        query = "SELECT link FROM articles WHERE link IS NOT NULL AND published IS NOT NULL"
+        parameters = []
+        if start is not None:
+            query += " AND published >= ?"
+            parameters.append(start.timestamp())
+        if end is not None:
+            query += " AND published <= ?"
+            parameters.append(end.timestamp())
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY published DESC", parameters).fetchall()
+        return [row[0] for row in rows]
+
+    def get_summary(self, docid: str, kind: str, prompt_hash: str, deployment: str, version: str) -> Optional[str]:
+        """
+        Get a summary generated for a version of an article.
+
+        Args:
+            docid: Article ID.
+            kind: "summary" (slide) or "table".
+            prompt_hash: Hash of the system prompt (identifies the language).
+            deployment: Azure OpenAI deployment that generated it.
+            version: Version of the article (its modified date).
+
+        Returns:
+            The summary, or None if none was stored for this version.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary FROM summaries WHERE id = ? AND kind = ? AND prompt_hash = ? AND deployment = ? "
+                "AND version = ?", (docid, kind, prompt_hash, deployment, version)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def set_summary(self, docid: str, kind: str, prompt_hash: str, deployment: str, version: str, summary: str) -> None:
+        """Store a summary, replacing the one of a previous version."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (id, kind, prompt_hash, deployment, version, summary, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", (docid, kind, prompt_hash, deployment, version, summary, time.time())
+            )
+            self._index_article(docid)
+            self._conn.commit()
+
+    def _search_condition(self, query: str) -> Tuple[List[str], List[Any], bool]:
+        # Conditions on the full-text index for the terms ("quoted phrases" or words) of a query
+        conditions, parameters = [], []
+        terms = [term.strip('"') for term in re.findall(r'"[^"]*"|\S+', query or "")]
+        match = [term for term in terms if term and (self.tokenizer != "trigram" or len(term) >= TRIGRAM_LENGTH)]
+        if match:
+            conditions.append("updates_fts MATCH ?")
+            parameters.append(" ".join('"' + term.replace('"', '""') + '"' for term in match))
+        for term in terms:
+            if term and term not in match:
+                pattern = "%" + re.sub(r"([%_\\])", r"\\\1", term) + "%"
+                like = " OR ".join(f"updates_fts.{column} LIKE ? ESCAPE '\\'" for column in FTS_COLUMNS)
+                conditions.append(f"({like})")
+                parameters.extend([pattern] * len(FTS_COLUMNS))
+        return conditions, parameters, bool(match)
+
+    def search(self, query: str = "", start: Optional[datetime] = None, end: Optional[datetime] = None,
+               products: Optional[List[str]] = None, limit: int = 0) -> List[Dict[str, Any]]:
+        """
+        Search the stored updates.
+
+        Args:
+            query: Words or "quoted phrases" that must all appear in the title, products,
+                description or summaries (case-insensitive), or "" to list every update.
+            start: Earliest published date (timezone aware), or None for no lower bound.
+            end: Latest published date (timezone aware), or None for no upper bound.
+            products: Product names (case-insensitive) the updates must have one of, or None for any product.
+            limit: Maximum number of results (0 = no limit).
+
+        Returns:
+            Updates (id, link, title, products and published date as YYYY-MM-DD), best matches
+            first for a query, newest first otherwise.
+        """
+        conditions, parameters, ranked = self._search_condition(query)
+        query_sql = "SELECT a.id, a.link, a.title, a.products, a.published FROM articles a"
+        if conditions:
+            query_sql += " JOIN updates_fts ON updates_fts.rowid = a.rowid"
+        if start is not None:
+            conditions.append("a.published >= ?")
+            parameters.append(start.timestamp())
+        if end is not None:
+            conditions.append("a.published <= ?")
+            parameters.append(end.timestamp())
+        if products:
+            conditions.append(
+                f"a.id IN (SELECT id FROM article_products WHERE product IN ({', '.join('?' * len(products))}))"
+            )
+            parameters.extend(products)
+        if conditions:
+            query_sql += " WHERE " + " AND ".join(conditions)
+        weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+        query_sql += f" ORDER BY bm25(updates_fts, {weights})" if ranked else " ORDER BY a.published DESC"
+        query_sql += " LIMIT ?"
+        parameters.append(limit if limit > 0 else -1)
+        with self._lock:
+            rows = self._conn.execute(query_sql, parameters).fetchall()
+        return [
+            {
+                "id": docid,
+                "link": link,
+                "title": title,
+                "products": json.loads(products_json),
+                "published": datetime.fromtimestamp(published, timezone.utc).strftime('%Y-%m-%d') if published else None,
+            }
+            for docid, link, title, products_json, published in rows
+        ]
+
+    def products(self) -> List[str]:
+        """Names of the products of the stored articles, in alphabetical order."""
+        with self._lock:
+            rows = self._conn.execute("SELECT product FROM article_products GROUP BY product ORDER BY product").fetchall()
+        return [row[0] for row in rows]
+
+    def product_ids(self, products: List[str]) -> Set[str]:
+        """IDs of the stored articles about at least one of the products (case-insensitive)."""
+        if not products:
+            return set()
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT id FROM article_products WHERE product IN ({', '.join('?' * len(products))})",
+                list(products)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def mark_backfilled(self, start: datetime, end: datetime, articles: int) -> None:
+        """
+        Record that every article created within a window was stored by the backfill.
+
+        Args:
+            start: Start of the window (timezone aware, included).
+            end: End of the window (timezone aware, excluded).
+            articles: Number of articles stored for the window.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO backfill_windows (start, end, articles, completed_at) VALUES (?, ?, ?, ?)",
+                (start.timestamp(), end.timestamp(), articles, time.time())
+            )
+            self._conn.commit()
+
+    def is_backfilled(self, start: datetime, end: datetime) -> bool:
+        """Whether a window was completed by a previous backfill."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM backfill_windows WHERE start = ? AND end = ?", (start.timestamp(), end.timestamp())
+            ).fetchone()
+        return row is not None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get store statistics.
+
+        Returns:
+            Dictionary with the number of articles, summaries and backfilled windows
+            and the oldest and latest published dates.
+        """
+        with self._lock:
+            articles, oldest, latest = self._conn.execute(
+                "SELECT COUNT(*), MIN(published), MAX(published) FROM articles"
+            ).fetchone()
+            summaries = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+            windows = self._conn.execute("SELECT COUNT(*) FROM backfill_windows").fetchone()[0]
+        return {
+            "articles": articles,
+            "summaries": summaries,
+            "backfilled_windows": windows,
+            "oldest": datetime.fromtimestamp(oldest, timezone.utc).strftime('%Y-%m-%d') if oldest else None,
+            "latest": datetime.fromtimestamp(latest, timezone.utc).strftime('%Y-%m-%d') if latest else None,
+        }
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    """Main function"""
+    import argparse
+    from datetime import timedelta
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    import azureupdatehelper as azup
+
+    parser = argparse.ArgumentParser(description='Local store of Azure Updates articles and summaries')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    sync_parser = subparsers.add_parser('sync', help='Download new and modified updates of the RSS feed')
+    sync_parser.add_argument('--days', type=int, default=None, help='How many days back to sync (default: whole feed)')
+    sync_parser.add_argument('--start', default=None, help='Start date (YYYY-MM-DD)')
+    sync_parser.add_argument('--end', default=None, help='End date (YYYY-MM-DD)')
+    search_parser = subparsers.add_parser('search', help='Search the stored updates')
+    search_parser.add_argument('query', nargs='?', default="", help='Words or "quoted phrases" to search for')
+    search_parser.add_argument('--product', action='append', default=None, help='Product name (repeatable)')
+    search_parser.add_argument('--days', type=int, default=None, help='How many days back to search (default: all)')
+    search_parser.add_argument('--start', default=None, help='Start date (YYYY-MM-DD)')
+    search_parser.add_argument('--end', default=None, help='End date (YYYY-MM-DD)')
+    search_parser.add_argument('--limit', type=int, default=50, help='Maximum number of results (0 = no limit)')
+    search_parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    subparsers.add_parser('stats', help='Show the number of stored articles and summaries')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'), format='%(asctime)s - %(levelname)s - %(message)s')
+    store = azup.get_update_store()
+    if store is None:
+        print("UPDATE_STORE_PATH is not set. Please check the .env file.")
+        sys.exit(1)
+
+    if args.command == 'stats':
+        print(json.dumps(store.stats(), ensure_ascii=False))
+        return
+
+    start_date = end_date = None
+    if args.start:
+        start_date = datetime.strptime(args.start, '%Y-%m-%d').astimezone()
+    elif args.days is not None:
+        start_date = datetime.now().astimezone() - timedelta(days=args.days)
+    if args.end:
+        end_date = datetime.strptime(args.end, '%Y-%m-%d').astimezone() + timedelta(days=1)
+
+    if args.command == 'search':
+        results = store.search(args.query, start_date, end_date, args.product, args.limit)
+        if args.json:
+            print(json.dumps(results, ensure_ascii=False))
+        else:
+            for result in results:
+                print(f"{result['published']}\t{result['title']}\t{result['link'] or ''}")
+        return
+
+    result = azup.sync_update_store(azup.get_rss_feed_entries(), start_date, end_date)
+    print(json.dumps(result, ensure_ascii=False))
+    sys.exit(0 if result["failed"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()